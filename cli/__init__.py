@@ -2,7 +2,9 @@ import click
 
 from cli.aggregates import aggregates
 from cli.api import api
+from cli.bench import bench
 from cli.db import db
+from cli.gaps import gaps
 from cli.reorg import reorg
 from cli.stream import stream
 from indexer.utils.logging_utils import logging_basic_config
@@ -28,3 +30,5 @@ cli.add_command(api, "api")
 cli.add_command(aggregates, "aggregates")
 cli.add_command(reorg, "reorg")
 cli.add_command(db, "db")
+cli.add_command(gaps, "gaps")
+cli.add_command(bench, "bench")
@@ -0,0 +1,324 @@
+import logging
+import os
+import time
+
+import click
+import orjson
+
+from common.services.postgresql_service import PostgreSQLService
+from indexer.bench.micro import BENCHMARKS, DEFAULT_MEMORY_THRESHOLD, DEFAULT_THRESHOLD, compare, run_benchmarks
+from indexer.bench.rpc_server import RecordedResponses, StandInRPCServer
+from indexer.bench.runner import run_scenario
+from indexer.bench.scenarios import SCENARIOS, get_scenario
+from indexer.bench.synthetic_chain import ChainProfile, SyntheticChain
+from indexer.utils.exception_recorder import ExceptionRecorder
+from indexer.utils.logging_utils import configure_logging
+
+logger = logging.getLogger("Bench Client")
+
+exception_recorder = ExceptionRecorder()
+
+
+def scenario_options(func):
+    options = [
+        click.option(
+            "--scenario",
+            default="explorer_base",
+            show_default=True,
+            type=click.Choice(list(SCENARIOS)),
+            help="The set of jobs to run.",
+        ),
+        click.option("-s", "--start-block", required=True, type=int, help="Start block of the benchmark range."),
+        click.option("-e", "--end-block", required=True, type=int, help="End block of the benchmark range."),
+        click.option(
+            "-o",
+            "--output",
+            default="void",
+            show_default=True,
+            type=str,
+            help="The exporters to write into, e.g. void, postgres or jsonfile://output/bench.",
+        ),
+        click.option(
+            "-pg",
+            "--postgres-url",
+            default=None,
+            type=str,
+            envvar="POSTGRES_URL",
+            help="The postgres connection url, required by the postgres output.",
+        ),
+        click.option("-B", "--block-batch-size", default=10, show_default=True, type=int),
+        click.option("-b", "--batch-size", default=10, show_default=True, type=int),
+        click.option("--debug-batch-size", default=1, show_default=True, type=int),
+        click.option("-w", "--max-workers", default=5, show_default=True, type=int),
+        click.option("-m", "--multicall", default=True, show_default=True, type=bool),
+        click.option(
+            "--config-file",
+            default=None,
+            type=str,
+            help="A yaml or json file with job sections, merged over the ones the scenario ships.",
+        ),
+        click.option("--log-level", default="WARNING", show_default=True, type=str),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+PROFILE_OPTIONS = (
+    "transactions_per_block",
+    "logs_per_transaction",
+    "token_transfer_share",
+    "token_mix",
+    "trace_depth",
+    "trace_fanout",
+    "contract_creation_rate",
+    "synthetic_seed",
+)
+
+
+def source_options(func):
+    options = [
+        click.option("-f", "--fixture", default=None, type=str, help="The recorded responses, a .jsonl.gz archive."),
+        click.option(
+            "--synthetic-blocks",
+            default=0,
+            show_default=True,
+            type=int,
+            help="Serve a generated chain of this many blocks instead of a fixture.",
+        ),
+        click.option("--transactions-per-block", default=100, show_default=True, type=int),
+        click.option("--logs-per-transaction", default=2.0, show_default=True, type=float),
+        click.option(
+            "--token-transfer-share",
+            default=0.7,
+            show_default=True,
+            type=float,
+            help="Share of the generated logs that are token transfers.",
+        ),
+        click.option(
+            "--token-mix",
+            default="80,15,5",
+            show_default=True,
+            type=str,
+            help="Weights of ERC20, ERC721 and ERC1155 among the generated token transfers.",
+        ),
+        click.option("--trace-depth", default=2, show_default=True, type=int),
+        click.option("--trace-fanout", default=2, show_default=True, type=int),
+        click.option("--contract-creation-rate", default=0.01, show_default=True, type=float),
+        click.option("--synthetic-seed", default=0, show_default=True, type=int),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def _responses(options):
+    """
+    Build the responses served by the stand-in node, popping the source options out of the command options.
+    """
+    fixture, synthetic_blocks = options.pop("fixture"), options.pop("synthetic_blocks")
+    profile = {name: options.pop(name) for name in PROFILE_OPTIONS}
+    if bool(fixture) == bool(synthetic_blocks):
+        raise click.ClickException("Provide either --fixture or --synthetic-blocks")
+    if fixture:
+        return RecordedResponses.load(fixture)
+
+    profile["token_mix"] = tuple(float(weight) for weight in profile["token_mix"].split(","))
+    profile["seed"] = profile.pop("synthetic_seed")
+    return SyntheticChain(ChainProfile(blocks=synthetic_blocks, **profile))
+
+
+def _load_config_file(config_file):
+    if config_file is None:
+        return None
+    if not os.path.exists(config_file):
+        raise click.ClickException(f"Config file {config_file} not found")
+    with open(config_file, "r") as f:
+        if config_file.endswith(".json"):
+            import json
+
+            return json.load(f)
+        if config_file.endswith(".yaml") or config_file.endswith(".yml"):
+            import yaml
+
+            return yaml.safe_load(f)
+    raise click.ClickException(f"Config file {config_file} is not supported")
+
+
+def _run(server, scenario, start_block, end_block, output, postgres_url, config_file, **kwargs):
+    config = _load_config_file(config_file)
+    db_service = None
+    if postgres_url:
+        db_service = PostgreSQLService(postgres_url, init_schema=True)
+        exception_recorder.init_pg_service(db_service)
+    with server:
+        report = run_scenario(
+            get_scenario(scenario),
+            server.uri,
+            start_block,
+            end_block,
+            output=output,
+            db_service=db_service,
+            config=config,
+            **kwargs,
+        )
+        report["stand_in"] = server.stats()
+    return report
+
+
+@click.group()
+def bench():
+    """
+    Offline benchmarks against a stand-in RPC node that replays recorded responses or serves a synthetic chain.
+    """
+    pass
+
+
+@bench.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@source_options
+@click.option("--latency-ms", default=0, show_default=True, type=float, help="Delay added to every http request.")
+@click.option("--jitter-ms", default=0, show_default=True, type=float, help="Random extra delay up to this value.")
+@click.option(
+    "--error-rate",
+    default=0.0,
+    show_default=True,
+    type=float,
+    help="Share of http requests answered with a 503, to exercise the retry paths.",
+)
+@click.option("--seed", default=None, type=int, help="Seed of the latency jitter and the injected errors.")
+@click.option("--report", default=None, type=str, help="Also write the json report to this file.")
+@scenario_options
+def run(latency_ms, jitter_ms, error_rate, seed, report, log_level, **kwargs):
+    """
+    Run a scenario against recorded responses or a synthetic chain and print a json report.
+    """
+    configure_logging(log_level)
+    fixture = kwargs["fixture"]
+    server = StandInRPCServer(
+        _responses(kwargs),
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        seed=seed,
+    )
+    result = _run(server, **kwargs)
+    content = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    click.echo(content.decode())
+    if report:
+        with open(report, "wb") as f:
+            f.write(content)
+    if result["stand_in"]["misses"]:
+        logger.warning(f"{result['stand_in']['misses']} rpc calls were not recorded in {fixture}")
+
+
+@bench.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option("-p", "--provider-uri", required=True, type=str, envvar="PROVIDER_URI", help="The node to record.")
+@click.option("-f", "--fixture", required=True, type=str, help="Write the recorded responses to this archive.")
+@scenario_options
+def record(provider_uri, fixture, log_level, **kwargs):
+    """
+    Run a scenario once against a real node and record every response it needed.
+    """
+    configure_logging(log_level)
+    responses = RecordedResponses()
+    _run(StandInRPCServer(responses, upstream_uri=provider_uri), **kwargs)
+    responses.save(fixture)
+    click.echo(f"Recorded {len(responses)} responses into {fixture}")
+
+
+@bench.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@source_options
+@click.option("--port", default=8545, show_default=True, type=int)
+@click.option("--latency-ms", default=0, show_default=True, type=float)
+@click.option("--jitter-ms", default=0, show_default=True, type=float)
+@click.option("--error-rate", default=0.0, show_default=True, type=float)
+def serve(port, latency_ms, jitter_ms, error_rate, **kwargs):
+    """
+    Serve recorded responses or a synthetic chain until interrupted, e.g. for hemera stream -p http://127.0.0.1:8545.
+    """
+    server = StandInRPCServer(
+        _responses(kwargs), port=port, latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate
+    )
+    with server:
+        click.echo(f"Serving {type(server.responses).__name__} on {server.uri}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+def _echo_comparison(rows):
+    for row in rows:
+        if row["ops_per_second"] is None:
+            click.echo(
+                "{:<28} {:>14.1f} -> {:>14} ops/s  MISSING".format(row["name"], row["baseline_ops_per_second"], "-")
+            )
+            continue
+        click.echo(
+            "{:<28} {:>14.1f} -> {:>14.1f} ops/s {:>+8.1%} speed {:>+8.1%} memory{}".format(
+                row["name"],
+                row["baseline_ops_per_second"],
+                row["ops_per_second"],
+                row["speed_change"],
+                row["memory_change"],
+                "  REGRESSED" if row["regressed"] else "",
+            )
+        )
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        raise click.ClickException(f"Regressed hot paths: {', '.join(regressed)}")
+
+
+@bench.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "-k",
+    "--filter",
+    "names",
+    multiple=True,
+    help=f"Only run the benchmarks whose name contains this value. Available: {', '.join(BENCHMARKS)}",
+)
+@click.option("--min-time", default=0.2, show_default=True, type=float, help="Seconds of every timing sample.")
+@click.option("--repeat", default=5, show_default=True, type=int, help="Timing samples, the best one is kept.")
+@click.option("--output", default=None, type=str, help="Write the results as a json baseline to this file.")
+@click.option(
+    "--baseline",
+    default=None,
+    type=str,
+    help="Compare the results with this baseline, the committed one is indexer/bench/baselines/micro.json.",
+)
+@click.option("--threshold", default=DEFAULT_THRESHOLD, show_default=True, type=float)
+@click.option("--memory-threshold", default=DEFAULT_MEMORY_THRESHOLD, show_default=True, type=float)
+def micro(names, min_time, repeat, output, baseline, threshold, memory_threshold):
+    """
+    Measure ops/s and peak memory per op of the decode and convert hot paths.
+    """
+    current = run_benchmarks(names, min_time=min_time, repeat=repeat)
+    for name, result in current["results"].items():
+        click.echo(
+            "{:<28} {:>14.1f} ops/s {:>10.1f} bytes/op".format(
+                name, result["ops_per_second"], result["peak_bytes_per_op"]
+            )
+        )
+    if output:
+        with open(output, "wb") as f:
+            f.write(orjson.dumps(current, option=orjson.OPT_INDENT_2))
+    if baseline:
+        with open(baseline, "rb") as f:
+            _echo_comparison(compare(orjson.loads(f.read()), current, threshold, memory_threshold, names))
+
+
+@bench.command("compare", context_settings=dict(help_option_names=["-h", "--help"]))
+@click.argument("baseline", type=click.Path(exists=True))
+@click.argument("current", type=click.Path(exists=True))
+@click.option("--threshold", default=DEFAULT_THRESHOLD, show_default=True, type=float)
+@click.option("--memory-threshold", default=DEFAULT_MEMORY_THRESHOLD, show_default=True, type=float)
+def compare_command(baseline, current, threshold, memory_threshold):
+    """
+    Compare two micro benchmark results, fails when a hot path regressed beyond the thresholds.
+    """
+    with open(baseline, "rb") as f:
+        baseline_result = orjson.loads(f.read())
+    with open(current, "rb") as f:
+        current_result = orjson.loads(f.read())
+    _echo_comparison(compare(baseline_result, current_result, threshold, memory_threshold))
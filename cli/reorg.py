@@ -10,6 +10,7 @@ from indexer.controller.scheduler.reorg_scheduler import ReorgScheduler
 from indexer.exporters.postgres_item_exporter import PostgresItemExporter
 from indexer.utils.exception_recorder import ExceptionRecorder
 from indexer.utils.logging_utils import configure_logging, configure_signals
+from indexer.utils.profiling import PROFILE_MODES, configure_profiling
 from indexer.utils.provider import get_provider_from_uri
 from indexer.utils.rpc_utils import pick_random_provider_uri
 from indexer.utils.thread_local_proxy import ThreadLocalProxy
@@ -91,6 +92,16 @@ exception_recorder = ExceptionRecorder()
     envvar="RANGES",
     help="Specify the range limit for data fixing.",
 )
+@click.option(
+    "--reorg-mode",
+    default="block",
+    show_default=True,
+    type=click.Choice(["block", "range"]),
+    envvar="REORG_MODE",
+    help="How to repair the reorged blocks. "
+    "block: verify and re-index the blocks one by one from --block-number downwards; "
+    "range: verify the whole window in one batch, locate the fork point and re-index the affected range at once.",
+)
 @click.option(
     "--log-file",
     default=None,
@@ -117,6 +128,56 @@ exception_recorder = ExceptionRecorder()
     envvar="AUTO_UPGRADE_DB",
     help="Whether to automatically run database migration scripts to update the database to the latest version.",
 )
+@click.option(
+    "--profile",
+    default=None,
+    show_default=True,
+    type=str,
+    envvar="PROFILE_DIR",
+    help="Profile batches and write per batch profile, flamegraph and memory files into this directory. "
+    "Profiling is disabled when it is not set.",
+)
+@click.option(
+    "--profile-every",
+    default=1,
+    show_default=True,
+    type=int,
+    envvar="PROFILE_EVERY",
+    help="Profile one of every this many batches, 0 only keeps the batches slower than --profile-slower-than.",
+)
+@click.option(
+    "--profile-slower-than",
+    default=0,
+    show_default=True,
+    type=float,
+    envvar="PROFILE_SLOWER_THAN",
+    help="Also keep the profile of every batch that took longer than this many seconds, 0 disables it.",
+)
+@click.option(
+    "--profile-mode",
+    default="sample",
+    show_default=True,
+    type=click.Choice(PROFILE_MODES),
+    envvar="PROFILE_MODE",
+    help="sample: a low overhead stack sampler of every thread, written as collapsed stacks for flamegraphs. "
+    "cprofile: deterministic cProfile of the main thread, written as a pstats file.",
+)
+@click.option(
+    "--profile-interval-ms",
+    default=5,
+    show_default=True,
+    type=float,
+    envvar="PROFILE_INTERVAL_MS",
+    help="Sampling interval of the sample mode.",
+)
+@click.option(
+    "--profile-memory",
+    default=False,
+    show_default=True,
+    type=bool,
+    envvar="PROFILE_MEMORY",
+    help="Trace allocations of the profiled batches and report the largest allocation sites of the data buffer.",
+)
 @click.option(
     "--log-level",
     default="INFO",
@@ -133,12 +194,19 @@ def reorg(
     ranges,
     batch_size,
     debug_batch_size,
+    reorg_mode="block",
     db_version="head",
     multicall=True,
     log_file=None,
     cache=None,
     config_file=None,
     auto_upgrade_db=True,
+    profile=None,
+    profile_every=1,
+    profile_slower_than=0,
+    profile_mode="sample",
+    profile_interval_ms=5,
+    profile_memory=False,
     log_level="INFO",
 ):
     configure_logging(log_level=log_level, log_file=log_file)
@@ -148,6 +216,16 @@ def reorg(
     debug_provider_uri = pick_random_provider_uri(debug_provider_uri)
     logging.info("Using provider " + provider_uri)
     logging.info("Using debug provider " + debug_provider_uri)
+    if profile:
+        configure_profiling(
+            profile,
+            label="reorg",
+            every=profile_every,
+            slower_than=profile_slower_than,
+            mode=profile_mode,
+            interval=profile_interval_ms / 1000,
+            memory=profile_memory,
+        )
 
     # build postgresql service
     if postgres_url:
@@ -195,6 +273,7 @@ def reorg(
         job_scheduler=job_scheduler,
         ranges=ranges,
         config=config,
+        reorg_mode=reorg_mode,
     )
 
     job = None
@@ -8,21 +8,33 @@ from web3 import Web3
 from cli.logo import print_logo
 from common.services.postgresql_service import PostgreSQLService
 from enumeration.entity_type import DEFAULT_COLLECTION, calculate_entity_value, generate_output_types
+from indexer.controller.lease_controller import LeaseController
+from indexer.controller.reorg_controller import ReorgController
 from indexer.controller.scheduler.job_scheduler import JobScheduler
+from indexer.controller.scheduler.reorg_scheduler import ReorgScheduler
 from indexer.controller.stream_controller import StreamController
 from indexer.exporters.item_exporter import create_item_exporters
+from indexer.exporters.spool_item_exporter import SpoolItemExporter
+from indexer.exporters.staging_item_exporter import StagingItemExporter
 from indexer.utils.exception_recorder import ExceptionRecorder
+from indexer.utils.lease_queue import AdaptiveChunker, PGLeaderLock, PGLeaseQueue
 from indexer.utils.limit_reader import create_limit_reader
 from indexer.utils.logging_utils import configure_logging, configure_signals
+from indexer.utils.metrics import start_metrics_logger, start_metrics_server
 from indexer.utils.parameter_utils import (
     check_file_exporter_parameter,
     check_source_load_parameter,
     generate_dataclass_type_list_from_parameter,
 )
+from indexer.utils.profiling import PROFILE_MODES, configure_profiling
 from indexer.utils.provider import get_provider_from_uri
+from indexer.utils.range_ledger import create_range_ledger, default_range_ledger
+from indexer.utils.range_planner import BlockRangePlanner, PGDensitySource, RPCDensitySource
+from indexer.utils.recent_headers import RecentHeaders
 from indexer.utils.rpc_utils import pick_random_provider_uri
 from indexer.utils.sync_recorder import create_recorder
 from indexer.utils.thread_local_proxy import ThreadLocalProxy
+from indexer.utils.tracing import TRACE_FORMATS, configure_tracing
 
 exception_recorder = ExceptionRecorder()
 
@@ -78,6 +90,7 @@ def calculate_execution_time(func):
     "or postgresql e.g. postgres"
     "or local json file e.g. jsonfile://your-file-path; "
     "or local csv file e.g. csvfile://your-file-path; "
+    "or local parquet files e.g. parquetfile://your-file-path, which requires pyarrow; "
     "or both. e.g. console,jsonfile://your-file-path,csvfile://your-file-path",
 )
 @click.option(
@@ -149,6 +162,14 @@ def calculate_execution_time(func):
     envvar="BLOCKS_PER_FILE",
     help="How many blocks data was written to each file",
 )
+@click.option(
+    "--file-compression",
+    default="none",
+    show_default=True,
+    type=click.Choice(["none", "gzip", "zstd"], case_sensitive=False),
+    envvar="FILE_COMPRESSION",
+    help="How csv and json files are compressed, zstd requires the zstandard package",
+)
 @click.option(
     "--period-seconds",
     default=2,
@@ -236,6 +257,7 @@ def calculate_execution_time(func):
     envvar="SOURCE_PATH",
     help="The path to load the data."
     "Load from local csv file e.g. csvfile://your-file-direction; "
+    "or local parquet file e.g. parquetfile://your-file-direction; "
     "or local json file e.g. jsonfile://your-file-direction; ",
 )
 @click.option(
@@ -275,6 +297,16 @@ def calculate_execution_time(func):
     'e.g pg:base. means sync record data will store in pg as "base" be key'
     'or file:base. means sync record data will store in file as "base" be file name',
 )
+@click.option(
+    "--range-ledger",
+    default=None,
+    show_default=True,
+    type=str,
+    envvar="RANGE_LEDGER",
+    help="How to store the completed block ranges, so a failed worker only makes its own range be redone. "
+    "e.g pg:base or file:sync_record.ranges. "
+    "If not provided, it is stored next to the sync record when process numbers is greater than 1.",
+)
 @click.option(
     "--cache",
     default="memory",
@@ -302,6 +334,226 @@ def calculate_execution_time(func):
     envvar="AUTO_REORG",
     help="Whether to detect reorg in data streams and automatically repair data.",
 )
+@click.option(
+    "--auto-reorg-mode",
+    default="process",
+    show_default=True,
+    type=click.Choice(["process", "inline"], case_sensitive=False),
+    envvar="AUTO_REORG_MODE",
+    help="How auto reorg works. "
+    "process: check block consensus with a job and repair in a separate reorg process. "
+    "inline: detect reorg with a buffer of recent block headers and repair within the stream process, "
+    "requires postgres and a single process.",
+)
+@click.option(
+    "--reorg-buffer-size",
+    default=256,
+    show_default=True,
+    type=int,
+    envvar="REORG_BUFFER_SIZE",
+    help="How many recent block headers are kept to detect reorg when auto reorg mode is inline.",
+)
+@click.option(
+    "--reorg-buffer-file",
+    default="recent_headers.json",
+    show_default=True,
+    type=str,
+    envvar="REORG_BUFFER_FILE",
+    help="The file the recent block headers are persisted to between runs when auto reorg mode is inline.",
+)
+@click.option(
+    "--finality-tag",
+    default="latest",
+    show_default=True,
+    type=click.Choice(["latest", "safe", "finalized"], case_sensitive=False),
+    envvar="FINALITY_TAG",
+    help="Only commit blocks up to the node's block of this tag. "
+    "With safe or finalized, reorgs are handled by waiting for finality instead of repairing exported data.",
+)
+@click.option(
+    "--staging-blocks",
+    default=0,
+    show_default=True,
+    type=int,
+    envvar="STAGING_BLOCKS",
+    help="How many blocks above the finality tag are processed ahead and held in memory "
+    "until they are finalized. 0 means blocks are only processed once finalized.",
+)
+@click.option(
+    "--spool-dir",
+    default=None,
+    show_default=True,
+    type=str,
+    envvar="SPOOL_DIR",
+    help="Write the outputs of every batch to this local directory first and drain them into the outputs "
+    "in the background, so a slow or unavailable database never makes the stream fetch blocks again.",
+)
+@click.option(
+    "--spool-max-bytes",
+    default=1024**3,
+    show_default=True,
+    type=int,
+    envvar="SPOOL_MAX_BYTES",
+    help="How many bytes of batches the spool holds before the stream waits for the drain.",
+)
+@click.option(
+    "--batch-target-items",
+    default=0,
+    show_default=True,
+    type=int,
+    envvar="BATCH_TARGET_ITEMS",
+    help="Size each batch by its number of transactions (or logs) instead of a fixed number of blocks. "
+    "0 means every batch has block-batch-size blocks.",
+)
+@click.option(
+    "--batch-target-unit",
+    default="transactions",
+    show_default=True,
+    type=click.Choice(["transactions", "logs"], case_sensitive=False),
+    envvar="BATCH_TARGET_UNIT",
+    help="What batch-target-items counts. logs is only available when re-indexing from a postgresql source.",
+)
+@click.option(
+    "--batch-min-blocks",
+    default=1,
+    show_default=True,
+    type=int,
+    envvar="BATCH_MIN_BLOCKS",
+    help="The minimum number of blocks in a batch sized by batch-target-items.",
+)
+@click.option(
+    "--batch-max-blocks",
+    default=1000,
+    show_default=True,
+    type=int,
+    envvar="BATCH_MAX_BLOCKS",
+    help="The maximum number of blocks in a batch sized by batch-target-items.",
+)
+@click.option(
+    "--lease-queue",
+    default=None,
+    type=str,
+    envvar="LEASE_QUEUE",
+    help="Share the work with stream processes on other hosts through a lease queue in postgres, "
+    "the value is the queue name. With an end block, every process claims block range leases until the range "
+    "is done. Without an end block, only one process follows the chain tip and the others stand by.",
+)
+@click.option(
+    "--lease-seconds",
+    default=300,
+    show_default=True,
+    type=int,
+    envvar="LEASE_SECONDS",
+    help="How long a lease is kept without a heartbeat before other processes can claim it.",
+)
+@click.option(
+    "--lease-target-seconds",
+    default=120,
+    show_default=True,
+    type=int,
+    envvar="LEASE_TARGET_SECONDS",
+    help="The lease size is adapted to the measured throughput so that a lease takes about this long.",
+)
+@click.option(
+    "--lease-max-blocks",
+    default=100000,
+    show_default=True,
+    type=int,
+    envvar="LEASE_MAX_BLOCKS",
+    help="The maximum number of blocks in one lease.",
+)
+@click.option(
+    "--metrics-port",
+    default=0,
+    show_default=True,
+    type=int,
+    envvar="METRICS_PORT",
+    help="Serve prometheus metrics on this port at /metrics, 0 disables the endpoint.",
+)
+@click.option(
+    "--metrics-host",
+    default="127.0.0.1",
+    show_default=True,
+    type=str,
+    envvar="METRICS_HOST",
+    help="The address the metrics endpoint listens on, use 0.0.0.0 to serve it on every interface.",
+)
+@click.option(
+    "--metrics-log-interval",
+    default=0,
+    show_default=True,
+    type=int,
+    envvar="METRICS_LOG_INTERVAL",
+    help="Log a json line with every metric every this many seconds, 0 disables it.",
+)
+@click.option(
+    "--trace-file",
+    default=None,
+    show_default=True,
+    type=str,
+    envvar="TRACE_FILE",
+    help="Write a span for every batch, job stage, work item, rpc request and table write to this file. "
+    "Tracing is disabled when it is not set.",
+)
+@click.option(
+    "--trace-format",
+    default="chrome",
+    show_default=True,
+    type=click.Choice(TRACE_FORMATS),
+    envvar="TRACE_FORMAT",
+    help="chrome: a trace event file for chrome://tracing or ui.perfetto.dev. "
+    "otlp: OTLP-JSON export requests, one per line.",
+)
+@click.option(
+    "--profile",
+    default=None,
+    show_default=True,
+    type=str,
+    envvar="PROFILE_DIR",
+    help="Profile batches and write per batch profile, flamegraph and memory files into this directory. "
+    "Profiling is disabled when it is not set.",
+)
+@click.option(
+    "--profile-every",
+    default=1,
+    show_default=True,
+    type=int,
+    envvar="PROFILE_EVERY",
+    help="Profile one of every this many batches, 0 only keeps the batches slower than --profile-slower-than.",
+)
+@click.option(
+    "--profile-slower-than",
+    default=0,
+    show_default=True,
+    type=float,
+    envvar="PROFILE_SLOWER_THAN",
+    help="Also keep the profile of every batch that took longer than this many seconds, 0 disables it.",
+)
+@click.option(
+    "--profile-mode",
+    default="sample",
+    show_default=True,
+    type=click.Choice(PROFILE_MODES),
+    envvar="PROFILE_MODE",
+    help="sample: a low overhead stack sampler of every thread, written as collapsed stacks for flamegraphs. "
+    "cprofile: deterministic cProfile of the main thread, written as a pstats file.",
+)
+@click.option(
+    "--profile-interval-ms",
+    default=5,
+    show_default=True,
+    type=float,
+    envvar="PROFILE_INTERVAL_MS",
+    help="Sampling interval of the sample mode.",
+)
+@click.option(
+    "--profile-memory",
+    default=False,
+    show_default=True,
+    type=bool,
+    envvar="PROFILE_MEMORY",
+    help="Trace allocations of the profiled batches and report the largest allocation sites of the data buffer.",
+)
 @click.option(
     "--config-file",
     default=None,
@@ -347,6 +599,7 @@ def stream(
     output_types,
     source_types,
     blocks_per_file,
+    file_compression="none",
     delay=0,
     period_seconds=10,
     batch_size=10,
@@ -360,9 +613,36 @@ def stream(
     pid_file=None,
     source_path=None,
     sync_recorder="file:sync_record",
+    range_ledger=None,
     retry_from_record=False,
     cache="memory",
     auto_reorg=False,
+    auto_reorg_mode="process",
+    reorg_buffer_size=256,
+    reorg_buffer_file="recent_headers.json",
+    finality_tag="latest",
+    staging_blocks=0,
+    spool_dir=None,
+    spool_max_bytes=1024**3,
+    batch_target_items=0,
+    batch_target_unit="transactions",
+    batch_min_blocks=1,
+    batch_max_blocks=1000,
+    lease_queue=None,
+    lease_seconds=300,
+    lease_target_seconds=120,
+    lease_max_blocks=100000,
+    metrics_port=0,
+    metrics_host="127.0.0.1",
+    metrics_log_interval=0,
+    trace_file=None,
+    trace_format="chrome",
+    profile=None,
+    profile_every=1,
+    profile_slower_than=0,
+    profile_mode="sample",
+    profile_interval_ms=5,
+    profile_memory=False,
     multicall=True,
     config_file=None,
     force_filter_mode=False,
@@ -376,6 +656,22 @@ def stream(
     debug_provider_uri = pick_random_provider_uri(debug_provider_uri)
     logging.getLogger("ROOT").info("Using provider " + provider_uri)
     logging.getLogger("ROOT").info("Using debug provider " + debug_provider_uri)
+    if metrics_port:
+        start_metrics_server(metrics_port, metrics_host)
+    if metrics_log_interval:
+        start_metrics_logger(metrics_log_interval)
+    if trace_file:
+        configure_tracing(trace_file, trace_format)
+    if profile:
+        configure_profiling(
+            profile,
+            label="stream",
+            every=profile_every,
+            slower_than=profile_slower_than,
+            mode=profile_mode,
+            interval=profile_interval_ms / 1000,
+            memory=profile_memory,
+        )
 
     # parameter logic checking
     if source_path:
@@ -385,6 +681,7 @@ def stream(
     # build config
     config = {
         "blocks_per_file": blocks_per_file,
+        "file_compression": file_compression,
         "source_path": source_path,
         "chain_id": Web3(Web3.HTTPProvider(provider_uri)).eth.chain_id,
     }
@@ -431,10 +728,41 @@ def stream(
     if source_path and source_path.startswith("postgresql://"):
         source_types = generate_dataclass_type_list_from_parameter(source_types, "source")
 
+    if process_numbers is None:
+        process_numbers = 1
+
+    if finality_tag != "latest":
+        if auto_reorg:
+            logging.getLogger("ROOT").warning(
+                f"Blocks are committed once they are {finality_tag}, auto reorg is not needed and will be disabled."
+            )
+            auto_reorg = False
+        if staging_blocks > 0 and process_numbers > 1:
+            raise click.ClickException("Staging unfinalized blocks requires --process-numbers 1")
+
+    if lease_queue and (not postgres_url or process_numbers > 1):
+        raise click.ClickException("Lease queue requires --postgres-url and --process-numbers 1")
+
+    inline_reorg = auto_reorg and auto_reorg_mode == "inline"
+    if inline_reorg and (not postgres_url or process_numbers > 1):
+        raise click.ClickException("Inline auto reorg requires --postgres-url and --process-numbers 1")
+
+    item_exporters = create_item_exporters(output, config)
+    staging = None
+    if finality_tag != "latest" and staging_blocks > 0:
+        staging = StagingItemExporter(item_exporters, max_staged_blocks=staging_blocks)
+        item_exporters = [staging]
+    spool = None
+    if spool_dir:
+        if staging is not None or process_numbers > 1:
+            raise click.ClickException("--spool-dir requires --process-numbers 1 and no --staging-blocks")
+        spool = SpoolItemExporter(item_exporters, spool_dir, max_spool_bytes=spool_max_bytes)
+        item_exporters = [spool]
+
     job_scheduler = JobScheduler(
         batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
         batch_web3_debug_provider=ThreadLocalProxy(lambda: get_provider_from_uri(debug_provider_uri, batch=True)),
-        item_exporters=create_item_exporters(output, config),
+        item_exporters=item_exporters,
         batch_size=batch_size,
         debug_batch_size=debug_batch_size,
         max_workers=max_workers,
@@ -442,18 +770,85 @@ def stream(
         required_output_types=output_types,
         required_source_types=source_types,
         cache=cache,
-        auto_reorg=auto_reorg,
+        auto_reorg=auto_reorg and not inline_reorg,
         multicall=multicall,
         force_filter_mode=force_filter_mode,
     )
 
-    if process_numbers is None:
-        process_numbers = 1
+    recent_headers, reorg_controller = None, None
+    if inline_reorg:
+        reorg_scheduler = ReorgScheduler(
+            batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
+            batch_web3_debug_provider=ThreadLocalProxy(lambda: get_provider_from_uri(debug_provider_uri, batch=True)),
+            item_exporters=create_item_exporters(output, config),
+            batch_size=batch_size,
+            debug_batch_size=debug_batch_size,
+            required_output_types=output_types,
+            config=config,
+            cache=cache,
+            multicall=multicall,
+        )
+        reorg_controller = ReorgController(
+            batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=False)),
+            job_scheduler=reorg_scheduler,
+            ranges=reorg_buffer_size,
+            config=config,
+            reorg_mode="range",
+        )
+        recent_headers = RecentHeaders(size=reorg_buffer_size, file_name=reorg_buffer_file)
+
     if process_size is None:
         process_size = int(block_batch_size / process_numbers)
     if process_time_out is None:
         process_time_out = 300 * process_size
 
+    if lease_queue and end_block is not None:
+        controller = LeaseController(
+            job_scheduler=job_scheduler,
+            lease_queue=PGLeaseQueue(lease_queue, config["db_service"], lease_seconds=lease_seconds),
+            chunker=AdaptiveChunker(
+                initial_blocks=block_batch_size,
+                min_blocks=block_batch_size,
+                max_blocks=lease_max_blocks,
+                target_seconds=lease_target_seconds,
+            ),
+        )
+        controller.action(
+            start_block=start_block or 0,
+            end_block=end_block,
+            block_batch_size=block_batch_size,
+            period_seconds=period_seconds,
+            plan_chunk_size=lease_max_blocks,
+            pid_file=pid_file,
+        )
+        return
+
+    leader_lock = None
+    if lease_queue:
+        leader_lock = PGLeaderLock(lease_queue, config["db_service"])
+        while not leader_lock.try_acquire():
+            logging.getLogger("ROOT").info(
+                f"Another process is following the chain tip for {lease_queue}, standing by for {period_seconds} seconds..."
+            )
+            time.sleep(period_seconds)
+
+    range_planner = None
+    if batch_target_items > 0:
+        if source_path and source_path.startswith("postgresql://"):
+            density_source = PGDensitySource(PostgreSQLService(jdbc_url=source_path), unit=batch_target_unit)
+        elif batch_target_unit == "transactions":
+            density_source = RPCDensitySource(
+                ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)), batch_size=batch_size
+            )
+        else:
+            raise click.ClickException("--batch-target-unit logs requires a postgresql source path")
+        range_planner = BlockRangePlanner(
+            density_source, batch_target_items, min_blocks=batch_min_blocks, max_blocks=batch_max_blocks
+        )
+
+    if range_ledger is not None or process_numbers > 1:
+        range_ledger = create_range_ledger(range_ledger or default_range_ledger(sync_recorder), config)
+
     controller = StreamController(
         batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=False)),
         job_scheduler=job_scheduler,
@@ -466,12 +861,23 @@ def stream(
         process_numbers=process_numbers,
         process_size=process_size,
         process_time_out=process_time_out,
+        recent_headers=recent_headers,
+        reorg_controller=reorg_controller,
+        finality_tag=finality_tag,
+        staging=staging,
+        spool=spool,
+        range_ledger=range_ledger,
+        range_planner=range_planner,
     )
 
-    controller.action(
-        start_block=start_block,
-        end_block=end_block,
-        block_batch_size=block_batch_size,
-        period_seconds=period_seconds,
-        pid_file=pid_file,
-    )
+    try:
+        controller.action(
+            start_block=start_block,
+            end_block=end_block,
+            block_batch_size=block_batch_size,
+            period_seconds=period_seconds,
+            pid_file=pid_file,
+        )
+    finally:
+        if leader_lock is not None:
+            leader_lock.release()
@@ -1,5 +1,15 @@
 from common.models import HemeraModel, model_path_patterns
-from common.utils.module_loading import import_string, scan_subclass_by_path_patterns
+from common.utils.module_loading import import_string, module_files_by_path_patterns, scan_subclass_by_path_patterns
+from common.utils.registry_manifest import cached_section
+
+
+def class_path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def domain_key(domain):
+    # a few models name their domain by a string, which is kept as the key like the eager scan did
+    return class_path(domain) if isinstance(domain, type) else domain
 
 
 def scan_convert_config():
@@ -22,4 +32,71 @@ def scan_convert_config():
     return config_mapping
 
 
-domain_model_mapping = scan_convert_config()
+def scan_domain_model_paths():
+    return {domain_key(domain): class_path(config["table"]) for domain, config in scan_convert_config().items()}
+
+
+class DomainModelMapping(dict):
+    """
+    The export config of every domain, keyed by domain class. A model is imported on the first lookup of
+    one of its domains, iterating or sizing the mapping imports every model.
+    """
+
+    def __init__(self, model_paths):
+        super().__init__()
+        self.model_paths = model_paths
+
+    def _load_model(self, model_path):
+        model = import_string(model_path)
+        for config in model.model_domain_mapping() or []:
+            # when several models map a domain the one recorded in the manifest wins, as in the eager scan
+            if self.model_paths.get(domain_key(config["domain"])) == model_path:
+                dict.__setitem__(
+                    self,
+                    config["domain"],
+                    {
+                        "table": model,
+                        "conflict_do_update": config["conflict_do_update"],
+                        "update_strategy": config["update_strategy"],
+                        "converter": config["converter"],
+                    },
+                )
+
+    def __missing__(self, domain):
+        self._load_model(self.model_paths[domain_key(domain)])
+        return dict.__getitem__(self, domain)
+
+    def __contains__(self, domain):
+        return dict.__contains__(self, domain) or domain_key(domain) in self.model_paths
+
+    def get(self, domain, default=None):
+        return self[domain] if domain in self else default
+
+    def load_all(self):
+        for model_path in set(self.model_paths.values()):
+            self._load_model(model_path)
+        return self
+
+    def __iter__(self):
+        return dict.__iter__(self.load_all())
+
+    def __len__(self):
+        return len(self.model_paths)
+
+    def keys(self):
+        return dict.keys(self.load_all())
+
+    def values(self):
+        return dict.values(self.load_all())
+
+    def items(self):
+        return dict.items(self.load_all())
+
+
+domain_model_mapping = DomainModelMapping(
+    cached_section(
+        "domain_models:" + ",".join(model_path_patterns),
+        module_files_by_path_patterns(model_path_patterns),
+        scan_domain_model_paths,
+    )
+)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Index, PrimaryKeyConstraint, func
+from sqlalchemy.dialects.postgresql import BIGINT, INTEGER, TIMESTAMP, VARCHAR
+
+from common.models import HemeraModel
+
+
+class BlockRangeLeases(HemeraModel):
+    __tablename__ = "block_range_leases"
+    mission_sign = Column(VARCHAR)
+    start_block_number = Column(BIGINT)
+    end_block_number = Column(BIGINT)
+    status = Column(VARCHAR)
+    worker = Column(VARCHAR)
+    attempts = Column(INTEGER, default=0)
+    lease_expire_time = Column(TIMESTAMP)
+    heartbeat_time = Column(TIMESTAMP)
+    create_time = Column(TIMESTAMP, server_default=func.now())
+    update_time = Column(TIMESTAMP)
+
+    __table_args__ = (PrimaryKeyConstraint("mission_sign", "start_block_number"),)
+
+
+Index(
+    "block_range_leases_status_index",
+    BlockRangeLeases.mission_sign,
+    BlockRangeLeases.status,
+    BlockRangeLeases.start_block_number,
+)
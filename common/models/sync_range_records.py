@@ -0,0 +1,18 @@
+from sqlalchemy import Column, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import BIGINT, TIMESTAMP, VARCHAR
+
+from common.models import HemeraModel
+
+
+class SyncRangeRecords(HemeraModel):
+    __tablename__ = "sync_range_records"
+    mission_sign = Column(VARCHAR)
+    start_block_number = Column(BIGINT)
+    end_block_number = Column(BIGINT)
+    status = Column(VARCHAR)
+    worker = Column(VARCHAR)
+    start_time = Column(TIMESTAMP)
+    end_time = Column(TIMESTAMP)
+    update_time = Column(TIMESTAMP)
+
+    __table_args__ = (PrimaryKeyConstraint("mission_sign", "start_block_number", "end_block_number"),)
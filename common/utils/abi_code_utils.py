@@ -6,6 +6,8 @@ Author  : xuzh
 Project : hemera_indexer
 """
 import logging
+import re
+from functools import cached_property
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
 
 import eth_abi
@@ -35,8 +37,6 @@ from indexer.utils.abi import (
     event_log_abi_to_topic,
     function_abi_to_4byte_selector_str,
     get_types_from_abi_type_list,
-    pad_address,
-    uint256_to_bytes,
 )
 
 abi_codec = ABICodec(eth_abi.registry.registry)
@@ -52,7 +52,11 @@ class Event:
         :type event_abi: ABIEvent
         """
         self._event_abi = event_abi
-        self._signature = event_log_abi_to_topic(event_abi)
+
+    @cached_property
+    def _signature(self) -> str:
+        # hashed on first use, so abi tables cost nothing until their job runs
+        return event_log_abi_to_topic(self._event_abi)
 
     def get_abi(self) -> ABIEvent:
         """
@@ -168,6 +172,160 @@ def decode_log(
     return {**indexed, **data}
 
 
+STATIC_TYPE_PATTERN = re.compile(r"^(address|bool|uint|int|bytes)(\d*)$")
+ADDRESS_PADDING = bytes(12)
+ZERO_WORD = bytes(32)
+TRUE_WORD = (1).to_bytes(32, "big")
+
+
+class _NotStatic(Exception):
+    pass
+
+
+def _static_encoder(type_str: str) -> Optional[Callable[[Any], bytes]]:
+    match = STATIC_TYPE_PATTERN.match(type_str)
+    if match is None:
+        return None
+    base, size = match.group(1), int(match.group(2) or 256)
+
+    if base == "address":
+
+        def encode(value):
+            if type(value) is not str:
+                raise _NotStatic
+            if value[:2] in ("0x", "0X"):
+                value = value[2:]
+            if len(value) != 40:
+                raise _NotStatic
+            return ADDRESS_PADDING + bytes.fromhex(value)
+
+    elif base == "bool":
+
+        def encode(value):
+            if type(value) is not bool:
+                raise _NotStatic
+            return TRUE_WORD if value else ZERO_WORD
+
+    elif base == "uint" and 0 < size <= 256 and size % 8 == 0:
+        limit = 2**size
+
+        def encode(value):
+            if type(value) is not int or not 0 <= value < limit:
+                raise _NotStatic
+            return value.to_bytes(32, "big")
+
+    elif base == "int" and 0 < size <= 256 and size % 8 == 0:
+        limit = 2 ** (size - 1)
+
+        def encode(value):
+            if type(value) is not int or not -limit <= value < limit:
+                raise _NotStatic
+            return value.to_bytes(32, "big", signed=True)
+
+    elif base == "bytes" and match.group(2) and 0 < size <= 32:
+
+        def encode(value):
+            if type(value) is not bytes or len(value) != size:
+                raise _NotStatic
+            return value + bytes(32 - size)
+
+    else:
+        return None
+    return encode
+
+
+def _static_decoder(type_str: str) -> Optional[Callable[[bytes], Any]]:
+    match = STATIC_TYPE_PATTERN.match(type_str)
+    if match is None:
+        return None
+    base, size = match.group(1), int(match.group(2) or 256)
+
+    if base == "address":
+
+        def decode(word):
+            if word[:12] != ADDRESS_PADDING:
+                raise _NotStatic
+            return "0x" + word[12:].hex()
+
+    elif base == "bool":
+
+        def decode(word):
+            if word == TRUE_WORD:
+                return True
+            if word == ZERO_WORD:
+                return False
+            raise _NotStatic
+
+    elif base == "uint" and 0 < size <= 256 and size % 8 == 0:
+        limit = 2**size
+
+        def decode(word):
+            value = int.from_bytes(word, "big")
+            if value >= limit:
+                raise _NotStatic
+            return value
+
+    elif base == "int" and 0 < size <= 256 and size % 8 == 0:
+        limit = 2 ** (size - 1)
+
+        def decode(word):
+            value = int.from_bytes(word, "big", signed=True)
+            if not -limit <= value < limit:
+                raise _NotStatic
+            return value
+
+    elif base == "bytes" and match.group(2) and 0 < size <= 32:
+
+        def decode(word):
+            if any(word[size:]):
+                raise _NotStatic
+            return word[:size]
+
+    else:
+        return None
+    return decode
+
+
+class StaticCallTemplate:
+    """
+    Precompiled calldata encoding and output decoding of a function whose inputs, respectively outputs,
+    are all static types: address, bool, (u)intN and bytesN. Every value is one 32 bytes word, so encoding
+    concatenates the selector and the words and decoding slices them.
+
+    The template raises _NotStatic for any value or output it cannot handle exactly like eth_abi, e.g. a
+    non-hex address, an out of range integer or dirty padding, and the callers then use the generic codec,
+    which keeps its results and errors unchanged.
+    """
+
+    def __init__(self, selector: str, input_types: List[str], output_types: List[str], output_names: List[str]):
+        self.selector = hex_str_to_bytes(selector)
+        encoders = [_static_encoder(type_str) for type_str in input_types]
+        decoders = [_static_decoder(type_str) for type_str in output_types]
+        self.encoders = encoders if all(encoders) else None
+        self.decoders = decoders if all(decoders) else None
+        self.output_names = output_names
+        self.output_size = 32 * len(output_types)
+
+    def encode(self, arguments: Sequence[Any]) -> str:
+        if self.encoders is None:
+            raise _NotStatic
+        try:
+            words = [encode(value) for encode, value in zip(self.encoders, arguments)]
+        except ValueError:
+            # e.g. an address that is not hex, left to the generic codec to report
+            raise _NotStatic
+        return "0x" + (self.selector + b"".join(words)).hex()
+
+    def decode(self, data: str) -> Dict[str, Any]:
+        if self.decoders is None:
+            raise _NotStatic
+        raw = hex_str_to_bytes(data)
+        if raw is None or len(raw) < self.output_size:
+            raise _NotStatic
+        values = [decode(raw[index * 32 : index * 32 + 32]) for index, decode in enumerate(self.decoders)]
+        return dict(zip(self.output_names, values))
+
+
 class Function:
     def __init__(self, function_abi: ABIFunction):
         """
@@ -177,9 +335,27 @@ class Function:
         :type function_abi: ABIFunction
         """
         self._function_abi = function_abi
-        self._signature = function_abi_to_4byte_selector_str(function_abi)
-        self._inputs_type = get_abi_input_types(function_abi)
-        self._outputs_type = get_abi_output_types(function_abi)
+
+    @cached_property
+    def _signature(self) -> str:
+        return function_abi_to_4byte_selector_str(self._function_abi)
+
+    @cached_property
+    def _inputs_type(self) -> List[str]:
+        return get_abi_input_types(self._function_abi)
+
+    @cached_property
+    def _outputs_type(self) -> List[str]:
+        return get_abi_output_types(self._function_abi)
+
+    @cached_property
+    def _call_template(self) -> StaticCallTemplate:
+        return StaticCallTemplate(
+            self._signature,
+            self._inputs_type,
+            self._outputs_type,
+            [output["name"] for output in self._function_abi.get("outputs", [])],
+        )
 
     def get_abi(self) -> ABIFunction:
         """
@@ -271,6 +447,12 @@ class Function:
         :return: A dictionary containing the decoded data, or None if decoding fails.
         :rtype: Optional[Dict[str, Any]]
         """
+        if not normalizers:
+            try:
+                return self._call_template.decode(data)
+            except _NotStatic:
+                pass
+
         try:
             decoded = decode_data(self._outputs_type, hex_str_to_bytes(data))
             if normalizers:
@@ -300,20 +482,11 @@ class Function:
         if len(arguments) != len(self._inputs_type):
             raise ValueError(f"Expected {len(self._inputs_type)} arguments, got {len(arguments)}")
 
-        if len(arguments) > 2:
+        try:
+            return self._call_template.encode(arguments)
+        except _NotStatic:
             return encode_data(self._function_abi, arguments, self.get_signature())
 
-        encoded = hex_str_to_bytes(self._signature)
-        for arg, arg_type in zip(arguments, self._inputs_type):
-            if arg_type == "address":
-                encoded += pad_address(arg)
-            elif arg_type == "uint256":
-                encoded += uint256_to_bytes(arg)
-            else:
-                # cannot handle, call encode directly
-                return encode_data(self._function_abi, arguments, self.get_signature())
-        return bytes_to_hex_str(encoded)
-
 
 class FunctionCollection:
     def __init__(self, functions: List[Function]):
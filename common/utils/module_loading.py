@@ -5,6 +5,8 @@ import pkgutil
 from importlib import import_module
 from typing import Dict, List, Type
 
+from common.utils.registry_manifest import cached_section, project_root
+
 
 def import_string(dotted_path: str):
     """
@@ -25,41 +27,99 @@ def import_string(dotted_path: str):
         raise ImportError(f'Module "{module_path}" does not define a "{class_name}" attribute/class')
 
 
-def scan_subclass_by_path_patterns(
-    path_patterns: List[str], base_class: Type[object], exclude_path=[]
-) -> Dict[str, dict]:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+class LazyImportMapping(dict):
+    """
+    A dict whose values are imported from their dotted paths on first lookup.
+    Iterating or sizing the mapping imports every value, like the eager dict it replaces.
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        super().__init__()
+        self.paths = paths
+
+    def __missing__(self, key):
+        value = self[key] = import_string(self.paths[key])
+        return value
+
+    def __contains__(self, key):
+        return key in self.paths
+
+    def get(self, key, default=None):
+        return self[key] if key in self.paths else default
+
+    def load_all(self):
+        for key in self.paths:
+            if not dict.__contains__(self, key):
+                self[key] = import_string(self.paths[key])
+        return self
+
+    def __iter__(self):
+        return iter(self.load_all().paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def keys(self):
+        return dict.keys(self.load_all())
+
+    def values(self):
+        return dict.values(self.load_all())
+
+    def items(self):
+        return dict.items(self.load_all())
+
+
+def module_files_by_path_patterns(path_patterns: List[str], exclude_path=[]) -> List[str]:
     exclude_path = [os.path.join(project_root, path) for path in exclude_path]
 
-    mapping = {}
+    files = []
     for model_pattern in path_patterns:
         pattern_path = os.path.join(project_root, model_pattern)
         for models_dir in glob.glob(pattern_path):
             if os.path.isdir(models_dir) and models_dir not in exclude_path:
                 for file in os.listdir(models_dir):
                     if file.endswith(".py") and file != "__init__.py":
-                        module_file_path = os.path.join(models_dir, file)
-                        module_relative_path = os.path.relpath(module_file_path, start=project_root)
-                        module_import_path = module_relative_path.replace(os.path.sep, ".")
-
-                        with open(module_file_path, "r", encoding="utf-8") as module:
-                            file_content = module.read()
-
-                        parsed_content = ast.parse(file_content)
-                        class_names = [node.name for node in ast.walk(parsed_content) if isinstance(node, ast.ClassDef)]
-
-                        for cls in class_names:
-                            full_class_path = os.path.join(module_import_path[:-3], cls)
-                            dot_path = full_class_path.replace(os.path.sep, ".")
-                            module = import_string(dot_path)
-
-                            if not issubclass(module, base_class):
-                                continue
-                            mapping[cls] = {
-                                "module_import_path": module_import_path[:-3],
-                                "cls_import_path": f"{module_import_path[:-3]}.{cls}",
-                            }
+                        files.append(os.path.join(models_dir, file))
+    return files
+
+
+def scan_subclass_by_path_patterns(
+    path_patterns: List[str], base_class: Type[object], exclude_path=[]
+) -> Dict[str, dict]:
+    """
+    Map the name of every subclass of base_class defined in the modules matching path_patterns to its import paths.
+    The mapping is kept in the registry manifest, modules are only parsed and imported again when a file changed.
+    """
+    files = module_files_by_path_patterns(path_patterns, exclude_path)
+    section = f"subclasses:{base_class.__module__}.{base_class.__qualname__}:{','.join(path_patterns)}"
+    if exclude_path:
+        section += f":exclude:{','.join(exclude_path)}"
+    return cached_section(section, files, lambda: _scan_subclass(files, base_class))
+
+
+def _scan_subclass(files: List[str], base_class: Type[object]) -> Dict[str, dict]:
+    mapping = {}
+    for module_file_path in files:
+        module_relative_path = os.path.relpath(module_file_path, start=project_root)
+        module_import_path = module_relative_path.replace(os.path.sep, ".")
+
+        with open(module_file_path, "r", encoding="utf-8") as module:
+            file_content = module.read()
+
+        parsed_content = ast.parse(file_content)
+        class_names = [node.name for node in ast.walk(parsed_content) if isinstance(node, ast.ClassDef)]
+
+        for cls in class_names:
+            full_class_path = os.path.join(module_import_path[:-3], cls)
+            dot_path = full_class_path.replace(os.path.sep, ".")
+            module = import_string(dot_path)
+
+            if not issubclass(module, base_class):
+                continue
+            mapping[cls] = {
+                "module_import_path": module_import_path[:-3],
+                "cls_import_path": f"{module_import_path[:-3]}.{cls}",
+            }
 
     return mapping
 
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import os
+import threading
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_ENV = "HEMERA_REGISTRY_MANIFEST"
+MANIFEST_VERSION = 1
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+_lock = threading.Lock()
+_manifest = None
+
+
+def manifest_path():
+    """
+    The manifest file, HEMERA_REGISTRY_MANIFEST overrides the default location in the project root
+    and "off" disables the manifest.
+    """
+    path = os.environ.get(MANIFEST_ENV, os.path.join(project_root, ".hemera_registry.json"))
+    return None if path.lower() in ("", "off", "false", "0") else path
+
+
+def source_fingerprint(files):
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, project_root)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _load():
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        path = manifest_path()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    content = orjson.loads(f.read())
+                if content.get("version") == MANIFEST_VERSION:
+                    _manifest = content.get("sections", {})
+            except (OSError, orjson.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable registry manifest {path}: {e}")
+    return _manifest
+
+
+def _save():
+    path = manifest_path()
+    if not path:
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps({"version": MANIFEST_VERSION, "sections": _manifest}))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # a read-only installation still works, it just rebuilds the sections on every start
+        logger.debug(f"Failed to write registry manifest {path}: {e}")
+
+
+def cached_section(name, source_files, build):
+    """
+    Return the data of a manifest section, calling build() and storing its json serializable result
+    when the section is missing or any of its source files was added, removed or modified.
+    """
+    if manifest_path() is None:
+        return build()
+
+    fingerprint = source_fingerprint(source_files)
+    with _lock:
+        section = _load().get(name)
+        if section is not None and section["fingerprint"] == fingerprint:
+            return section["data"]
+
+    logger.info(f"Rebuilding registry manifest section {name}")
+    data = build()
+    with _lock:
+        _load()[name] = {"fingerprint": fingerprint, "data": data}
+        _save()
+    return data
+
+
+def clear_manifest():
+    global _manifest
+    with _lock:
+        _manifest = {}
+        path = manifest_path()
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -1,5 +1,6 @@
 from enum import IntFlag
 from functools import reduce
+from importlib import import_module
 
 from indexer.domain.block import Block, UpdateBlockInternalCount
 from indexer.domain.block_ts_mapper import BlockTsMapper
@@ -13,45 +14,6 @@ from indexer.domain.token_id_infos import *
 from indexer.domain.token_transfer import ERC20TokenTransfer, ERC721TokenTransfer, ERC1155TokenTransfer
 from indexer.domain.trace import Trace
 from indexer.domain.transaction import Transaction
-from indexer.modules.custom.address_index.domain import *
-from indexer.modules.custom.address_index.domain.address_contract_operation import AddressContractOperation
-from indexer.modules.custom.address_index.domain.address_internal_transaction import AddressInternalTransaction
-from indexer.modules.custom.address_index.domain.address_nft_1155_holders import AddressNft1155Holder
-from indexer.modules.custom.all_features_value_record import AllFeatureValueRecordBlueChipHolders
-from indexer.modules.custom.blue_chip.domain.feature_blue_chip import BlueChipHolder
-from indexer.modules.custom.deposit_to_l2.domain.address_token_deposit import AddressTokenDeposit
-from indexer.modules.custom.deposit_to_l2.domain.token_deposit_transaction import TokenDepositTransaction
-from indexer.modules.custom.eigen_layer.domains.eigen_layer_domain import EigenLayerAction, EigenLayerAddressCurrent
-from indexer.modules.custom.hemera_ens.ens_domain import (
-    ENSAddressChangeD,
-    ENSAddressD,
-    ENSMiddleD,
-    ENSNameRenewD,
-    ENSRegisterD,
-)
-from indexer.modules.custom.karak.karak_domain import KarakActionD, KarakAddressCurrentD, KarakVaultTokenD
-from indexer.modules.custom.opensea.domain.address_opensea_transactions import AddressOpenseaTransaction
-from indexer.modules.custom.opensea.domain.opensea_order import OpenseaOrder
-from indexer.modules.custom.uniswap_v2.domain.feature_uniswap_v2 import (
-    UniswapV2Erc20CurrentTotalSupply,
-    UniswapV2Erc20TotalSupply,
-    UniswapV2Pool,
-    UniswapV2SwapEvent,
-)
-from indexer.modules.custom.uniswap_v3.domains.feature_uniswap_v3 import (
-    UniswapV3Pool,
-    UniswapV3PoolCurrentPrice,
-    UniswapV3PoolFromSwapEvent,
-    UniswapV3PoolFromToken,
-    UniswapV3PoolPrice,
-    UniswapV3SwapEvent,
-    UniswapV3Token,
-    UniswapV3TokenCollectFee,
-    UniswapV3TokenCurrentStatus,
-    UniswapV3TokenDetail,
-    UniswapV3TokenUpdateLiquidity,
-)
-from indexer.modules.user_ops.domain.user_operations import UserOperationsResult
 
 
 class EntityType(IntFlag):
@@ -113,6 +75,13 @@ def calculate_entity_value(entity_types):
     return entities
 
 
+def lazy_types(module, *names):
+    # custom module domains are only imported when their entity type is selected
+    domain_module = import_module(module)
+    for name in names:
+        yield getattr(domain_module, name)
+
+
 def generate_output_types(entity_types):
     if entity_types & EntityType.EXPLORER_BASE:
         yield Block
@@ -143,18 +112,21 @@ def generate_output_types(entity_types):
         yield UpdateBlockInternalCount
 
     if entity_types & EntityType.UNISWAP_V3:
-        yield UniswapV3Pool
-        yield UniswapV3PoolPrice
-        yield UniswapV3PoolCurrentPrice
-        yield UniswapV3SwapEvent
-        yield UniswapV3PoolFromSwapEvent
-        yield UniswapV3Token
-        yield UniswapV3TokenDetail
-        yield UniswapV3TokenCurrentStatus
-        yield UniswapV3PoolFromToken
+        yield from lazy_types(
+            "indexer.modules.custom.uniswap_v3.domains.feature_uniswap_v3",
+            "UniswapV3Pool",
+            "UniswapV3PoolPrice",
+            "UniswapV3PoolCurrentPrice",
+            "UniswapV3SwapEvent",
+            "UniswapV3PoolFromSwapEvent",
+            "UniswapV3Token",
+            "UniswapV3TokenDetail",
+            "UniswapV3TokenCurrentStatus",
+            "UniswapV3PoolFromToken",
+        )
 
     if entity_types & EntityType.USER_OPS:
-        yield UserOperationsResult
+        yield from lazy_types("indexer.modules.user_ops.domain.user_operations", "UserOperationsResult")
 
     if entity_types & EntityType.ADDRESS_INDEX:
         yield Block
@@ -164,14 +136,23 @@ def generate_output_types(entity_types):
         yield ERC20TokenTransfer
         yield ERC721TokenTransfer
         yield ERC1155TokenTransfer
-        yield AddressNftTransfer
-        yield AddressTokenHolder
-        yield AddressTokenTransfer
-        yield TokenAddressNftInventory
-        yield AddressTransaction
-        yield AddressNft1155Holder
-        yield AddressContractOperation
-        yield AddressInternalTransaction
+        yield from lazy_types(
+            "indexer.modules.custom.address_index.domain",
+            "AddressNftTransfer",
+            "AddressTokenHolder",
+            "AddressTokenTransfer",
+            "TokenAddressNftInventory",
+            "AddressTransaction",
+        )
+        yield from lazy_types(
+            "indexer.modules.custom.address_index.domain.address_nft_1155_holders", "AddressNft1155Holder"
+        )
+        yield from lazy_types(
+            "indexer.modules.custom.address_index.domain.address_contract_operation", "AddressContractOperation"
+        )
+        yield from lazy_types(
+            "indexer.modules.custom.address_index.domain.address_internal_transaction", "AddressInternalTransaction"
+        )
 
     if entity_types & EntityType.BLUE_CHIP:
         yield Block
@@ -181,35 +162,52 @@ def generate_output_types(entity_types):
         yield UpdateToken
         yield TokenBalance
         yield CurrentTokenBalance
-        yield AllFeatureValueRecordBlueChipHolders
-        yield BlueChipHolder
+        yield from lazy_types(
+            "indexer.modules.custom.all_features_value_record", "AllFeatureValueRecordBlueChipHolders"
+        )
+        yield from lazy_types("indexer.modules.custom.blue_chip.domain.feature_blue_chip", "BlueChipHolder")
 
     if entity_types & EntityType.DEPOSIT_TO_L2:
-        yield TokenDepositTransaction
-        yield AddressTokenDeposit
+        yield from lazy_types(
+            "indexer.modules.custom.deposit_to_l2.domain.token_deposit_transaction", "TokenDepositTransaction"
+        )
+        yield from lazy_types(
+            "indexer.modules.custom.deposit_to_l2.domain.address_token_deposit", "AddressTokenDeposit"
+        )
 
     if entity_types & EntityType.ENS:
-        yield ENSMiddleD
-        yield ENSRegisterD
-        yield ENSNameRenewD
-        yield ENSAddressChangeD
-        yield ENSAddressD
+        yield from lazy_types(
+            "indexer.modules.custom.hemera_ens.ens_domain",
+            "ENSMiddleD",
+            "ENSRegisterD",
+            "ENSNameRenewD",
+            "ENSAddressChangeD",
+            "ENSAddressD",
+        )
 
     if entity_types & EntityType.OPEN_SEA:
-        yield AddressOpenseaTransaction
-        yield OpenseaOrder
+        yield from lazy_types(
+            "indexer.modules.custom.opensea.domain.address_opensea_transactions", "AddressOpenseaTransaction"
+        )
+        yield from lazy_types("indexer.modules.custom.opensea.domain.opensea_order", "OpenseaOrder")
 
     if entity_types & EntityType.KARAK:
-        yield KarakActionD
-        yield KarakVaultTokenD
-        yield KarakAddressCurrentD
+        yield from lazy_types(
+            "indexer.modules.custom.karak.karak_domain", "KarakActionD", "KarakVaultTokenD", "KarakAddressCurrentD"
+        )
 
     if entity_types & EntityType.EIGEN_LAYER:
-        yield EigenLayerAction
-        yield EigenLayerAddressCurrent
+        yield from lazy_types(
+            "indexer.modules.custom.eigen_layer.domains.eigen_layer_domain",
+            "EigenLayerAction",
+            "EigenLayerAddressCurrent",
+        )
 
     if entity_types & EntityType.UNISWAP_V2:
-        yield UniswapV2Pool
-        yield UniswapV2SwapEvent
-        yield UniswapV2Erc20TotalSupply
-        yield UniswapV2Erc20CurrentTotalSupply
+        yield from lazy_types(
+            "indexer.modules.custom.uniswap_v2.domain.feature_uniswap_v2",
+            "UniswapV2Pool",
+            "UniswapV2SwapEvent",
+            "UniswapV2Erc20TotalSupply",
+            "UniswapV2Erc20CurrentTotalSupply",
+        )
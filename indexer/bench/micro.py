@@ -0,0 +1,359 @@
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import cached_property
+
+from indexer.bench.synthetic_chain import ERC20, ChainProfile, SyntheticChain, account_address, token_address
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_MEMORY_THRESHOLD = 0.25
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a hot path. The decorated setup receives the shared MicroFixtures and returns a function
+    processing a batch of items and returning its outputs, together with the number of items in the batch.
+    """
+
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+class MicroFixtures:
+    """
+    Representative inputs generated from one synthetic block, so every run measures the same data.
+    """
+
+    def __init__(
+        self, profile=ChainProfile(blocks=2, transactions_per_block=200, logs_per_transaction=3, trace_depth=3)
+    ):
+        self.chain = SyntheticChain(profile)
+        self.block_number = 1
+
+    def _rpc(self, method, *params):
+        return self.chain.get(method, list(params))["result"]
+
+    @cached_property
+    def block_dict(self):
+        return self._rpc("eth_getBlockByNumber", hex(self.block_number), True)
+
+    @cached_property
+    def receipt_dicts(self):
+        return [self._rpc("eth_getTransactionReceipt", tx["hash"]) for tx in self.block_dict["transactions"]]
+
+    @cached_property
+    def log_dicts(self):
+        return [log for receipt in self.receipt_dicts for log in receipt["logs"]]
+
+    @cached_property
+    def logs(self):
+        from indexer.domain.log import Log
+
+        return [Log.from_rpc(log, 1700000000, self.block_dict["hash"], self.block_number) for log in self.log_dicts]
+
+    @cached_property
+    def transactions(self):
+        from indexer.domain.block import Block
+
+        return Block.from_rpc(self.block_dict).transactions
+
+    @cached_property
+    def geth_trace(self):
+        return {
+            "block_number": self.block_number,
+            "block_hash": self.block_dict["hash"],
+            "block_timestamp": self.block_dict["timestamp"],
+            "transaction_traces": self._rpc("debug_traceBlockByNumber", hex(self.block_number), {}),
+        }
+
+
+@benchmark("block_from_rpc")
+def _block_from_rpc(fixtures: MicroFixtures):
+    from indexer.domain.block import Block
+
+    block_dict = fixtures.block_dict
+    return lambda: Block.from_rpc(block_dict), 1
+
+
+@benchmark("transaction_from_rpc")
+def _transaction_from_rpc(fixtures: MicroFixtures):
+    from indexer.domain.transaction import Transaction
+
+    transactions = fixtures.block_dict["transactions"]
+
+    def run():
+        return [
+            Transaction.from_rpc(transaction, 1700000000, fixtures.block_dict["hash"], fixtures.block_number)
+            for transaction in transactions
+        ]
+
+    return run, len(transactions)
+
+
+@benchmark("log_from_rpc")
+def _log_from_rpc(fixtures: MicroFixtures):
+    from indexer.domain.log import Log
+
+    log_dicts = fixtures.log_dicts
+
+    def run():
+        return [Log.from_rpc(log, 1700000000, fixtures.block_dict["hash"], fixtures.block_number) for log in log_dicts]
+
+    return run, len(log_dicts)
+
+
+@benchmark("extract_transfer_from_log")
+def _extract_transfer_from_log(fixtures: MicroFixtures):
+    from indexer.domain.token_transfer import extract_transfer_from_log
+
+    logs = fixtures.logs
+
+    def run():
+        return [extract_transfer_from_log(log) for log in logs]
+
+    return run, len(logs)
+
+
+@benchmark("event_decode_log")
+def _event_decode_log(fixtures: MicroFixtures):
+    from indexer.utils.abi_setting import ERC20_TRANSFER_EVENT
+
+    signature = ERC20_TRANSFER_EVENT.get_signature()
+    logs = [log for log in fixtures.logs if log.topic0 == signature and log.topic3 is None]
+
+    def run():
+        return [ERC20_TRANSFER_EVENT.decode_log(log) for log in logs]
+
+    return run, len(logs)
+
+
+@benchmark("function_decode_output")
+def _function_decode_output(fixtures: MicroFixtures):
+    from eth_abi import encode
+
+    from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION, TOKEN_NAME_FUNCTION
+
+    outputs = []
+    for index in range(100):
+        token = token_address(ERC20, index)
+        balance_data = ERC20_BALANCE_OF_FUNCTION.get_signature() + encode(["address"], [account_address(index)]).hex()
+        name = fixtures._rpc("eth_call", {"to": token, "data": TOKEN_NAME_FUNCTION.get_signature()}, "0x1")
+        balance = fixtures._rpc("eth_call", {"to": token, "data": balance_data}, "0x1")
+        outputs.extend([(TOKEN_NAME_FUNCTION, name), (ERC20_BALANCE_OF_FUNCTION, balance)])
+
+    def run():
+        return [function.decode_function_output_data(output) for function, output in outputs]
+
+    return run, len(outputs)
+
+
+@benchmark("general_converter")
+def _general_converter(fixtures: MicroFixtures):
+    from common.converter.pg_converter import domain_model_mapping
+    from common.models import general_converter
+    from indexer.domain.transaction import Transaction
+
+    table = domain_model_mapping[Transaction]["table"]
+    transactions = fixtures.transactions
+
+    def run():
+        return [general_converter(table, transaction) for transaction in transactions]
+
+    return run, len(transactions)
+
+
+@benchmark("dataclass_to_dict")
+def _dataclass_to_dict(fixtures: MicroFixtures):
+    from indexer.domain import dataclass_to_dict
+
+    logs = fixtures.logs
+
+    def run():
+        return [dataclass_to_dict(log) for log in logs]
+
+    return run, len(logs)
+
+
+@benchmark("geth_trace_to_traces")
+def _geth_trace_to_traces(fixtures: MicroFixtures):
+    from indexer.utils.trace_sources import ExtractTraces
+
+    geth_trace = fixtures.geth_trace
+    traces = len(ExtractTraces().geth_trace_to_traces(geth_trace))
+    return lambda: ExtractTraces().geth_trace_to_traces(geth_trace), traces
+
+
+@benchmark("call_rpc_param")
+def _call_rpc_param(fixtures: MicroFixtures):
+    from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION
+    from indexer.utils.multicall_hemera import Call
+
+    arguments = [(token_address(ERC20, index % 200), account_address(index)) for index in range(500)]
+
+    def run():
+        return [
+            Call(token, ERC20_BALANCE_OF_FUNCTION, [holder], block_number=fixtures.block_number).rpc_param
+            for token, holder in arguments
+        ]
+
+    return run, len(arguments)
+
+
+@benchmark("call_rpc_param_generic")
+def _call_rpc_param_generic(fixtures: MicroFixtures):
+    # the call path before the static call templates, kept as the reference of call_rpc_param
+    import orjson
+    from eth_utils import to_checksum_address
+
+    from common.utils.abi_code_utils import encode_data
+    from common.utils.format_utils import format_block_id
+    from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION
+
+    arguments = [(token_address(ERC20, index % 200), account_address(index)) for index in range(500)]
+    abi, signature = ERC20_BALANCE_OF_FUNCTION.get_abi(), ERC20_BALANCE_OF_FUNCTION.get_signature()
+
+    def run():
+        params = []
+        for token, holder in arguments:
+            args = [
+                {"to": to_checksum_address(token), "data": encode_data(abi, [holder], signature)},
+                format_block_id(fixtures.block_number),
+            ]
+            params.append({"jsonrpc": "2.0", "method": "eth_call", "params": args, "id": abs(hash(orjson.dumps(args)))})
+        return params
+
+    return run, len(arguments)
+
+
+def _balance_outputs():
+    from eth_abi import encode
+
+    return ["0x" + encode(["uint256"], [index * 10**18]).hex() for index in range(500)]
+
+
+@benchmark("call_decode_output")
+def _call_decode_output(fixtures: MicroFixtures):
+    from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION
+    from indexer.utils.multicall_hemera import Call
+
+    call = Call(token_address(ERC20, 0), ERC20_BALANCE_OF_FUNCTION, [account_address(0)], fixtures.block_number)
+    outputs = _balance_outputs()
+    return lambda: [call.decode_output(output) for output in outputs], len(outputs)
+
+
+@benchmark("call_decode_output_generic")
+def _call_decode_output_generic(fixtures: MicroFixtures):
+    from web3._utils.abi import named_tree
+
+    from common.utils.abi_code_utils import decode_data
+    from common.utils.format_utils import hex_str_to_bytes
+    from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION
+
+    output_abi, output_types = (
+        ERC20_BALANCE_OF_FUNCTION.get_abi()["outputs"],
+        ERC20_BALANCE_OF_FUNCTION.get_outputs_type(),
+    )
+    outputs = _balance_outputs()
+
+    def run():
+        return [named_tree(output_abi, decode_data(output_types, hex_str_to_bytes(output))) for output in outputs]
+
+    return run, len(outputs)
+
+
+def measure(run, items, min_time=0.2, repeat=5):
+    run()
+    best = 0
+    for _ in range(repeat):
+        loops, start = 0, time.perf_counter()
+        while True:
+            run()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, loops * items / elapsed)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        # the outputs are kept alive until the peak is read, so it covers what the hot path produces
+        outputs = run()
+        _, peak = tracemalloc.get_traced_memory()
+        del outputs
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "items": items,
+        "ops_per_second": round(best, 1),
+        "peak_bytes_per_op": round((peak - baseline) / items, 1),
+    }
+
+
+def run_benchmarks(names=None, min_time=0.2, repeat=5):
+    fixtures = MicroFixtures()
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        run, items = setup(fixtures)
+        results[name] = measure(run, items, min_time=min_time, repeat=repeat)
+        logger.info(f"{name}: {results[name]}")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD, names=None):
+    """
+    Compare two benchmark reports. A hot path regresses when its ops/s drop by more than threshold,
+    or its peak memory per op grows by more than memory_threshold.
+    A baseline hot path missing from the current report, e.g. after it was renamed or removed, regresses too,
+    unless names selected a subset of the hot paths that leaves it out.
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        new = current["results"].get(name)
+        if new is None:
+            rows.append(
+                {
+                    "name": name,
+                    "baseline_ops_per_second": base["ops_per_second"],
+                    "ops_per_second": None,
+                    "speed_change": None,
+                    "memory_change": None,
+                    "regressed": True,
+                }
+            )
+            continue
+        speed_change = new["ops_per_second"] / base["ops_per_second"] - 1 if base["ops_per_second"] else 0
+        memory_change = new["peak_bytes_per_op"] / base["peak_bytes_per_op"] - 1 if base["peak_bytes_per_op"] else 0
+        rows.append(
+            {
+                "name": name,
+                "baseline_ops_per_second": base["ops_per_second"],
+                "ops_per_second": new["ops_per_second"],
+                "speed_change": round(speed_change, 4),
+                "memory_change": round(memory_change, 4),
+                "regressed": speed_change < -threshold or memory_change > memory_threshold,
+            }
+        )
+    return rows
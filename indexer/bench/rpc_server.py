@@ -0,0 +1,213 @@
+import gzip
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+import requests
+
+logger = logging.getLogger(__name__)
+
+NOT_RECORDED_ERROR = -32001
+
+
+def request_key(method, params):
+    return method + ":" + orjson.dumps(params or [], option=orjson.OPT_SORT_KEYS).decode()
+
+
+class RecordedResponses:
+    """
+    JSON-RPC results keyed by method and params, stored as a gzip compressed json lines archive with one
+    {"method", "params", "result"} object per line.
+    """
+
+    def __init__(self, entries=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        for entry in entries or []:
+            self.add(entry["method"], entry.get("params"), entry.get("result"), entry.get("error"))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, method, params, result=None, error=None):
+        entry = {"method": method, "params": params or [], "result": result}
+        if error is not None:
+            entry["error"] = error
+        with self._lock:
+            self._entries[request_key(method, params)] = entry
+
+    def get(self, method, params):
+        return self._entries.get(request_key(method, params))
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rb") as f:
+            return cls(orjson.loads(line) for line in f if line.strip())
+
+    def save(self, path):
+        with self._lock:
+            entries = list(self._entries.values())
+        with gzip.open(path, "wb") as f:
+            for entry in entries:
+                f.write(orjson.dumps(entry) + b"\n")
+        logger.info(f"Saved {len(entries)} recorded responses to {path}")
+
+
+class StandInRPCServer:
+    """
+    A local JSON-RPC node that answers from recorded responses, or from any object with the same
+    get(method, params) method such as a SyntheticChain.
+
+    latency_ms and jitter_ms delay every HTTP request, error_rate is the share of HTTP requests answered with
+    503 so that the retry paths of the indexer are exercised. With upstream_uri, requests missing from the
+    recording are forwarded to a real node and recorded.
+    """
+
+    def __init__(
+        self,
+        responses: RecordedResponses,
+        host="127.0.0.1",
+        port=0,
+        latency_ms=0,
+        jitter_ms=0,
+        error_rate=0.0,
+        upstream_uri=None,
+        seed=None,
+    ):
+        self.responses = responses
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.upstream_uri = upstream_uri
+        self.http_requests = 0
+        self.rpc_calls = 0
+        self.misses = 0
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self._upstream = requests.Session() if upstream_uri else None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def uri(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-rpc", daemon=True)
+        self._thread.start()
+        logger.info(f"Stand-in RPC node serving {type(self.responses).__name__} on {self.uri}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def stats(self):
+        return {
+            "http_requests": self.http_requests,
+            "rpc_calls": self.rpc_calls,
+            "misses": self.misses,
+            "injected_errors": self.injected_errors,
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, content = server.handle(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _delay(self):
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            with self._stats_lock:
+                delay_ms += self._random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def handle(self, body):
+        self._delay()
+        with self._stats_lock:
+            self.http_requests += 1
+            inject_error = self.error_rate > 0 and self._random.random() < self.error_rate
+            if inject_error:
+                self.injected_errors += 1
+        if inject_error:
+            return 503, b'{"error": "injected failure"}'
+
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return 400, orjson.dumps(
+                {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+            )
+
+        calls = payload if isinstance(payload, list) else [payload]
+        with self._stats_lock:
+            self.rpc_calls += len(calls)
+        responses = self._answer(calls)
+        return 200, orjson.dumps(responses if isinstance(payload, list) else responses[0])
+
+    def _answer(self, calls):
+        entries = [self.responses.get(call.get("method"), call.get("params")) for call in calls]
+        missing = [call for call, entry in zip(calls, entries) if entry is None]
+        if missing:
+            with self._stats_lock:
+                self.misses += len(missing)
+            if self._upstream is not None:
+                self._record(missing)
+                entries = [self.responses.get(call.get("method"), call.get("params")) for call in calls]
+
+        responses = []
+        for call, entry in zip(calls, entries):
+            response = {"jsonrpc": "2.0", "id": call.get("id")}
+            if entry is None:
+                response["error"] = {
+                    "code": NOT_RECORDED_ERROR,
+                    "message": f"{call.get('method')} with params {call.get('params')} is not recorded",
+                }
+            elif entry.get("error") is not None:
+                response["error"] = entry["error"]
+            else:
+                response["result"] = entry["result"]
+            responses.append(response)
+        return responses
+
+    def _record(self, calls):
+        upstream_calls = [
+            {"jsonrpc": "2.0", "method": call.get("method"), "params": call.get("params") or [], "id": index}
+            for index, call in enumerate(calls)
+        ]
+        response = self._upstream.post(self.upstream_uri, data=orjson.dumps(upstream_calls), timeout=60)
+        response.raise_for_status()
+        for item in orjson.loads(response.content):
+            call = upstream_calls[item["id"]]
+            self.responses.add(call["method"], call["params"], item.get("result"), item.get("error"))
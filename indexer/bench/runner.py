@@ -0,0 +1,114 @@
+import copy
+import logging
+import resource
+import time
+from collections import defaultdict
+
+from web3 import Web3
+
+from enumeration.entity_type import calculate_entity_value, generate_output_types
+from indexer.bench.scenarios import Scenario
+from indexer.exporters.item_exporter import create_item_exporters
+from indexer.utils.metrics import JOB_CPU, JOB_DURATION, JOB_ITEMS, RPC_REQUESTS, registry
+from indexer.utils.provider import get_provider_from_uri
+from indexer.utils.thread_local_proxy import ThreadLocalProxy
+
+logger = logging.getLogger(__name__)
+
+
+def sum_by_label(before, after, metric_name, label, field="value"):
+    """
+    Sum the growth of a metric between two registry snapshots, grouped by one label.
+    """
+    previous = {tuple(sorted(sample["labels"].items())): sample[field] for sample in before.get(metric_name, [])}
+    totals = defaultdict(float)
+    for sample in after.get(metric_name, []):
+        key = tuple(sorted(sample["labels"].items()))
+        totals[sample["labels"].get(label)] += sample[field] - previous.get(key, 0)
+    return {name: value for name, value in totals.items() if value}
+
+
+def build_report(scenario: Scenario, start_block, end_block, wall_seconds, cpu_seconds, before, after):
+    blocks = end_block - start_block + 1
+    rpc_calls_by_method = sum_by_label(before, after, RPC_REQUESTS.name, "method")
+    rpc_calls = sum(rpc_calls_by_method.values())
+    return {
+        "scenario": scenario.name,
+        "start_block": start_block,
+        "end_block": end_block,
+        "blocks": blocks,
+        "wall_seconds": round(wall_seconds, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "blocks_per_second": round(blocks / wall_seconds, 3) if wall_seconds else None,
+        "rpc_calls": int(rpc_calls),
+        "rpc_calls_per_block": round(rpc_calls / blocks, 3),
+        "rpc_calls_by_method": {method: int(calls) for method, calls in sorted(rpc_calls_by_method.items())},
+        "job_cpu_seconds": {
+            job: round(seconds, 3) for job, seconds in sorted(sum_by_label(before, after, JOB_CPU.name, "job").items())
+        },
+        "job_wall_seconds": {
+            job: round(seconds, 3)
+            for job, seconds in sorted(sum_by_label(before, after, JOB_DURATION.name, "job", field="sum").items())
+        },
+        "items": {
+            item_type: int(count)
+            for item_type, count in sorted(sum_by_label(before, after, JOB_ITEMS.name, "type").items())
+        },
+        # ru_maxrss is in kilobytes on linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def run_scenario(
+    scenario: Scenario,
+    provider_uri,
+    start_block,
+    end_block,
+    output="void",
+    db_service=None,
+    block_batch_size=10,
+    batch_size=10,
+    debug_batch_size=1,
+    max_workers=5,
+    multicall=True,
+    config=None,
+):
+    """
+    Index start_block to end_block with the jobs of a scenario and report throughput and cost.
+    config is merged over the job sections of the scenario, like the --config-file of hemera stream.
+    """
+    # importing the scheduler loads every custom module, keep it out of module import time
+    from indexer.controller.scheduler.job_scheduler import JobScheduler
+
+    config = {
+        **copy.deepcopy(scenario.config),
+        **(config or {}),
+        "blocks_per_file": block_batch_size,
+        "source_path": None,
+        "chain_id": Web3(Web3.HTTPProvider(provider_uri)).eth.chain_id,
+    }
+    if db_service is not None:
+        config["db_service"] = db_service
+
+    output_types = list(set(generate_output_types(calculate_entity_value(scenario.entity_types))))
+    job_scheduler = JobScheduler(
+        batch_web3_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
+        batch_web3_debug_provider=ThreadLocalProxy(lambda: get_provider_from_uri(provider_uri, batch=True)),
+        item_exporters=create_item_exporters(output, config),
+        batch_size=batch_size,
+        debug_batch_size=debug_batch_size,
+        max_workers=max_workers,
+        config=config,
+        required_output_types=output_types,
+        auto_reorg=False,
+        multicall=multicall,
+    )
+
+    logger.info(f"Running scenario {scenario.name} on blocks {start_block} to {end_block}")
+    before = registry.snapshot()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for batch_start in range(start_block, end_block + 1, block_batch_size):
+        job_scheduler.run_jobs(batch_start, min(batch_start + block_batch_size - 1, end_block))
+    wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    return build_report(scenario, start_block, end_block, wall_seconds, cpu_seconds, before, registry.snapshot())
@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    entity_types: str
+    description: str
+    # the sections of the jobs that need one, a --config-file overrides them
+    config: dict = field(default_factory=dict)
+
+
+# the uniswap v3 deployment on ethereum
+UNISWAP_V3_CONFIG = {
+    "uniswap_v3_job": {
+        "pool_address": None,
+        "jobs": [
+            {
+                "type": "uniswapv3",
+                "factory address": "0x1f98431c8ad98523631ae4a59f267346ea31f984",
+                "position_token_address": "0xc36442b4a4522e871399cd717abdd847ab11fe88",
+            }
+        ],
+    }
+}
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("explorer_base", "EXPLORER_BASE", "Blocks, transactions, receipts and logs."),
+        Scenario("token", "EXPLORER_BASE,EXPLORER_TOKEN", "Token transfers, token metadata and balances."),
+        Scenario("trace", "EXPLORER_BASE,EXPLORER_TRACE", "Traces, internal transactions and contracts."),
+        Scenario("address_index", "EXPLORER_BASE,ADDRESS_INDEX", "Per address views of the explorer data."),
+        Scenario(
+            "uniswap_v3",
+            "EXPLORER_BASE,UNISWAP_V3",
+            "Uniswap v3 pools, prices and positions.",
+            config=UNISWAP_V3_CONFIG,
+        ),
+    ]
+}
+
+
+def get_scenario(name) -> Scenario:
+    if name not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {name}, it should be one of {', '.join(SCENARIOS)}")
+    return SCENARIOS[name]
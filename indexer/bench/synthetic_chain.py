@@ -0,0 +1,495 @@
+import hashlib
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+from eth_abi import decode, encode
+
+from indexer.utils.abi_setting import (
+    ERC20_BALANCE_OF_FUNCTION,
+    ERC20_TRANSFER_EVENT,
+    ERC721_OWNER_OF_FUNCTION,
+    ERC721_TOKEN_URI_FUNCTION,
+    ERC1155_MULTIPLE_TOKEN_URI_FUNCTION,
+    ERC1155_SINGLE_TRANSFER_EVENT,
+    ERC1155_TOKEN_ID_BALANCE_OF_FUNCTION,
+    TOKEN_DECIMALS_FUNCTION,
+    TOKEN_NAME_FUNCTION,
+    TOKEN_SYMBOL_FUNCTION,
+    TOKEN_TOTAL_SUPPLY_FUNCTION,
+    TOKEN_TOTAL_SUPPLY_WITH_ID_FUNCTION,
+)
+from indexer.utils.multicall_hemera.abi import TRY_BLOCK_AND_AGGREGATE_FUNC
+from indexer.utils.multicall_hemera.constants import DEFAULT_MULTICALL_ADDRESS, NetworkConfig
+
+SYNTHETIC_CHAIN_ID = 31337
+# multicall is deployed from the genesis block of the synthetic chain
+SYNTHETIC_NETWORK = NetworkConfig(SYNTHETIC_CHAIN_ID, "Synthetic", 0)
+
+ERC20, ERC721, ERC1155 = 0, 1, 2
+STANDARD_NAMES = {ERC20: "ERC20", ERC721: "ERC721", ERC1155: "ERC1155"}
+
+ACCOUNT_PREFIX = "acc0"
+TOKEN_PREFIX = "7070"
+DAPP_PREFIX = "da00"
+CREATED_PREFIX = "c0de"
+DAPPS = 50
+GENERIC_EVENTS = 20
+
+EXECUTION_REVERTED = {"code": 3, "message": "execution reverted"}
+
+
+class Reverted(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ChainProfile:
+    blocks: int = 10000
+    transactions_per_block: int = 100
+    logs_per_transaction: float = 2.0
+    token_transfer_share: float = 0.7
+    # weights of ERC20, ERC721 and ERC1155 among token transfers
+    token_mix: Tuple[float, float, float] = (0.8, 0.15, 0.05)
+    trace_depth: int = 2
+    trace_fanout: int = 2
+    contract_creation_rate: float = 0.01
+    accounts: int = 10000
+    tokens: int = 200
+    block_time: int = 12
+    genesis_timestamp: int = 1700000000
+    seed: int = 0
+    chain_id: int = SYNTHETIC_CHAIN_ID
+
+
+def account_address(index):
+    return f"0x{ACCOUNT_PREFIX}{index:036x}"
+
+
+def token_address(standard, index):
+    return f"0x{TOKEN_PREFIX}{standard:04x}{index:032x}"
+
+
+def dapp_address(index):
+    return f"0x{DAPP_PREFIX}{index:036x}"
+
+
+def created_address(block_number, transaction_index):
+    return f"0x{CREATED_PREFIX}{block_number:026x}{transaction_index:010x}"
+
+
+def transaction_hash(block_number, transaction_index, digest):
+    # the position is readable from the hash, so receipts are found without an index
+    return f"0x{block_number:016x}{transaction_index:08x}{digest[:40]}"
+
+
+def _pad(value):
+    if isinstance(value, str):
+        return "0x" + value[2:].rjust(64, "0")
+    return "0x" + f"{value:064x}"
+
+
+def _word(value):
+    return f"{value:064x}"
+
+
+class SyntheticChain:
+    """
+    A deterministic chain generated from a profile and a seed, answering JSON-RPC requests like a node.
+    Every block is derived from the seed and its number only, so any range can be served without generating
+    the blocks before it. eth_call answers for token metadata, balances and owners are stable functions of
+    the token, the holder and the block, including calls aggregated through multicall.
+    """
+
+    def __init__(self, profile: ChainProfile = ChainProfile(), cache_blocks=1024):
+        self.profile = profile
+        self.head_block = profile.blocks - 1
+        self._block = lru_cache(maxsize=cache_blocks)(self._generate_block)
+        self._topics = {
+            ERC20: ERC20_TRANSFER_EVENT.get_signature(),
+            ERC721: ERC20_TRANSFER_EVENT.get_signature(),
+            ERC1155: ERC1155_SINGLE_TRANSFER_EVENT.get_signature(),
+        }
+        self._generic_topics = ["0x" + self._digest("event", index) for index in range(GENERIC_EVENTS)]
+        self._methods = {
+            "eth_chainId": lambda: hex(profile.chain_id),
+            "net_version": lambda: str(profile.chain_id),
+            "eth_blockNumber": lambda: hex(self.head_block),
+            "eth_getBlockByNumber": self.get_block_by_number,
+            "eth_getTransactionReceipt": self.get_transaction_receipt,
+            "debug_traceBlockByNumber": self.trace_block_by_number,
+            "trace_block": self.trace_block,
+            "eth_getBalance": self.get_balance,
+            "eth_getCode": self.get_code,
+            "eth_call": self.call,
+        }
+        self._token_functions = {
+            TOKEN_NAME_FUNCTION.get_signature(): self._name,
+            TOKEN_SYMBOL_FUNCTION.get_signature(): self._symbol,
+            TOKEN_DECIMALS_FUNCTION.get_signature(): self._decimals,
+            TOKEN_TOTAL_SUPPLY_FUNCTION.get_signature(): self._total_supply,
+            TOKEN_TOTAL_SUPPLY_WITH_ID_FUNCTION.get_signature(): self._total_supply,
+            ERC20_BALANCE_OF_FUNCTION.get_signature(): self._balance_of,
+            ERC1155_TOKEN_ID_BALANCE_OF_FUNCTION.get_signature(): self._balance_of,
+            ERC721_OWNER_OF_FUNCTION.get_signature(): self._owner_of,
+            ERC721_TOKEN_URI_FUNCTION.get_signature(): self._token_uri,
+            ERC1155_MULTIPLE_TOKEN_URI_FUNCTION.get_signature(): self._token_uri,
+        }
+
+    def __len__(self):
+        return self.profile.blocks
+
+    def get(self, method, params):
+        """
+        Answer one JSON-RPC call with {"result": ...} or {"error": ...}, the entries served by StandInRPCServer.
+        """
+        handler = self._methods.get(method)
+        if handler is None:
+            return {"error": {"code": -32601, "message": f"the method {method} does not exist"}}
+        try:
+            return {"result": handler(*(params or []))}
+        except Reverted:
+            return {"error": EXECUTION_REVERTED}
+        except (TypeError, ValueError) as e:
+            return {"error": {"code": -32602, "message": f"invalid params: {e}"}}
+
+    def _digest(self, *parts):
+        return hashlib.sha256(":".join(str(part) for part in (self.profile.seed,) + parts).encode()).hexdigest()
+
+    def _number(self, digest, bound):
+        return int(digest[:16], 16) % bound
+
+    def _block_number(self, block_id):
+        if isinstance(block_id, int):
+            return block_id
+        if block_id in ("latest", "safe", "finalized", "pending"):
+            return self.head_block
+        if block_id == "earliest":
+            return 0
+        return int(block_id, 16)
+
+    def block_hash(self, block_number):
+        return "0x" + self._digest("block", block_number)
+
+    # blocks, receipts and traces
+
+    def _generate_block(self, block_number):
+        profile = self.profile
+        rng = random.Random(self._digest("rng", block_number))
+        block_hash = self.block_hash(block_number)
+        base_fee = 10**9 + rng.randrange(10**9)
+        transactions, receipts, traces = [], [], []
+        cumulative_gas, log_index = 0, 0
+
+        for index in range(profile.transactions_per_block):
+            tx_hash = transaction_hash(block_number, index, self._digest("tx", block_number, index))
+            sender = account_address(rng.randrange(profile.accounts))
+            logs = self._generate_logs(rng, sender)
+            is_creation = rng.random() < profile.contract_creation_rate
+            if is_creation:
+                to_address, contract_address = None, created_address(block_number, index)
+            elif logs:
+                to_address, contract_address = logs[0]["address"], None
+            else:
+                to_address, contract_address = account_address(rng.randrange(profile.accounts)), None
+            value = rng.randrange(10**18) if not logs and rng.random() < 0.5 else 0
+            tx_input = "0x" if to_address and not logs else "0xa9059cbb" + rng.randbytes(64).hex()
+            gas_used = 21000 + 25000 * len(logs) + (100000 if is_creation else 0)
+            cumulative_gas += gas_used
+
+            for log in logs:
+                log.update(
+                    {
+                        "blockNumber": hex(block_number),
+                        "blockHash": block_hash,
+                        "transactionHash": tx_hash,
+                        "transactionIndex": hex(index),
+                        "logIndex": hex(log_index),
+                        "removed": False,
+                    }
+                )
+                log_index += 1
+
+            transaction = {
+                "hash": tx_hash,
+                "blockHash": block_hash,
+                "blockNumber": hex(block_number),
+                "transactionIndex": hex(index),
+                "from": sender,
+                "to": to_address,
+                "value": hex(value),
+                "input": tx_input,
+                "nonce": hex(rng.randrange(10000)),
+                "gas": hex(gas_used * 2),
+                "gasPrice": hex(base_fee + 10**8),
+                "maxFeePerGas": hex(base_fee * 2),
+                "maxPriorityFeePerGas": hex(10**8),
+                "type": "0x2",
+                "chainId": hex(profile.chain_id),
+            }
+            transactions.append(transaction)
+            receipts.append(
+                {
+                    "transactionHash": tx_hash,
+                    "transactionIndex": hex(index),
+                    "blockHash": block_hash,
+                    "blockNumber": hex(block_number),
+                    "from": sender,
+                    "to": to_address,
+                    "cumulativeGasUsed": hex(cumulative_gas),
+                    "gasUsed": hex(gas_used),
+                    "effectiveGasPrice": hex(base_fee + 10**8),
+                    "contractAddress": contract_address,
+                    "logs": logs,
+                    "logsBloom": "0x" + "00" * 256,
+                    "status": "0x1",
+                    "type": "0x2",
+                }
+            )
+            root = {
+                "type": "CREATE" if is_creation else "CALL",
+                "from": sender,
+                "to": contract_address or to_address,
+                "value": hex(value),
+                "gas": hex(gas_used * 2),
+                "gasUsed": hex(gas_used),
+                "input": tx_input,
+                "output": "0x",
+            }
+            calls = self._generate_calls(rng, contract_address or to_address, 1)
+            if calls:
+                root["calls"] = calls
+            traces.append({"txHash": tx_hash, "result": root})
+
+        block = {
+            "number": hex(block_number),
+            "hash": block_hash,
+            "parentHash": self.block_hash(block_number - 1) if block_number > 0 else "0x" + "00" * 32,
+            "nonce": "0x0000000000000000",
+            "sha3Uncles": "0x" + self._digest("uncles", block_number),
+            "logsBloom": "0x" + "00" * 256,
+            "transactionsRoot": "0x" + self._digest("transactions", block_number),
+            "stateRoot": "0x" + self._digest("state", block_number),
+            "receiptsRoot": "0x" + self._digest("receipts", block_number),
+            "miner": account_address(block_number % profile.accounts),
+            "difficulty": "0x0",
+            "totalDifficulty": "0x0",
+            "extraData": "0x",
+            "size": hex(1000 + 200 * len(transactions)),
+            "gasLimit": hex(max(30000000, cumulative_gas)),
+            "gasUsed": hex(cumulative_gas),
+            "timestamp": hex(profile.genesis_timestamp + block_number * profile.block_time),
+            "baseFeePerGas": hex(base_fee),
+            "transactions": transactions,
+            "uncles": [],
+            "withdrawals": [],
+            "withdrawalsRoot": "0x" + self._digest("withdrawals", block_number),
+        }
+        return block, receipts, traces
+
+    def _generate_logs(self, rng, sender):
+        profile = self.profile
+        count = int(profile.logs_per_transaction)
+        if rng.random() < profile.logs_per_transaction - count:
+            count += 1
+
+        logs = []
+        for _ in range(count):
+            if rng.random() >= profile.token_transfer_share:
+                logs.append(
+                    {
+                        "address": dapp_address(rng.randrange(DAPPS)),
+                        "topics": [self._generic_topics[rng.randrange(GENERIC_EVENTS)], _pad(sender)],
+                        "data": "0x" + _word(rng.randrange(2**64)),
+                    }
+                )
+                continue
+
+            standard = rng.choices((ERC20, ERC721, ERC1155), weights=profile.token_mix)[0]
+            token = token_address(standard, rng.randrange(profile.tokens))
+            from_address = account_address(rng.randrange(profile.accounts))
+            to_address = account_address(rng.randrange(profile.accounts))
+            topics = [self._topics[standard]]
+            if standard == ERC20:
+                topics += [_pad(from_address), _pad(to_address)]
+                data = "0x" + _word(rng.randrange(10**24))
+            elif standard == ERC721:
+                topics += [_pad(from_address), _pad(to_address), _pad(rng.randrange(10000))]
+                data = "0x"
+            else:
+                topics += [_pad(sender), _pad(from_address), _pad(to_address)]
+                data = "0x" + _word(rng.randrange(100)) + _word(rng.randrange(1, 1000))
+            logs.append({"address": token, "topics": topics, "data": data})
+        return logs
+
+    def _generate_calls(self, rng, caller, depth):
+        profile = self.profile
+        if depth > profile.trace_depth:
+            return []
+        calls = []
+        for _ in range(rng.randint(0, profile.trace_fanout)):
+            call_type = rng.choice(("CALL", "STATICCALL", "DELEGATECALL"))
+            value = rng.randrange(10**17) if call_type == "CALL" and rng.random() < 0.3 else 0
+            to_address = dapp_address(rng.randrange(DAPPS)) if rng.random() < 0.7 else account_address(0)
+            call = {
+                "type": call_type,
+                "from": caller,
+                "to": to_address,
+                "value": hex(value),
+                "gas": hex(50000),
+                "gasUsed": hex(rng.randrange(1000, 50000)),
+                "input": "0x" + rng.randbytes(36).hex(),
+                "output": "0x" + _word(1),
+            }
+            children = self._generate_calls(rng, to_address, depth + 1)
+            if children:
+                call["calls"] = children
+            calls.append(call)
+        return calls
+
+    def get_block_by_number(self, block_id, full_transactions=False):
+        block_number = self._block_number(block_id)
+        if block_number < 0 or block_number > self.head_block:
+            return None
+        block, _, _ = self._block(block_number)
+        if full_transactions:
+            return block
+        return {**block, "transactions": [transaction["hash"] for transaction in block["transactions"]]}
+
+    def get_transaction_receipt(self, tx_hash):
+        block_number, index = int(tx_hash[2:18], 16), int(tx_hash[18:26], 16)
+        if block_number > self.head_block or index >= self.profile.transactions_per_block:
+            return None
+        _, receipts, _ = self._block(block_number)
+        receipt = receipts[index]
+        return receipt if receipt["transactionHash"] == tx_hash else None
+
+    def trace_block_by_number(self, block_id, options=None):
+        block_number = self._block_number(block_id)
+        if block_number > self.head_block:
+            raise ValueError(f"block {block_number} not found")
+        traces = self._block(block_number)[2]
+        tracer = (options or {}).get("tracer", "callTracer")
+        if tracer == "flatCallTracer":
+            return [
+                {"txHash": trace["txHash"], "result": list(self._flat_frames(block_number, index, trace))}
+                for index, trace in enumerate(traces)
+            ]
+        if tracer != "callTracer":
+            raise ValueError(f"tracer {tracer} not found")
+        return traces
+
+    def trace_block(self, block_id):
+        block_number = self._block_number(block_id)
+        if block_number > self.head_block:
+            raise ValueError(f"block {block_number} not found")
+        block, _, traces = self._block(block_number)
+        frames = [
+            frame for index, trace in enumerate(traces) for frame in self._flat_frames(block_number, index, trace)
+        ]
+        frames.append(
+            {
+                "action": {"author": block["miner"], "rewardType": "block", "value": hex(2 * 10**18)},
+                "blockHash": block["hash"],
+                "blockNumber": block_number,
+                "result": None,
+                "subtraces": 0,
+                "traceAddress": [],
+                "type": "reward",
+            }
+        )
+        return frames
+
+    def _flat_frames(self, block_number, transaction_index, trace):
+        # the parity format of trace_block and the flatCallTracer, depth first like the nested frames
+        stack = [(trace["result"], [])]
+        while stack:
+            frame, trace_address = stack.pop()
+            calls = frame.get("calls", [])
+            frame_type = frame["type"].lower()
+            if frame_type in ("create", "create2"):
+                action = {"creationMethod": frame_type, "from": frame["from"], "init": frame["input"]}
+                result = {"address": frame["to"], "code": frame["output"], "gasUsed": frame["gasUsed"]}
+                frame_type = "create"
+            else:
+                action = {"callType": frame_type, "from": frame["from"], "to": frame["to"], "input": frame["input"]}
+                result = {"gasUsed": frame["gasUsed"], "output": frame["output"]}
+                frame_type = "call"
+            action.update(gas=frame["gas"], value=frame["value"])
+            yield {
+                "action": action,
+                "blockHash": self.block_hash(block_number),
+                "blockNumber": block_number,
+                "result": result,
+                "subtraces": len(calls),
+                "traceAddress": trace_address,
+                "transactionHash": trace["txHash"],
+                "transactionPosition": transaction_index,
+                "type": frame_type,
+            }
+            for index in range(len(calls) - 1, -1, -1):
+                stack.append((calls[index], trace_address + [index]))
+
+    # state
+
+    def get_balance(self, address, block_id="latest"):
+        return hex(self._number(self._digest("balance", address.lower(), self._block_number(block_id)), 10**21))
+
+    def get_code(self, address, block_id="latest"):
+        return "0x" if address.lower()[2:].startswith(ACCOUNT_PREFIX) else "0x6080604052"
+
+    def call(self, transaction, block_id="latest"):
+        block_number = self._block_number(block_id)
+        data = bytes.fromhex(transaction.get("data", transaction.get("input", "0x"))[2:])
+        return "0x" + self._call(transaction["to"].lower(), data, block_number).hex()
+
+    def _call(self, to_address, data, block_number):
+        selector = "0x" + data[:4].hex()
+        if to_address == DEFAULT_MULTICALL_ADDRESS.lower() and selector == TRY_BLOCK_AND_AGGREGATE_FUNC.get_signature():
+            _, calls = decode(TRY_BLOCK_AND_AGGREGATE_FUNC.get_inputs_type(), data[4:])
+            results = []
+            for target, call_data in calls:
+                try:
+                    results.append((True, self._call(target.lower(), call_data, block_number)))
+                except Reverted:
+                    results.append((False, b""))
+            return encode(
+                TRY_BLOCK_AND_AGGREGATE_FUNC.get_outputs_type(),
+                [block_number, bytes.fromhex(self.block_hash(block_number)[2:]), results],
+            )
+
+        if not to_address[2:].startswith(TOKEN_PREFIX) or selector not in self._token_functions:
+            raise Reverted()
+        standard, index = int(to_address[6:10], 16), int(to_address[10:], 16)
+        return self._token_functions[selector](standard, index, data[4:], block_number)
+
+    def _name(self, standard, index, arguments, block_number):
+        return encode(["string"], [f"Synthetic {STANDARD_NAMES[standard]} {index}"])
+
+    def _symbol(self, standard, index, arguments, block_number):
+        return encode(["string"], [f"S{STANDARD_NAMES[standard]}{index}"])
+
+    def _decimals(self, standard, index, arguments, block_number):
+        if standard != ERC20:
+            raise Reverted()
+        return encode(["uint8"], [18])
+
+    def _total_supply(self, standard, index, arguments, block_number):
+        return encode(["uint256"], [self._number(self._digest("supply", standard, index, arguments.hex()), 10**30)])
+
+    def _balance_of(self, standard, index, arguments, block_number):
+        digest = self._digest("token_balance", standard, index, arguments.hex(), block_number)
+        return encode(["uint256"], [self._number(digest, 10**24 if standard == ERC20 else 100)])
+
+    def _owner_of(self, standard, index, arguments, block_number):
+        if standard != ERC721:
+            raise Reverted()
+        owner = self._number(self._digest("owner", index, arguments.hex(), block_number), self.profile.accounts)
+        return encode(["address"], [account_address(owner)])
+
+    def _token_uri(self, standard, index, arguments, block_number):
+        if standard == ERC20:
+            raise Reverted()
+        (token_id,) = decode(["uint256"], arguments)
+        return encode(["string"], [f"https://synthetic.invalid/{STANDARD_NAMES[standard]}/{index}/{token_id}"])
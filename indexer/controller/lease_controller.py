@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+import time
+
+from common.utils.exception_control import HemeraBaseException
+from common.utils.file_utils import delete_file, write_to_file
+from indexer.controller.base_controller import BaseController
+from indexer.utils.lease_queue import AdaptiveChunker, PGLeaseQueue
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseController(BaseController):
+    """
+    Backfill a bounded block range together with any number of workers on other hosts.
+    Each worker keeps claiming leases from the shared queue until every range of the mission is completed.
+    """
+
+    def __init__(
+        self,
+        job_scheduler,
+        lease_queue: PGLeaseQueue,
+        chunker: AdaptiveChunker,
+        max_retries=5,
+    ):
+        self.job_scheduler = job_scheduler
+        self.lease_queue = lease_queue
+        self.chunker = chunker
+        self.max_retries = max_retries
+
+    def action(
+        self,
+        start_block=None,
+        end_block=None,
+        block_batch_size=10,
+        period_seconds=10,
+        plan_chunk_size=100000,
+        pid_file=None,
+    ):
+        if start_block is None or end_block is None:
+            raise ValueError("Lease queue mode must provide both start_block and end_block.")
+
+        try:
+            if pid_file is not None:
+                logger.info("Creating pid file {}".format(pid_file))
+                write_to_file(pid_file, str(os.getpid()))
+
+            self.lease_queue.plan(start_block, end_block, plan_chunk_size)
+
+            while True:
+                lease = self.lease_queue.claim(self.chunker.size)
+                if lease is None:
+                    outstanding = self.lease_queue.outstanding()
+                    if outstanding == 0:
+                        logger.info(f"Every lease of queue {self.lease_queue.key} is completed.")
+                        break
+                    logger.info(
+                        "No lease available, {} leases held by other workers. Sleeping for {} seconds...".format(
+                            outstanding, period_seconds
+                        )
+                    )
+                    time.sleep(period_seconds)
+                    continue
+
+                self._run_lease(lease[0], lease[1], block_batch_size)
+        finally:
+            if pid_file is not None:
+                logger.info("Deleting pid file {}".format(pid_file))
+                delete_file(pid_file)
+
+    def _run_lease(self, start_block, end_block, block_batch_size):
+        logger.info(f"Leased blocks {start_block} to {end_block} as {self.lease_queue.worker}")
+        lost = threading.Event()
+        stopped = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(start_block, lost, stopped), daemon=True)
+        heartbeat.start()
+
+        start_time = time.time()
+        try:
+            for batch_start in range(start_block, end_block + 1, block_batch_size):
+                if lost.is_set():
+                    logger.warning(f"Lease of blocks {start_block} to {end_block} was lost, giving it up.")
+                    return
+                self._do_stream(batch_start, min(batch_start + block_batch_size - 1, end_block))
+        except Exception:
+            self.lease_queue.release(start_block)
+            raise
+        finally:
+            stopped.set()
+            heartbeat.join()
+
+        if not self.lease_queue.complete(start_block):
+            logger.warning(f"Lease of blocks {start_block} to {end_block} expired before it was completed.")
+            return
+        next_size = self.chunker.update(end_block - start_block + 1, time.time() - start_time)
+        logger.info(f"Completed blocks {start_block} to {end_block}, next lease size {next_size}")
+
+    def _heartbeat(self, start_block, lost: threading.Event, stopped: threading.Event):
+        interval = max(self.lease_queue.lease_seconds / 3, 1)
+        while not stopped.wait(interval):
+            try:
+                if not self.lease_queue.heartbeat(start_block):
+                    lost.set()
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat of lease {start_block} failed: {e}")
+
+    def _do_stream(self, start_block, end_block):
+        for retry in range(self.max_retries + 1):
+            try:
+                self.job_scheduler.run_jobs(start_block, end_block)
+                return
+
+            except HemeraBaseException as e:
+                logger.error(f"An expected exception occurred while syncing block data. error: {e}")
+                if e.crashable or not e.retriable or retry == self.max_retries:
+                    raise e
+                logger.info(f"No: {retry} retry is about to start.")
@@ -2,15 +2,17 @@ import logging
 import time
 from datetime import datetime, timezone
 
-from sqlalchemy import and_, update
+from sqlalchemy import and_, select, update
 from sqlalchemy.dialects.postgresql import insert
 
 from common.models.blocks import Blocks
 from common.models.fix_record import FixRecord
 from common.utils.exception_control import HemeraBaseException
-from common.utils.format_utils import hex_str_to_bytes
+from common.utils.format_utils import bytes_to_hex_str, hex_str_to_bytes
 from common.utils.web3_utils import build_web3
 from indexer.controller.base_controller import BaseController
+from indexer.jobs.export_blocks_job import blocks_rpc_requests
+from indexer.utils.collection_utils import chunk_list
 from indexer.utils.exception_recorder import ExceptionRecorder
 
 exception_recorder = ExceptionRecorder()
@@ -18,12 +20,15 @@ exception_recorder = ExceptionRecorder()
 
 class ReorgController(BaseController):
 
-    def __init__(self, batch_web3_provider, job_scheduler, ranges, config, max_retries=5):
+    def __init__(self, batch_web3_provider, job_scheduler, ranges, config, max_retries=5, reorg_mode="block"):
         self.ranges = ranges
         self.web3 = build_web3(batch_web3_provider)
         self.db_service = config.get("db_service")
         self.job_scheduler = job_scheduler
         self.max_retries = max_retries
+        if reorg_mode not in ("block", "range"):
+            raise ValueError(f"Unknown reorg mode: {reorg_mode}, it should be block or range")
+        self.reorg_mode = reorg_mode
 
     def action(self, job_id=None, block_number=None, remains=None, retry_errors=True):
         if block_number is None:
@@ -47,6 +52,10 @@ class ReorgController(BaseController):
 
         self.update_job_info(job_id, {"job_status": "running"})
 
+        if self.reorg_mode == "range":
+            self._range_fixing(job_id, block_number, remains, retry_errors)
+            return
+
         offset, limit = 0, remains
         try:
             while offset < limit:
@@ -92,15 +101,100 @@ class ReorgController(BaseController):
 
         logging.info(f"Reorging mission start from block No.{block_number} and ranges {remains} has been completed.")
 
-    def _do_fixing(self, fix_block, retry_errors=True):
+    def _range_fixing(self, job_id, block_number, remains, retry_errors=True):
+        start_block = max(block_number - remains + 1, 0)
+        try:
+            fork_block, top_block = self.find_fork_range(start_block, block_number)
+            if fork_block is None:
+                logging.info(f"Blocks No.{start_block} to No.{block_number} are verified to be correct or not synced.")
+            else:
+                logging.info(f"Fork point found at block No.{fork_block}, reorging blocks up to No.{top_block}")
+                self._do_fixing(fork_block, retry_errors, end_block=top_block)
+        except (Exception, KeyboardInterrupt, HemeraBaseException) as e:
+            # the window is re-verified from its top when the job is woken up again
+            self.update_job_info(
+                job_id,
+                job_info={
+                    "last_fixed_block_number": block_number + 1,
+                    "remain_process": remains,
+                    "update_time": datetime.now(timezone.utc),
+                    "job_status": "interrupt",
+                },
+            )
+            logging.error(f"Reorging mission catch exception: {e}")
+            raise e
+
+        self.update_job_info(
+            job_id,
+            job_info={
+                "last_fixed_block_number": start_block,
+                "remain_process": 0,
+                "update_time": datetime.now(timezone.utc),
+                "job_status": "completed",
+            },
+        )
+        logging.info(f"Reorging mission start from block No.{block_number} and ranges {remains} has been completed.")
+
+    def find_fork_range(self, start_block, end_block):
+        """
+        Compare stored block hashes with canonical headers over [start_block, end_block] and return the
+        range that must be re-indexed, from the fork point to the highest synced block, or (None, None).
+        """
+        stored_hashes = self.get_stored_block_hashes(start_block, end_block)
+        if not stored_hashes:
+            return None, None
+
+        synced_numbers = sorted(stored_hashes.keys())
+        canonical_hashes = self.get_canonical_block_hashes(synced_numbers)
+
+        # every block commits to its parent hash, so the fork point is the first stored block that is not
+        # canonical. All hashes are fetched already, and a partially fixed window may hold stale blocks
+        # between canonical ones, so the whole window is scanned once.
+        for number in synced_numbers:
+            if canonical_hashes.get(number) not in stored_hashes[number]:
+                return number, synced_numbers[-1]
+        return None, None
+
+    def get_stored_block_hashes(self, start_block, end_block):
+        session = self.db_service.get_service_session()
+        try:
+            rows = session.execute(
+                select(Blocks.number, Blocks.hash, Blocks.reorg).where(Blocks.number.between(start_block, end_block))
+            ).all()
+        finally:
+            session.close()
+
+        stored_hashes = {}
+        for number, block_hash, reorg in rows:
+            valid_hashes = stored_hashes.setdefault(number, set())
+            if not reorg:
+                valid_hashes.add(bytes_to_hex_str(block_hash))
+        return stored_hashes
+
+    def get_canonical_block_hashes(self, block_numbers):
+        make_request = self.job_scheduler.batch_web3_provider.make_request
+        batch_size = max(self.job_scheduler.batch_size, 1)
+
+        canonical_hashes = {}
+        for block_number_batch in chunk_list(block_numbers, batch_size):
+            for block in blocks_rpc_requests(make_request, block_number_batch, batch_size > 1, False):
+                canonical_hashes[int(block["number"], 16)] = block["hash"]
+        return canonical_hashes
+
+    def fix_range(self, start_block, end_block, retry_errors=True):
+        logging.info(f"Reorging blocks No.{start_block} to No.{end_block} in process.")
+        self._do_fixing(start_block, retry_errors, end_block=end_block)
+
+    def _do_fixing(self, fix_block, retry_errors=True, end_block=None):
+        end_block = fix_block if end_block is None else end_block
         tries, tries_reset = 0, True
         while True:
             try:
                 # Main reorging logic
                 tries_reset = True
-                self.job_scheduler.run_jobs(fix_block, fix_block)
+                self.job_scheduler.run_jobs(fix_block, end_block)
 
-                logging.info(f"Block No.{fix_block} and relative entities completely fixed .")
+                logging.info(f"Block No.{fix_block} to No.{end_block} and relative entities completely fixed .")
                 break
 
             except HemeraBaseException as e:
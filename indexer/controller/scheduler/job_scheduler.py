@@ -7,7 +7,6 @@ from redis.client import Redis
 
 from common.models.tokens import Tokens
 from common.utils.format_utils import bytes_to_hex_str
-from common.utils.module_loading import import_submodules
 from indexer.exporters.console_item_exporter import ConsoleItemExporter
 from indexer.jobs import CSVSourceJob
 from indexer.jobs.base_job import (
@@ -19,9 +18,11 @@ from indexer.jobs.base_job import (
 )
 from indexer.jobs.check_block_consensus_job import CheckBlockConsensusJob
 from indexer.jobs.export_blocks_job import ExportBlocksJob
+from indexer.jobs.job_modules import import_job_modules
 from indexer.jobs.source_job.pg_source_job import PGSourceJob
-
-import_submodules("indexer.modules")
+from indexer.utils.metrics import BUFFER_ITEMS, record_process_memory
+from indexer.utils.profiling import profile_batch
+from indexer.utils.tracing import span
 
 
 def get_tokens_from_db(service):
@@ -43,7 +44,7 @@ def get_tokens_from_db(service):
 
 
 def get_source_job_type(source_path: str):
-    if source_path.startswith("csvfile://"):
+    if source_path.startswith("csvfile://") or source_path.startswith("parquetfile://"):
         return CSVSourceJob
     elif source_path.startswith("postgresql://"):
         return PGSourceJob
@@ -88,6 +89,7 @@ class JobScheduler:
         self.dependency_map = defaultdict(list)
         self.pg_service = config.get("db_service") if "db_service" in config else None
 
+        import_job_modules(required_output_types)
         self.discover_and_register_job_classes()
         self.required_job_classes, self.is_pipeline_filter = self.get_required_job_classes(required_output_types)
 
@@ -95,6 +97,9 @@ class JobScheduler:
             self.is_pipeline_filter = True
 
         self.resolved_job_classes = self.resolve_dependencies(self.required_job_classes)
+        self.required_dependency_types = list(
+            {dependency for job_class in self.resolved_job_classes for dependency in job_class.dependency_types}
+        )
         token_dict_from_db = defaultdict()
         if self.pg_service is not None:
             token_dict_from_db = get_tokens_from_db(self.pg_service)
@@ -197,6 +202,7 @@ class JobScheduler:
                 continue
             job = job_class(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -214,6 +220,7 @@ class JobScheduler:
         if ExportBlocksJob in self.resolved_job_classes:
             export_blocks_job = ExportBlocksJob(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -229,6 +236,7 @@ class JobScheduler:
         else:
             pg_source_job = PGSourceJob(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -245,6 +253,7 @@ class JobScheduler:
         if self.auto_reorg:
             check_job = CheckBlockConsensusJob(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -260,13 +269,20 @@ class JobScheduler:
     def run_jobs(self, start_block, end_block):
         self.clear_data_buff()
         try:
-            for job in self.jobs:
-                job.run(start_block=start_block, end_block=end_block)
+            with profile_batch(start_block, end_block, BaseJob._data_buff), span(
+                "run_jobs", start_block=start_block, end_block=end_block
+            ):
+                for job in self.jobs:
+                    job.run(start_block=start_block, end_block=end_block)
 
             for output_type in self.required_output_types:
                 message = f"{output_type.type()} : {len(self.get_data_buff().get(output_type.type())) if self.get_data_buff().get(output_type.type()) else 0}"
                 self.logger.info(f"{message}")
 
+            for key, items in self.get_data_buff().items():
+                BUFFER_ITEMS.set(len(items), type=key)
+            record_process_memory()
+
         except Exception as e:
             raise e
         finally:
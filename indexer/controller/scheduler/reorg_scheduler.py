@@ -7,13 +7,14 @@ from redis.client import Redis
 
 from common.models.tokens import Tokens
 from common.utils.format_utils import bytes_to_hex_str
-from common.utils.module_loading import import_submodules
 from indexer.jobs import FilterTransactionDataJob
 from indexer.jobs.base_job import BaseExportJob, BaseJob, ExtensionJob
 from indexer.jobs.export_blocks_job import ExportBlocksJob
 from indexer.jobs.export_reorg_job import ExportReorgJob
-
-import_submodules("indexer.modules")
+from indexer.jobs.job_modules import import_job_modules
+from indexer.utils.profiling import profile_batch
+from indexer.utils.reorg import reset_reorged_tables_cache
+from indexer.utils.tracing import span
 
 
 def get_tokens_from_db(service):
@@ -63,9 +64,13 @@ class ReorgScheduler:
         self.pg_service = config.get("db_service") if "db_service" in config else None
         self._is_multicall = multicall
 
+        import_job_modules()
         self.discover_and_register_job_classes()
         self.required_job_classes = self.get_required_job_classes(required_output_types)
         self.resolved_job_classes = self.resolve_dependencies(self.required_job_classes)
+        self.required_dependency_types = list(
+            {dependency for job_class in self.resolved_job_classes for dependency in job_class.dependency_types}
+        )
         token_dict_from_db = defaultdict()
         if self.pg_service is not None:
             token_dict_from_db = get_tokens_from_db(self.pg_service)
@@ -112,6 +117,7 @@ class ReorgScheduler:
                 continue
             job = job_class(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -130,6 +136,7 @@ class ReorgScheduler:
         if ExportBlocksJob in self.resolved_job_classes:
             export_blocks_job = ExportBlocksJob(
                 required_output_types=self.required_output_types,
+                required_dependency_types=self.required_dependency_types,
                 batch_web3_provider=self.batch_web3_provider,
                 batch_web3_debug_provider=self.batch_web3_debug_provider,
                 item_exporters=self.item_exporters,
@@ -146,6 +153,7 @@ class ReorgScheduler:
 
         export_reorg_job = ExportReorgJob(
             required_output_types=self.required_output_types,
+            required_dependency_types=self.required_dependency_types,
             batch_web3_provider=self.batch_web3_provider,
             batch_web3_debug_provider=self.batch_web3_debug_provider,
             item_exporters=self.item_exporters,
@@ -159,8 +167,12 @@ class ReorgScheduler:
 
     def run_jobs(self, start_block, end_block):
         self.clear_data_buff()
-        for job in self.jobs:
-            job.run(start_block=start_block, end_block=end_block)
+        reset_reorged_tables_cache(self.jobs)
+        with profile_batch(start_block, end_block, BaseJob._data_buff), span(
+            "reorg_run_jobs", start_block=start_block, end_block=end_block
+        ):
+            for job in self.jobs:
+                job.run(start_block=start_block, end_block=end_block)
 
     def get_required_job_classes(self, output_types):
         required_job_classes = set()
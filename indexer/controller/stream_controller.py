@@ -1,15 +1,25 @@
 import logging
 import os
+import socket
 import time
 
 import mpire
 
 from common.utils.exception_control import FastShutdownError, HemeraBaseException
 from common.utils.file_utils import delete_file, write_to_file
+from common.utils.format_utils import bytes_to_hex_str
 from common.utils.web3_utils import build_web3
 from indexer.controller.base_controller import BaseController
+from indexer.controller.reorg_controller import ReorgController
 from indexer.controller.scheduler.job_scheduler import JobScheduler
+from indexer.domain.block import Block
+from indexer.exporters.spool_item_exporter import SpoolItemExporter
+from indexer.exporters.staging_item_exporter import StagingItemExporter
 from indexer.utils.limit_reader import LimitReader
+from indexer.utils.metrics import CHAIN_HEAD_LAG, LAST_SYNCED_BLOCK
+from indexer.utils.range_ledger import RANGE_COMPLETED, RANGE_FAILED, RANGE_RUNNING, BaseRangeLedger
+from indexer.utils.range_planner import BlockRangePlanner
+from indexer.utils.recent_headers import RecentHeaders
 from indexer.utils.sync_recorder import BaseRecorder
 
 logger = logging.getLogger(__name__)
@@ -29,6 +39,13 @@ class StreamController(BaseController):
         process_numbers=1,
         process_size=None,
         process_time_out=None,
+        recent_headers: RecentHeaders = None,
+        reorg_controller: ReorgController = None,
+        finality_tag="latest",
+        staging: StagingItemExporter = None,
+        spool: SpoolItemExporter = None,
+        range_ledger: BaseRangeLedger = None,
+        range_planner: BlockRangePlanner = None,
     ):
         self.entity_types = 1
         self.web3 = build_web3(batch_web3_provider)
@@ -42,6 +59,24 @@ class StreamController(BaseController):
         self.process_numbers = process_numbers
         self.process_size = process_size
         self.process_time_out = process_time_out
+        self.recent_headers = recent_headers
+        self.reorg_controller = reorg_controller
+        if self.recent_headers is not None and (self.reorg_controller is None or self.process_numbers > 1):
+            raise FastShutdownError("In-process reorg detection requires a reorg controller and a single process.")
+        self.finality_tag = finality_tag
+        self.staging = staging
+        if self.staging is not None and (self.finality_tag == "latest" or self.process_numbers > 1):
+            raise FastShutdownError("Staging unfinalized blocks requires a finality tag and a single process.")
+        self.spool = spool
+        if self.spool is not None:
+            if self.staging is not None or self.process_numbers > 1:
+                raise FastShutdownError("Spooling exports requires a single process and no staging.")
+            # the sync record follows the drain, the spool keeps the blocks streamed beyond it
+            self.spool.on_drained = self._on_spool_drained
+        self.range_ledger = range_ledger
+        self.range_planner = range_planner
+        # completed ranges are only skipped when resuming from the sync record
+        self._resume_from_ledger = False
         if self.process_numbers <= 1:
             self.pool = None
         else:
@@ -70,6 +105,38 @@ class StreamController(BaseController):
                     or (end_block is not None and last_synced_block > end_block)
                 ):
                     last_synced_block = start_block - 1
+                else:
+                    self._resume_from_ledger = True
+            else:
+                self._resume_from_ledger = True
+
+            if self.range_ledger is not None and self._resume_from_ledger:
+                high_water_mark = self.range_ledger.high_water_mark(last_synced_block, end_block)
+                if high_water_mark > last_synced_block:
+                    logger.info(f"Range ledger has blocks up to {high_water_mark} completed, resuming from there.")
+                    last_synced_block = high_water_mark
+
+            first_missing_block = self.spool.first_missing_block if self.spool is not None else None
+            if first_missing_block is not None and first_missing_block <= last_synced_block:
+                if not self._resume_from_ledger:
+                    raise FastShutdownError(
+                        f"Spooled blocks from {first_missing_block} are missing, stream them again "
+                        f"or remove the .corrupt files from the spool."
+                    )
+                logger.warning(f"Spooled blocks from {first_missing_block} are missing, streaming them again.")
+                last_synced_block = first_missing_block - 1
+            elif self.spool is not None and self._resume_from_ledger:
+                last_spooled_block = self.spool.last_spooled_block
+                if last_spooled_block is not None and last_spooled_block > last_synced_block:
+                    logger.info(f"Spool has blocks up to {last_spooled_block} streamed, resuming from there.")
+                    last_synced_block = last_spooled_block
+            if self.spool is not None:
+                self.spool.start()
+
+            if self.recent_headers is not None:
+                self.recent_headers.load()
+                self.recent_headers.truncate(last_synced_block)
+            last_staged_block = last_synced_block
 
             while True and (end_block is None or last_synced_block < end_block):
                 synced_blocks = 0
@@ -81,9 +148,22 @@ class StreamController(BaseController):
                         "If you're using PGLimitReader, please confirm blocks table has one record at least."
                     )
 
+                if self.staging is not None:
+                    last_staged_block, last_synced_block, progressed = self._stage_and_promote(
+                        current_block, last_staged_block, last_synced_block, end_block, block_batch_size
+                    )
+                    LAST_SYNCED_BLOCK.set(last_synced_block)
+                    CHAIN_HEAD_LAG.set(max(current_block - last_synced_block, 0))
+                    if not progressed:
+                        logger.info("Nothing to stage or promote. Sleeping for {} seconds...".format(period_seconds))
+                        time.sleep(period_seconds)
+                    continue
+
                 target_block = self._calculate_target_block(
                     current_block, last_synced_block, end_block, block_batch_size
                 )
+                if self.finality_tag != "latest":
+                    target_block = min(target_block, self._get_finalized_block_number())
                 synced_blocks = max(target_block - last_synced_block, 0)
 
                 logger.info(
@@ -93,20 +173,47 @@ class StreamController(BaseController):
                 )
 
                 if synced_blocks != 0:
+                    stream_func = self._do_stream if self.range_ledger is None else self._do_stream_segment
+                    if self.spool is not None:
+                        stream_func = self._spool_stream_func(stream_func)
                     if not self.pool:
-                        self._do_stream(last_synced_block + 1, target_block)
+                        stream_func(last_synced_block + 1, target_block)
+                        if self.recent_headers is not None:
+                            self._check_consensus(target_block)
                     else:
-                        splits = self.split_blocks(last_synced_block + 1, target_block, self.process_size)
-                        self.pool.map(func=self._do_stream, iterable_of_args=splits, task_timeout=self.process_time_out)
-                    logger.info("Writing last synced block {}".format(target_block))
-                    self.sync_recorder.set_last_synced_block(target_block)
+                        self._do_stream_in_pool(stream_func, last_synced_block, target_block)
+
+                    if self.range_ledger is not None:
+                        target_block = self.range_ledger.high_water_mark(last_synced_block, target_block)
+                        if target_block == last_synced_block:
+                            logger.warning(
+                                "No range completed after block {}, retrying in {} seconds...".format(
+                                    last_synced_block, period_seconds
+                                )
+                            )
+                            time.sleep(period_seconds)
+                            continue
+                    if self.spool is None:
+                        logger.info("Writing last synced block {}".format(target_block))
+                        self.sync_recorder.set_last_synced_block(target_block)
                     last_synced_block = target_block
 
+                LAST_SYNCED_BLOCK.set(last_synced_block)
+                CHAIN_HEAD_LAG.set(max(current_block - last_synced_block, 0))
+
                 if synced_blocks <= 0:
                     logger.info("Nothing to sync. Sleeping for {} seconds...".format(period_seconds))
                     time.sleep(period_seconds)
 
+            if self.spool is not None:
+                logger.info(f"Waiting for {self.spool.spooled_batches} spooled batches to drain")
+                self.spool.flush()
+
         finally:
+            if self.spool is not None:
+                self.spool.stop()
+            if self.recent_headers is not None:
+                self.recent_headers.save()
             if pid_file is not None:
                 logger.info("Deleting pid file {}".format(pid_file))
                 delete_file(pid_file)
@@ -114,19 +221,73 @@ class StreamController(BaseController):
     def _shutdown(self):
         pass
 
+    def _spool_stream_func(self, stream_func):
+        def spool_stream(start_block, end_block):
+            self.spool.begin_batch(start_block, end_block)
+            try:
+                completed = stream_func(start_block, end_block)
+            except Exception:
+                self.spool.discard_batch()
+                raise
+            if not completed:
+                self.spool.discard_batch()
+                raise FastShutdownError(
+                    f"Blocks {start_block} to {end_block} failed after all retries and were not spooled."
+                )
+            self.spool.end_batch()
+            return completed
+
+        return spool_stream
+
+    def _on_spool_drained(self, end_block):
+        logger.info("Writing last synced block {}".format(end_block))
+        self.sync_recorder.set_last_synced_block(end_block)
+
     def split_blocks(self, start_block, end_block, step):
         blocks = []
         for i in range(start_block, end_block + 1, step):
             blocks.append((i, min(i + step - 1, end_block)))
         return blocks
 
+    def _do_stream_in_pool(self, stream_func, last_synced_block, target_block):
+        gaps = [(last_synced_block + 1, target_block)]
+        if self.range_ledger is not None and self._resume_from_ledger:
+            gaps = self.range_ledger.find_gaps(last_synced_block + 1, target_block)
+        splits = [
+            split for gap_start, gap_end in gaps for split in self.split_blocks(gap_start, gap_end, self.process_size)
+        ]
+
+        try:
+            self.pool.map(func=stream_func, iterable_of_args=splits, task_timeout=self.process_time_out)
+        except Exception:
+            if self.range_ledger is not None:
+                # keep the segments finished by the other workers, only the gaps are redone on restart
+                high_water_mark = self.range_ledger.high_water_mark(last_synced_block, target_block)
+                if high_water_mark > last_synced_block:
+                    logger.info("Writing last synced block {}".format(high_water_mark))
+                    self.sync_recorder.set_last_synced_block(high_water_mark)
+            raise
+
+    def _do_stream_segment(self, start_block, end_block):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        start_time = time.time()
+        self.range_ledger.record(start_block, end_block, RANGE_RUNNING, worker, start_time)
+        try:
+            completed = self._do_stream(start_block, end_block)
+        except Exception:
+            self.range_ledger.record(start_block, end_block, RANGE_FAILED, worker, start_time, time.time())
+            raise
+        status = RANGE_COMPLETED if completed else RANGE_FAILED
+        self.range_ledger.record(start_block, end_block, status, worker, start_time, time.time())
+        return completed
+
     def _do_stream(self, start_block, end_block):
 
         for retry in range(self.max_retries + 1):
             try:
                 # ETL program's main logic
                 self.job_scheduler.run_jobs(start_block, end_block)
-                return
+                return True
 
             except HemeraBaseException as e:
                 logger.error(f"An expected exception occurred while syncing block data. error: {e}")
@@ -152,10 +313,86 @@ class StreamController(BaseController):
             f"can't be automatically resumed after reached out limit of retries. Program will exit."
         )
 
+    def _check_consensus(self, end_block):
+        blocks = self.job_scheduler.get_data_buff().get(Block.type(), [])
+        mismatch = self.recent_headers.extend(blocks)
+        if mismatch is None:
+            return
+
+        logger.warning(f"Reorg detected at block {mismatch}, pausing the stream to repair.")
+        block_numbers = [block_number for block_number in self.recent_headers.numbers() if block_number <= end_block]
+        canonical_hashes = self.reorg_controller.get_canonical_block_hashes(block_numbers)
+        stale_blocks = [
+            block_number
+            for block_number in block_numbers
+            if canonical_hashes.get(block_number) != self.recent_headers.get(block_number)
+        ]
+        if not stale_blocks:
+            logger.info("Recent headers match the canonical chain again, nothing to repair.")
+            return
+
+        fork_block = stale_blocks[0]
+        if fork_block == self.recent_headers.oldest():
+            # the fork is older than the ring buffer, fall back to the stored block hashes
+            deeper_fork, _ = self.reorg_controller.find_fork_range(
+                max(fork_block - self.recent_headers.size, 0), fork_block
+            )
+            fork_block = deeper_fork if deeper_fork is not None else fork_block
+
+        if self.spool is not None:
+            # the stale blocks still spooled are drained first, or they would overwrite the repair
+            self.spool.flush()
+        self.reorg_controller.fix_range(fork_block, end_block)
+        self.recent_headers.update(canonical_hashes)
+        logger.info(f"Blocks {fork_block} to {end_block} repaired, resuming the stream.")
+
+    def _stage_and_promote(self, current_block, last_staged_block, last_synced_block, end_block, steps):
+        finalized_block = self._get_finalized_block_number()
+
+        target_block = self._calculate_target_block(current_block, last_staged_block, end_block, steps)
+        target_block = min(target_block, last_synced_block + self.staging.max_staged_blocks)
+        staged_blocks = max(target_block - last_staged_block, 0)
+        if staged_blocks != 0:
+            logger.info(
+                "Staging blocks {} to {}, finalized block {}".format(
+                    last_staged_block + 1, target_block, finalized_block
+                )
+            )
+            self.staging.begin_batch(last_staged_block + 1, target_block)
+            try:
+                self._do_stream(last_staged_block + 1, target_block)
+            except Exception:
+                self.staging.discard_batch()
+                raise
+            self.staging.end_batch(self.job_scheduler.get_data_buff().get(Block.type(), []))
+            last_staged_block = target_block
+
+        promoted_block, rewind_block = self.staging.promote(finalized_block, self._get_block_hash)
+        if rewind_block is not None:
+            last_staged_block = rewind_block
+        if promoted_block is not None:
+            logger.info("Writing last synced block {}".format(promoted_block))
+            self.sync_recorder.set_last_synced_block(promoted_block)
+            last_synced_block = promoted_block
+
+        progressed = staged_blocks != 0 or promoted_block is not None or rewind_block is not None
+        return last_staged_block, last_synced_block, progressed
+
+    def _get_finalized_block_number(self):
+        return int(self.web3.eth.get_block(self.finality_tag)["number"])
+
+    def _get_block_hash(self, block_number):
+        return bytes_to_hex_str(self.web3.eth.get_block(block_number)["hash"])
+
     def _get_current_block_number(self):
         return int(self.web3.eth.block_number)
 
     def _calculate_target_block(self, current_block, last_synced_block, end_block, steps):
+        if self.range_planner is not None:
+            limit_block = current_block - self.delay
+            limit_block = min(limit_block, end_block) if end_block is not None else limit_block
+            return self.range_planner.plan(last_synced_block + 1, limit_block)
+
         target_block = min(current_block - self.delay, last_synced_block + steps)
         target_block = min(target_block, end_block) if end_block is not None else target_block
         return target_block
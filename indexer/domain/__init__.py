@@ -2,7 +2,7 @@ from dataclasses import asdict, dataclass, fields, is_dataclass
 from typing import Any, Dict, Union, get_args, get_origin
 
 from common.utils.format_utils import to_snake_case
-from common.utils.module_loading import import_string, scan_subclass_by_path_patterns
+from common.utils.module_loading import LazyImportMapping, scan_subclass_by_path_patterns
 
 model_path_patterns = [
     "indexer/domain",
@@ -137,11 +137,8 @@ def dataclass_to_dict(instance: Domain) -> Dict[str, Any]:
 
 
 def generate_domains_mapping():
-    mapping = {}
-    for domain in __domain_imports.keys():
-        mapping[to_snake_case(domain)] = import_string(__domain_imports[domain])
-
-    return mapping
+    # the domain modules are imported on first lookup, by csv sources and type parameters
+    return LazyImportMapping({to_snake_case(domain): path for domain, path in __domain_imports.items()})
 
 
 __domain_imports = {
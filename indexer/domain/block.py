@@ -30,6 +30,7 @@ class Block(Domain):
     total_difficulty: Optional[int] = None
     extra_data: Optional[str] = None
     withdrawals_root: Optional[str] = None
+    withdrawals: Optional[List[dict]] = field(default_factory=list)
 
     @staticmethod
     def from_rpc(block_dict: dict):
@@ -66,6 +67,13 @@ class Block(Domain):
             transactions=transactions,
             extra_data=block_dict.get("extraData"),
             withdrawals_root=block_dict.get("withdrawalsRoot", None),
+            withdrawals=[
+                {
+                    "address": to_normalized_address(withdrawal["address"]),
+                    "amount": to_int(hexstr=withdrawal["amount"]),
+                }
+                for withdrawal in block_dict.get("withdrawals") or []
+            ],
         )
 
 
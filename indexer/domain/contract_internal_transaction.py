@@ -51,5 +51,29 @@ class ContractInternalTransaction(Domain):
             output=trace_dict["output"],
         )
 
+    @staticmethod
+    def from_trace(trace):
+        return ContractInternalTransaction(
+            trace_id=trace.trace_id,
+            from_address=trace.from_address,
+            to_address=trace.to_address,
+            value=trace.value,
+            gas=trace.gas,
+            gas_used=trace.gas_used,
+            trace_type=trace.trace_type,
+            call_type=trace.call_type,
+            trace_address=trace.trace_address,
+            error=trace.error,
+            status=trace.status,
+            block_number=trace.block_number,
+            block_hash=trace.block_hash,
+            block_timestamp=trace.block_timestamp,
+            transaction_index=trace.transaction_index,
+            transaction_hash=trace.transaction_hash,
+            trace_index=trace.trace_index,
+            input=trace.input,
+            output=trace.output,
+        )
+
     def is_contract_creation(self):
         return self.trace_type == "create" or self.trace_type == "create2"
@@ -9,7 +9,9 @@ from web3._utils.threads import Timeout as Web3Timeout
 
 from common.utils.exception_control import FastShutdownError, RetriableError
 from indexer.executors.bounded_executor import BoundedExecutor
+from indexer.utils.metrics import EXECUTOR_BATCH_SIZE
 from indexer.utils.progress_logger import ProgressLogger
+from indexer.utils.tracing import span
 
 RETRY_EXCEPTIONS = (
     ConnectionError,
@@ -44,6 +46,7 @@ class BatchWorkExecutor:
         self._futures = []
         self.retry_exceptions = retry_exceptions
         self.max_retries = max_retries
+        self.job_name = job_name
         self.logger = logging.getLogger(job_name)
         self.progress_logger = ProgressLogger(name=job_name, logger=self.logger)
 
@@ -63,11 +66,13 @@ class BatchWorkExecutor:
             self._futures.append(future)
 
     def _fail_safe_execute(self, work_handler, batch, collector, custom_splitting):
+        EXECUTOR_BATCH_SIZE.observe(len(batch), job=self.job_name)
         try:
-            if collector:
-                work_handler(batch, collector)
-            else:
-                work_handler(batch)
+            with span("batch_work", job=self.job_name, size=len(batch)):
+                if collector:
+                    work_handler(batch, collector)
+                else:
+                    work_handler(batch)
             if not custom_splitting:
                 self._try_increase_batch_size(len(batch))
         except self.retry_exceptions as e:
@@ -1,6 +1,8 @@
 from concurrent.futures import ThreadPoolExecutor
 from threading import BoundedSemaphore
 
+from indexer.utils.tracing import propagate
+
 
 class BoundedExecutor:
     """BoundedExecutor behaves as a ThreadPoolExecutor which will block on
@@ -19,7 +21,7 @@ class BoundedExecutor:
     def submit(self, fn, *args, **kwargs):
         self._semaphore.acquire()
         try:
-            future = self._delegate.submit(fn, *args, **kwargs)
+            future = self._delegate.submit(propagate(fn), *args, **kwargs)
         except Exception as e:
             self._semaphore.release()
             raise e
@@ -0,0 +1,51 @@
+import contextlib
+import fcntl
+import os
+from typing import List
+
+import orjson
+
+MANIFEST_FILE = "_manifest.json"
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_FILE)
+
+
+def read_manifest(path) -> dict:
+    """
+    The files written into a directory, by path relative to the directory, with their block ranges and sizes.
+    """
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+@contextlib.contextmanager
+def locked_manifest(path):
+    """
+    Read a manifest under an exclusive file lock and replace it with the yielded dict once the block exits,
+    so writers in other threads and processes keep each other's entries and readers never see a partial one.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manifest = read_manifest(path)
+        yield manifest
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+        os.replace(tmp_path, path)
+
+
+def manifest_files(directory, extensions) -> List[dict]:
+    """
+    The complete files with one of the extensions that the manifest of a directory lists, with their block ranges.
+    """
+    files = read_manifest(manifest_path(directory))["files"]
+    return [
+        {"path": os.path.join(directory, name), "data_range": (entry["start_block"], entry["end_block"])}
+        for name, entry in files.items()
+        if any(f".{extension}" in os.path.basename(name) for extension in extensions)
+    ]
@@ -22,6 +22,11 @@ def create_item_exporter(output, config):
         item_exporter = JSONFileItemExporter(output, config)
     elif item_exporter_type == ItemExporterType.CSVFILE:
         item_exporter = CSVFileItemExporter(output, config)
+    elif item_exporter_type == ItemExporterType.PARQUETFILE:
+        # pyarrow is an optional dependency, imported only when parquet files are exported
+        from indexer.exporters.parquet_file_item_exporter import ParquetFileItemExporter
+
+        item_exporter = ParquetFileItemExporter(output, config)
     elif item_exporter_type == ItemExporterType.HEMERA_ADDRESS_POSTGRES:
         item_exporter = HemeraAddressPostgresItemExporter(output, config["chain_id"])
     elif item_exporter_type == ItemExporterType.VOID:
@@ -52,6 +57,8 @@ def determine_item_exporter_type(output):
         return ItemExporterType.JSONFILE
     elif output is not None and output.startswith("csvfile://"):
         return ItemExporterType.CSVFILE
+    elif output is not None and output.startswith("parquetfile://"):
+        return ItemExporterType.PARQUETFILE
     elif output is not None and output == "void":
         return ItemExporterType.VOID
     elif output is None or output == "console":
@@ -66,6 +73,7 @@ class ItemExporterType:
     POSTGRES = "postgres"
     JSONFILE = "jsonfile"
     CSVFILE = "csvfile"
+    PARQUETFILE = "parquetfile"
     CONSOLE = "console"
     UNKNOWN = "unknown"
     HEMERA_ADDRESS_POSTGRES = "hemera_address_postgres"
@@ -0,0 +1,264 @@
+import logging
+import os
+import threading
+import time
+import typing
+from dataclasses import fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+import orjson
+from dateutil.tz import tzlocal
+
+from indexer.domain import Domain
+from indexer.exporters.base_exporter import BaseExporter, group_by_item_type
+from indexer.exporters.file_manifest import locked_manifest, manifest_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKS_PER_FILE = os.environ.get("DEFAULT_BLOCKS_PER_FILE", 1000)
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+DEFAULT_COMPRESSION = "zstd"
+
+# numeric(100) columns hold uint256 values, decimal256 is the widest decimal parquet readers understand
+DECIMAL_PRECISION = 76
+DECIMAL_LIMIT = 10**DECIMAL_PRECISION
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The parquetfile:// output requires pyarrow, install it with `pip install pyarrow`")
+    return pyarrow, pyarrow.parquet
+
+
+def _block_key(domain_class):
+    names = {field.name for field in fields(domain_class)}
+    if "block_number" in names:
+        return "block_number"
+    if "number" in names:
+        return "number"
+    return None
+
+
+def _unwrap_optional(annotation):
+    if typing.get_origin(annotation) is typing.Union:
+        arguments = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            return arguments[0]
+    return annotation
+
+
+class ColumnSpec:
+    """
+    The parquet type of one domain field and the conversion of its values. Values the type can not represent,
+    e.g. a uint256 above the decimal256 range, are written as null and counted.
+    """
+
+    def __init__(self, name, arrow_type, convert):
+        self.name = name
+        self.arrow_type = arrow_type
+        self.convert = convert
+        self.dropped = 0
+
+    def column(self, pa, items):
+        values = []
+        for item in items:
+            value = getattr(item, self.name, None)
+            if value is None:
+                values.append(None)
+                continue
+            try:
+                values.append(self.convert(value))
+            except (ValueError, TypeError, OverflowError):
+                self.dropped += 1
+                values.append(None)
+        return pa.array(values, type=self.arrow_type)
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, int):
+        # the postgres converter stores integer hashes as 32 bytes as well
+        return value.to_bytes(32, byteorder="big")
+    return bytes.fromhex(value[2:] if value[:2] in ("0x", "0X") else value)
+
+
+def _to_decimal(value):
+    value = int(value)
+    if not -DECIMAL_LIMIT < value < DECIMAL_LIMIT:
+        raise OverflowError(value)
+    return Decimal(value)
+
+
+def _to_int64(value):
+    value = int(value)
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise OverflowError(value)
+    return value
+
+
+def _to_json(value):
+    return value if isinstance(value, str) else orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def build_column_specs(pa, domain_class, table=None) -> List[ColumnSpec]:
+    """
+    Type the columns of a domain after the postgres model it is exported to, so binary hashes and addresses,
+    numeric(100) values and timestamps keep their types, and after the field annotations otherwise.
+    """
+    from sqlalchemy import BigInteger, Boolean, Float, Integer, LargeBinary, Numeric, SmallInteger
+    from sqlalchemy.dialects.postgresql import ARRAY, BYTEA, JSON, JSONB, TIMESTAMP
+
+    try:
+        hints = typing.get_type_hints(domain_class)
+    except Exception:
+        hints = {}
+
+    specs = []
+    for field in fields(domain_class):
+        annotation = _unwrap_optional(hints.get(field.name, field.type))
+        column_type = (
+            table.__table__.c[field.name].type if table is not None and field.name in table.__table__.c else None
+        )
+
+        if isinstance(column_type, (BYTEA, LargeBinary)):
+            spec = ColumnSpec(field.name, pa.binary(), _to_bytes)
+        elif isinstance(column_type, ARRAY) and isinstance(column_type.item_type, BYTEA):
+            spec = ColumnSpec(field.name, pa.list_(pa.binary()), lambda values: [_to_bytes(value) for value in values])
+        elif isinstance(column_type, TIMESTAMP) and annotation is int:
+            spec = ColumnSpec(field.name, pa.timestamp("s", tz="UTC"), _to_int64)
+        elif isinstance(column_type, (JSON, JSONB)):
+            spec = ColumnSpec(field.name, pa.string(), _to_json)
+        elif isinstance(column_type, Boolean) or annotation is bool:
+            spec = ColumnSpec(field.name, pa.bool_(), bool)
+        elif isinstance(column_type, (Integer, BigInteger, SmallInteger)):
+            spec = ColumnSpec(field.name, pa.int64(), _to_int64)
+        elif isinstance(column_type, Float) or annotation is float:
+            spec = ColumnSpec(field.name, pa.float64(), float)
+        elif isinstance(column_type, Numeric) and not column_type.scale:
+            spec = ColumnSpec(field.name, pa.decimal256(DECIMAL_PRECISION, 0), _to_decimal)
+        elif annotation is int:
+            spec = ColumnSpec(field.name, pa.int64(), _to_int64)
+        elif annotation is str:
+            spec = ColumnSpec(field.name, pa.string(), str)
+        else:
+            # lists, dicts and nested domains
+            spec = ColumnSpec(field.name, pa.string(), _to_json)
+        specs.append(spec)
+    return specs
+
+
+class ParquetFileItemExporter(BaseExporter):
+    """
+    Write every domain type into parquet files under its own directory, one directory per range of
+    blocks_per_file blocks, e.g. {dir}/transaction/20000000-20000999/transaction-20000000-20000099.parquet.
+
+    Files are written to a hidden temporary file and renamed, so readers never see a partial file, and every
+    written file is recorded with its block range and row count in the _manifest.json of its domain type.
+    Names starting with a dot or an underscore are skipped by parquet dataset readers.
+    """
+
+    def __init__(self, direction, config):
+        self.pa, self.pq = _import_pyarrow()
+        self.dir = direction.replace("parquetfile://", "")
+        self.blocks_per_file = int(config.get("blocks_per_file", DEFAULT_BLOCKS_PER_FILE))
+        self.row_group_size = int(config.get("parquet_row_group_size", DEFAULT_ROW_GROUP_SIZE))
+        self.compression = config.get("parquet_compression", DEFAULT_COMPRESSION)
+        self._specs: Dict[type, List[ColumnSpec]] = {}
+        self._lock = threading.Lock()
+
+    def export_items(self, items: List[Domain], **kwargs):
+        start_time = datetime.now(tzlocal())
+
+        written = 0
+        for item_type, item_group in group_by_item_type(items).items():
+            if item_group:
+                written += self.write_items(item_type, item_group)
+
+        end_time = datetime.now(tzlocal())
+        logger.info(
+            "Exporting items to parquet file end, Item count: {}, Files: {}, Took {}".format(
+                len(items), written, (end_time - start_time)
+            )
+        )
+
+    def column_specs(self, item_type) -> List[ColumnSpec]:
+        with self._lock:
+            if item_type not in self._specs:
+                from common.converter.pg_converter import domain_model_mapping
+
+                config = domain_model_mapping.get(item_type)
+                self._specs[item_type] = build_column_specs(self.pa, item_type, config["table"] if config else None)
+            return self._specs[item_type]
+
+    def write_items(self, item_type, items: List[Domain]) -> int:
+        type_name = item_type.type()
+        block_key = _block_key(item_type)
+        if block_key is None:
+            file_name = f"{type_name}-{time.time_ns()}-{os.getpid()}.parquet"
+            self._write_file(item_type, type_name, file_name, items, None, None)
+            return 1
+
+        items = sorted(items, key=lambda item: getattr(item, block_key))
+        partitions = {}
+        for item in items:
+            partition = getattr(item, block_key) // self.blocks_per_file
+            partitions.setdefault(partition, []).append(item)
+
+        for partition, partition_items in partitions.items():
+            partition_start = partition * self.blocks_per_file
+            start_block = getattr(partition_items[0], block_key)
+            end_block = getattr(partition_items[-1], block_key)
+            file_name = os.path.join(
+                f"{partition_start}-{partition_start + self.blocks_per_file - 1}",
+                f"{type_name}-{start_block}-{end_block}.parquet",
+            )
+            self._write_file(item_type, type_name, file_name, partition_items, start_block, end_block)
+        return len(partitions)
+
+    def _write_file(self, item_type, type_name, file_name, items, start_block, end_block):
+        specs = self.column_specs(item_type)
+        dropped = sum(spec.dropped for spec in specs)
+        table = self.pa.Table.from_arrays(
+            [spec.column(self.pa, items) for spec in specs],
+            schema=self.pa.schema([(spec.name, spec.arrow_type) for spec in specs]),
+        )
+        if sum(spec.dropped for spec in specs) > dropped:
+            logger.warning(f"Wrote {type_name} values out of their column range as null into {file_name}")
+
+        path = os.path.join(self.dir, type_name, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        try:
+            self.pq.write_table(
+                table,
+                tmp_path,
+                row_group_size=self.row_group_size,
+                compression=self.compression,
+            )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._record(
+            type_name,
+            file_name,
+            {
+                "start_block": start_block,
+                "end_block": end_block,
+                "rows": table.num_rows,
+                "bytes": os.path.getsize(path),
+                "written_at": int(time.time()),
+            },
+        )
+
+    def _record(self, type_name, file_name, entry):
+        with locked_manifest(manifest_path(os.path.join(self.dir, type_name))) as manifest:
+            manifest["files"][file_name] = entry
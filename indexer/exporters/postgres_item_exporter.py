@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import Type
 
 from psycopg2.extras import execute_values
@@ -8,6 +9,8 @@ from common.converter.pg_converter import domain_model_mapping
 from common.models import HemeraModel
 from common.services.postgresql_service import PostgreSQLService
 from indexer.exporters.base_exporter import BaseExporter, group_by_item_type
+from indexer.utils.metrics import EXPORTER_DURATION, EXPORTER_ROWS
+from indexer.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +82,8 @@ class PostgresItemExporter(BaseExporter):
                             ncols=90,
                             bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]",
                         )
+                        start_time = time.perf_counter()
+                        table_span = span("export_table", exporter="postgres", table=table.__tablename__)
                         data = []
                         # Process items with progress tracking
                         for item in item_group:
@@ -100,6 +105,12 @@ class PostgresItemExporter(BaseExporter):
 
                         tables.append(table.__tablename__)
                         self.sub_progress.close()
+                        table_span.set_attribute("rows", len(data))
+                        table_span.finish()
+                        EXPORTER_ROWS.inc(len(data), exporter="postgres", table=table.__tablename__)
+                        EXPORTER_DURATION.observe(
+                            time.perf_counter() - start_time, exporter="postgres", table=table.__tablename__
+                        )
 
             except Exception as e:
                 logger.error(f"Error exporting items: {e}")
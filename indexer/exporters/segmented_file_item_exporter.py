@@ -0,0 +1,334 @@
+import atexit
+import gzip
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List
+
+from dateutil.tz import tzlocal
+
+from indexer.domain import Domain, dataclass_to_dict
+from indexer.exporters.base_exporter import BaseExporter, group_by_item_type
+from indexer.exporters.file_manifest import locked_manifest, manifest_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKS_PER_FILE = os.environ.get("DEFAULT_BLOCKS_PER_FILE", 1000)
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+SEGMENTS_DIR = "segments"
+
+
+def block_key(item_type):
+    if "number" in item_type.__dataclass_fields__:
+        return "number"
+    if "block_number" in item_type.__dataclass_fields__:
+        return "block_number"
+    return None
+
+
+def compress(data: bytes, compression) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data: bytes, compression) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compressed files require zstandard, install it with `pip install zstandard`")
+    return zstandard
+
+
+def write_atomic(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SegmentedFileItemExporter(BaseExporter):
+    """
+    Export every batch into new, immutable segment files and never rewrite a file in place.
+
+    Items are split into windows of blocks_per_file blocks, each batch adds one segment per domain type and
+    window under {dir}/{type}/segments/, and the _manifest.json of the domain type maps every file to its
+    block range. Once the export moved past a window, a background thread merges its segments into the window
+    file {dir}/{type}/{type}-{window start}-{window end}.{extension}, together with the data a former run
+    wrote there. Readers should list files through the manifest, which only ever names complete files.
+
+    A batch exported again, e.g. after a run stopped between the export and its sync record, replaces the rows
+    of its block range in the window instead of adding them twice, and rows of domain types without blocks
+    replace the identical rows written before them.
+
+    Subclasses encode a list of item dicts into the bytes of one file, merge the bytes of several files, and
+    split a file into rows and join them back for the merges that replace rows.
+    """
+
+    scheme = None
+    extension = None
+
+    def __init__(self, direction, config):
+        self.dir = direction.replace(self.scheme, "")
+        self.blocks_per_file = int(config.get("blocks_per_file", DEFAULT_BLOCKS_PER_FILE))
+        self.compression = config.get("file_compression") or "none"
+        if self.compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"Unknown file compression {self.compression}, it should be one of {list(COMPRESSION_SUFFIXES)}"
+            )
+        if self.compression == "zstd":
+            _zstandard()
+
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        # windows with segments not merged yet, and the last window written, by domain type
+        self._pending = {}
+        self._last_window = {}
+        self._compactor = None
+        atexit.register(self.flush)
+
+    def encode(self, items: List[dict]) -> bytes:
+        raise NotImplementedError
+
+    def merge(self, contents: List[bytes]) -> bytes:
+        return b"".join(contents)
+
+    def split_rows(self, content: bytes):
+        """
+        The header of a file, its rows and a function returning the block of a row.
+        """
+        raise NotImplementedError
+
+    def join_rows(self, header, rows) -> bytes:
+        raise NotImplementedError
+
+    def export_items(self, items: List[Domain], **kwargs):
+        start_time = datetime.now(tzlocal())
+
+        for item_type, item_group in group_by_item_type(items).items():
+            if item_group:
+                self.write_segments(item_type, item_group)
+
+        end_time = datetime.now(tzlocal())
+        logger.info(
+            "Exporting items to {} file end, Item count: {}, Took {}".format(
+                self.extension, len(items), (end_time - start_time)
+            )
+        )
+
+    def write_segments(self, item_type, items: List[Domain]):
+        type_name = item_type.type()
+        key = block_key(item_type)
+
+        windows = defaultdict(list)
+        if key is None:
+            windows[None] = items
+        else:
+            for item in sorted(items, key=lambda item: getattr(item, key)):
+                windows[getattr(item, key) // self.blocks_per_file].append(item)
+
+        entries = {}
+        for window, window_items in windows.items():
+            start_block = getattr(window_items[0], key) if key else None
+            end_block = getattr(window_items[-1], key) if key else None
+            name = "-".join(
+                str(part)
+                for part in (type_name, start_block, end_block, time.time_ns(), os.getpid(), next(self._sequence))
+                if part is not None
+            )
+            file_name = os.path.join(SEGMENTS_DIR, f"{name}.{self.extension}{COMPRESSION_SUFFIXES[self.compression]}")
+            data = compress(self.encode([dataclass_to_dict(item) for item in window_items]), self.compression)
+            write_atomic(os.path.join(self.dir, type_name, file_name), data)
+            entries[file_name] = {
+                "start_block": start_block,
+                "end_block": end_block,
+                "window": window,
+                "segment": True,
+                "rows": len(window_items),
+                "bytes": len(data),
+                "written_at": int(time.time()),
+                "written_ns": time.time_ns(),
+            }
+
+        with locked_manifest(manifest_path(os.path.join(self.dir, type_name))) as manifest:
+            manifest["files"].update(entries)
+            # segments a former run left behind are merged along with the new ones
+            segment_windows = {entry["window"] for entry in manifest["files"].values() if entry.get("segment")}
+
+        with self._lock:
+            pending = self._pending.setdefault(type_name, segment_windows)
+            pending.update(windows)
+            last_window = max(
+                [window for window in windows if window is not None] + [self._last_window.get(type_name, -1)]
+            )
+            self._last_window[type_name] = last_window
+            ready = [window for window in pending if window is not None and window < last_window]
+            pending.difference_update(ready)
+
+        for window in ready:
+            self._schedule(type_name, window)
+
+    def _schedule(self, type_name, window):
+        if self._compactor is None:
+            with self._lock:
+                if self._compactor is None:
+                    self._compactor = SegmentCompactor(self)
+                    self._compactor.start()
+        self._compactor.submit(type_name, window)
+
+    def flush(self):
+        """
+        Merge the segments of every window, including the last one, and wait for the merges to finish.
+        """
+        with self._lock:
+            pending = [(type_name, window) for type_name, windows in self._pending.items() for window in windows]
+            for windows in self._pending.values():
+                windows.clear()
+        for type_name, window in pending:
+            self._schedule(type_name, window)
+        if self._compactor is not None:
+            self._compactor.wait()
+
+    def window_file_name(self, type_name, window):
+        if window is None:
+            name = type_name
+        else:
+            window_start = window * self.blocks_per_file
+            name = f"{type_name}-{window_start}-{window_start + self.blocks_per_file - 1}"
+        return f"{name}.{self.extension}{COMPRESSION_SUFFIXES[self.compression]}"
+
+    def compact(self, type_name, window):
+        """
+        Merge the segments of a window into its window file. The merge holds the manifest lock, so a writer
+        recording a new segment of the window waits for it and the segment is merged by the next compaction.
+        """
+        directory = os.path.join(self.dir, type_name)
+        window_file = self.window_file_name(type_name, window)
+        merged = []
+        with locked_manifest(manifest_path(directory)) as manifest:
+            files = manifest["files"]
+            # in the order they were written, the window file holds what was merged before
+            segments = sorted(
+                (name for name, entry in files.items() if entry.get("segment") and entry["window"] == window),
+                key=lambda name: (files[name].get("written_ns", files[name]["written_at"] * 10**9), name),
+            )
+            if not segments:
+                return
+
+            sources = ([window_file] if window_file in files else []) + segments
+            contents = []
+            for name in sources:
+                with open(os.path.join(directory, name), "rb") as f:
+                    contents.append(decompress(f.read(), self.compression))
+            ranges = [(files[name]["start_block"], files[name]["end_block"]) for name in sources]
+            merged_content, rows = self._merge_sources(
+                window, contents, ranges, sum(files[name]["rows"] for name in sources)
+            )
+            data = compress(merged_content, self.compression)
+            write_atomic(os.path.join(directory, window_file), data)
+
+            blocks = [block for block_range in ranges for block in block_range if block is not None]
+            files[window_file] = {
+                "start_block": min(blocks) if blocks else None,
+                "end_block": max(blocks) if blocks else None,
+                "window": window,
+                "rows": rows,
+                "bytes": len(data),
+                "written_at": int(time.time()),
+            }
+            for name in segments:
+                merged.append(name)
+                del files[name]
+
+        # removed once the manifest no longer names them
+        for name in merged:
+            os.remove(os.path.join(directory, name))
+
+    def _merge_sources(self, window, contents, ranges, row_count):
+        """
+        Merge the contents of a window, oldest first, into one file ordered by block and return it with its
+        row count. The rows of a source in the block range of a later source are replaced by the later one,
+        and so are identical rows when the domain type has no blocks.
+        """
+        replaced_by = [
+            [
+                later
+                for later in ranges[index + 1 :]
+                if window is not None and later[0] <= block_range[1] and block_range[0] <= later[1]
+            ]
+            for index, block_range in enumerate(ranges)
+        ]
+        if window is not None and not any(replaced_by):
+            # nothing was exported twice, the files are appended as they are
+            order = sorted(range(len(contents)), key=lambda index: (ranges[index][0], index))
+            return self.merge([contents[index] for index in order]), row_count
+
+        sources = [self.split_rows(content) for content in contents]
+        for header, _, _ in sources[1:]:
+            if header != sources[0][0]:
+                raise ValueError(f"Can not merge {self.extension} files with different headers: {header}")
+        if window is None:
+            kept, later_rows = [], set()
+            for _, source_rows, _ in reversed(sources):
+                kept.append([row for row in source_rows if row not in later_rows])
+                later_rows.update(source_rows)
+            rows = [row for source_rows in reversed(kept) for row in source_rows]
+        else:
+            kept = []
+            for (_, source_rows, block_of), replacing in zip(sources, replaced_by):
+                for row in source_rows:
+                    block = block_of(row)
+                    if not any(start <= block <= end for start, end in replacing):
+                        kept.append((block, row))
+            # every block is left in one source, ordering by block keeps the rows of a block together
+            rows = [row for _, row in sorted(kept, key=lambda pair: pair[0])]
+        return self.join_rows(sources[0][0], rows), len(rows)
+
+
+class SegmentCompactor(threading.Thread):
+    """
+    Merge the windows of an exporter in the background, one at a time and in the order they were submitted.
+    A failed merge leaves the segments in place, they are still complete files listed in the manifest.
+    """
+
+    def __init__(self, exporter: SegmentedFileItemExporter):
+        super().__init__(name=f"{exporter.extension}-segment-compactor", daemon=True)
+        self.exporter = exporter
+        self.queue = queue.Queue()
+
+    def submit(self, type_name, window):
+        self.queue.put((type_name, window))
+
+    def wait(self):
+        self.queue.join()
+
+    def run(self):
+        while True:
+            type_name, window = self.queue.get()
+            try:
+                self.exporter.compact(type_name, window)
+            except Exception as e:
+                logger.exception(f"Failed to merge the {type_name} segments of window {window}: {e}")
+            finally:
+                self.queue.task_done()
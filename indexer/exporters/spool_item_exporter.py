@@ -0,0 +1,330 @@
+import logging
+import os
+import pickle
+import struct
+import threading
+import zlib
+from typing import Callable, List, Optional
+
+from indexer.exporters.base_exporter import BaseExporter
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAGIC = b"HSPL"
+SPOOL_VERSION = 1
+# magic, version, crc32 and length of the payload
+SPOOL_HEADER = struct.Struct(">4sBIQ")
+SPOOL_SUFFIX = ".spool"
+CORRUPT_SUFFIX = ".corrupt"
+PROGRESS_SUFFIX = ".progress"
+
+DEFAULT_MAX_SPOOL_BYTES = 1024**3
+DEFAULT_RETRY_INTERVAL = 1
+MAX_RETRY_INTERVAL = 60
+
+
+class SpoolCorruptedError(Exception):
+    pass
+
+
+def batch_range(name):
+    start_block, end_block = name.split(SPOOL_SUFFIX)[0].split("-")
+    return int(start_block), int(end_block)
+
+
+def encode_batch(start_block, end_block, exports) -> bytes:
+    payload = zlib.compress(pickle.dumps((start_block, end_block, exports), protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return SPOOL_HEADER.pack(SPOOL_MAGIC, SPOOL_VERSION, zlib.crc32(payload), len(payload)) + payload
+
+
+def decode_batch(data: bytes):
+    if len(data) < SPOOL_HEADER.size:
+        raise SpoolCorruptedError("truncated header")
+    magic, version, checksum, length = SPOOL_HEADER.unpack_from(data)
+    payload = data[SPOOL_HEADER.size :]
+    if magic != SPOOL_MAGIC or version != SPOOL_VERSION:
+        raise SpoolCorruptedError(f"unknown format {magic!r} version {version}")
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise SpoolCorruptedError("checksum mismatch")
+    try:
+        return pickle.loads(zlib.decompress(payload))
+    except Exception as e:
+        # e.g. a domain class renamed or moved while its batches were spooled
+        raise SpoolCorruptedError(f"payload can not be decoded: {e!r}") from e
+
+
+class SpoolItemExporter(BaseExporter):
+    """
+    Write the items of every batch to a local spool and acknowledge the batch once it is on disk, while a
+    background drainer replays the spooled batches into the wrapped exporters in block order. A slow or
+    unavailable database only delays the drain, the blocks fetched from the node are never fetched again.
+
+    Each batch is one checksummed file named by its block range. A batch that fails to drain is retried with
+    a growing interval until it succeeds, and the batches after it wait, so exports keep their order.
+    The exports of a batch already written to every exporter are recorded next to it, a retry or a restart
+    continues with the first one that was not, and only that one may be written twice.
+    Once the spool holds max_spool_bytes, end_batch blocks until the drainer frees space.
+    on_drained is called with the last block of every drained batch, the stream records its progress there.
+
+    A batch that can not be read is kept as a .corrupt file and its blocks are missing until they are spooled
+    again, the batches after them are not drained before and last_spooled_block stays below them.
+    """
+
+    def __init__(
+        self,
+        item_exporters: List[BaseExporter],
+        spool_dir,
+        max_spool_bytes=DEFAULT_MAX_SPOOL_BYTES,
+        retry_interval=DEFAULT_RETRY_INTERVAL,
+        on_drained: Callable[[int], None] = None,
+    ):
+        self.item_exporters = item_exporters
+        self.spool_dir = spool_dir
+        self.max_spool_bytes = max_spool_bytes
+        self.retry_interval = retry_interval
+        self.on_drained = on_drained
+        os.makedirs(spool_dir, exist_ok=True)
+
+        self._current = None
+        self._condition = threading.Condition()
+        self._files = {}
+        # the block ranges of corrupted batches and the last block spooled again of each
+        self._missing = {}
+        names = sorted(os.listdir(spool_dir))
+        for name in names:
+            if name.endswith(SPOOL_SUFFIX):
+                self._files[name] = os.path.getsize(os.path.join(spool_dir, name))
+            elif name.endswith(SPOOL_SUFFIX + CORRUPT_SUFFIX):
+                start_block, end_block = batch_range(name)
+                self._missing[name] = [start_block, end_block, start_block - 1]
+            elif name.endswith(".tmp") or (
+                name.endswith(PROGRESS_SUFFIX) and name[: -len(PROGRESS_SUFFIX)] not in names
+            ):
+                # a batch that was not acknowledged, its blocks are streamed again
+                os.remove(os.path.join(spool_dir, name))
+        if self._missing:
+            logger.warning(f"Spooled blocks from {self.first_missing_block} are missing and have to be streamed again")
+        if self._files:
+            logger.info(f"Found {len(self._files)} spooled batches up to block {self.last_spooled_block}")
+        self._error: Optional[Exception] = None
+        self._stopped = False
+        self._drainer = None
+
+    @property
+    def spooled_bytes(self):
+        with self._condition:
+            return sum(self._files.values())
+
+    @property
+    def spooled_batches(self):
+        with self._condition:
+            return len(self._files)
+
+    @property
+    def first_missing_block(self):
+        with self._condition:
+            return min((start_block for start_block, _, _ in self._missing.values()), default=None)
+
+    @property
+    def last_spooled_block(self):
+        """
+        The last block spooled without missing blocks below it.
+        """
+        first_missing_block = self.first_missing_block
+        with self._condition:
+            last_block = max((batch_range(name)[1] for name in self._files), default=None)
+        if first_missing_block is None:
+            return last_block
+        return first_missing_block - 1 if last_block is None else min(last_block, first_missing_block - 1)
+
+    def start(self):
+        if self._drainer is None:
+            self._drainer = threading.Thread(target=self._drain, name="spool-drainer", daemon=True)
+            self._drainer.start()
+
+    def begin_batch(self, start_block, end_block):
+        self._current = (start_block, end_block, [])
+
+    def export_items(self, items, **kwargs):
+        if self._current is None:
+            # nothing is spooled outside of a batch, pass through
+            self._export(kwargs.get("job_name"), items)
+            return
+        self._current[2].append((kwargs.get("job_name"), list(items)))
+
+    def discard_batch(self):
+        self._current = None
+
+    def end_batch(self):
+        """
+        Write the current batch to the spool and return once it is durable, waiting for space first.
+        """
+        (start_block, end_block, exports), self._current = self._current, None
+        data = encode_batch(start_block, end_block, exports)
+        name = f"{start_block:012d}-{end_block:012d}{SPOOL_SUFFIX}"
+
+        with self._condition:
+            waited = False
+            while self._files and sum(self._files.values()) + len(data) > self.max_spool_bytes:
+                self._raise_drain_error()
+                if not waited:
+                    logger.warning(f"Spool is full with {len(self._files)} batches, waiting for the drain")
+                    waited = True
+                self._condition.wait(timeout=1)
+            self._raise_drain_error()
+
+        path = os.path.join(self.spool_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._fsync_dir()
+
+        with self._condition:
+            self._files[name] = len(data)
+            self._condition.notify_all()
+        self.start()
+
+    def flush(self):
+        """
+        Wait until every spooled batch is drained.
+        """
+        self.start()
+        with self._condition:
+            while self._files and self._error is None:
+                self._condition.wait(timeout=1)
+            self._raise_drain_error()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._drainer is not None:
+            self._drainer.join()
+            self._drainer = None
+
+    def _raise_drain_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _fsync_dir(self):
+        fd = os.open(self.spool_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _export(self, job_name, items):
+        for item_exporter in self.item_exporters:
+            item_exporter.open()
+            item_exporter.export_items(items, job_name=job_name)
+            item_exporter.close()
+
+    def _read_progress(self, path):
+        try:
+            with open(path + PROGRESS_SUFFIX, "rb") as f:
+                exporters, steps = struct.unpack(">II", f.read())
+        except (OSError, struct.error):
+            return 0
+        return steps if exporters == len(self.item_exporters) else 0
+
+    def _write_progress(self, path, steps):
+        tmp_path = path + PROGRESS_SUFFIX + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(struct.pack(">II", len(self.item_exporters), steps))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path + PROGRESS_SUFFIX)
+
+    def _export_batch(self, path, exports):
+        """
+        Write the exports of a batch to every exporter, skipping the ones a former attempt already wrote.
+        """
+        done = self._read_progress(path)
+        step = 0
+        for job_name, items in exports:
+            for item_exporter in self.item_exporters:
+                if step >= done:
+                    item_exporter.open()
+                    item_exporter.export_items(items, job_name=job_name)
+                    item_exporter.close()
+                    self._write_progress(path, step + 1)
+                step += 1
+
+    def _is_blocked(self, start_block):
+        # a batch waits while blocks below it are missing
+        return any(start_block > spooled_block + 1 for _, _, spooled_block in self._missing.values())
+
+    def _fill_missing(self, start_block, end_block):
+        for name, missing in list(self._missing.items()):
+            missing_start, missing_end, spooled_block = missing
+            if start_block <= spooled_block + 1 and end_block > spooled_block:
+                missing[2] = end_block
+            if missing[2] >= missing_end:
+                logger.info(f"Missing blocks {missing_start} to {missing_end} were spooled again")
+                del self._missing[name]
+                os.remove(os.path.join(self.spool_dir, name))
+
+    def _drain(self):
+        try:
+            self._drain_batches()
+        except Exception as e:
+            logger.exception(f"The spool drainer stopped: {e}")
+            with self._condition:
+                self._error = e
+                self._condition.notify_all()
+
+    def _drain_batches(self):
+        retry_interval = self.retry_interval
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._files or self._is_blocked(batch_range(min(self._files))[0])):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                name = min(self._files)
+
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    start_block, end_block, exports = decode_batch(f.read())
+            except (OSError, SpoolCorruptedError) as e:
+                if os.path.exists(path):
+                    os.replace(path, path + CORRUPT_SUFFIX)
+                with self._condition:
+                    self._error = SpoolCorruptedError(
+                        f"Spooled batch {name} can not be read ({e}), it is kept as {name}{CORRUPT_SUFFIX} "
+                        f"and its blocks have to be streamed again"
+                    )
+                    del self._files[name]
+                    start_block, end_block = batch_range(name)
+                    self._missing[name + CORRUPT_SUFFIX] = [start_block, end_block, start_block - 1]
+                    self._condition.notify_all()
+                logger.error(str(self._error))
+                return
+
+            try:
+                self._export_batch(path, exports)
+                if self.on_drained is not None:
+                    self.on_drained(end_block)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to drain spooled blocks {start_block} to {end_block}, "
+                    f"retrying in {retry_interval} seconds: {e}"
+                )
+                with self._condition:
+                    self._condition.wait_for(lambda: self._stopped, timeout=retry_interval)
+                retry_interval = min(retry_interval * 2, MAX_RETRY_INTERVAL)
+                continue
+
+            retry_interval = self.retry_interval
+            os.remove(path)
+            if os.path.exists(path + PROGRESS_SUFFIX):
+                os.remove(path + PROGRESS_SUFFIX)
+            with self._condition:
+                del self._files[name]
+                self._fill_missing(start_block, end_block)
+                self._condition.notify_all()
+            logger.info(f"Drained spooled blocks {start_block} to {end_block}")
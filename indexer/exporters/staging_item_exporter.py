@@ -0,0 +1,107 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from indexer.domain.block import Block
+from indexer.exporters.base_exporter import BaseExporter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StagedBatch:
+    start_block: int
+    end_block: int
+    # (job name, items) in the order the jobs exported them
+    exports: List[Tuple[str, list]] = field(default_factory=list)
+    # block number -> (block hash, parent hash)
+    headers: Dict[int, Tuple[str, str]] = field(default_factory=dict)
+
+
+class StagingItemExporter(BaseExporter):
+    """
+    Hold the items of unfinalized blocks in memory and hand them to the wrapped exporters once the blocks are
+    finalized, so a reorg above the finalized block only drops staged items instead of rewriting exported rows.
+    """
+
+    def __init__(self, item_exporters: List[BaseExporter], max_staged_blocks=256):
+        self.item_exporters = item_exporters
+        self.max_staged_blocks = max_staged_blocks
+        self._batches = OrderedDict()
+        self._current: Optional[StagedBatch] = None
+
+    @property
+    def staged_blocks(self):
+        return sum(batch.end_block - batch.start_block + 1 for batch in self._batches.values())
+
+    @property
+    def last_staged_block(self):
+        return next(reversed(self._batches.values())).end_block if self._batches else None
+
+    def begin_batch(self, start_block, end_block):
+        self._current = StagedBatch(start_block=start_block, end_block=end_block)
+
+    def export_items(self, items, **kwargs):
+        if self._current is None:
+            # nothing is staged outside of a batch, pass through
+            self._export(kwargs.get("job_name"), items)
+            return
+        self._current.exports.append((kwargs.get("job_name"), list(items)))
+
+    def end_batch(self, blocks: List[Block]):
+        batch, self._current = self._current, None
+        batch.headers = {block.number: (block.hash, block.parent_hash) for block in blocks}
+        self._batches[batch.start_block] = batch
+
+    def discard_batch(self):
+        self._current = None
+
+    def promote(self, finalized_block, get_block_hash: Callable[[int], str]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Export every staged batch that is fully finalized and still canonical.
+
+        Returns the last promoted block number and, when a staged batch turned out to be off the canonical chain,
+        the block number the stream has to be rewound to. All batches from the stale one onwards are dropped.
+        """
+        promoted, rewind = None, None
+        for start_block in list(self._batches.keys()):
+            batch = self._batches[start_block]
+            if batch.end_block > finalized_block:
+                break
+
+            if not self._is_canonical(batch, get_block_hash):
+                rewind = batch.start_block - 1
+                dropped = [self._batches.pop(number) for number in list(self._batches.keys()) if number >= start_block]
+                logger.warning(
+                    f"Staged blocks {batch.start_block} to {dropped[-1].end_block} are not on the finalized chain, "
+                    f"dropping {len(dropped)} staged batches."
+                )
+                break
+
+            for job_name, items in batch.exports:
+                self._export(job_name, items)
+            self._batches.pop(start_block)
+            promoted = batch.end_block
+            logger.info(f"Promoted finalized blocks {batch.start_block} to {batch.end_block}")
+
+        return promoted, rewind
+
+    def _is_canonical(self, batch: StagedBatch, get_block_hash: Callable[[int], str]):
+        if not batch.headers:
+            # no blocks were collected for the batch, there is nothing to verify against
+            return True
+
+        numbers = sorted(batch.headers)
+        for number in numbers[1:]:
+            if number - 1 in batch.headers and batch.headers[number][1] != batch.headers[number - 1][0]:
+                return False
+
+        # with a linked batch, a canonical last block means every block in the batch is canonical
+        return get_block_hash(numbers[-1]) == batch.headers[numbers[-1]][0]
+
+    def _export(self, job_name, items):
+        for item_exporter in self.item_exporters:
+            item_exporter.open()
+            item_exporter.export_items(items, job_name=job_name)
+            item_exporter.close()
@@ -1,5 +1,6 @@
 import logging
 import threading
+import time
 from collections import defaultdict
 from datetime import datetime
 from typing import Generic, List, Type, TypeVar, Union, get_args, get_origin, get_type_hints
@@ -12,7 +13,9 @@ from common.utils.exception_control import FastShutdownError
 from common.utils.format_utils import to_snake_case
 from indexer.domain import Domain
 from indexer.domain.transaction import Transaction
+from indexer.utils.metrics import JOB_CPU, JOB_DURATION, JOB_ITEMS
 from indexer.utils.reorg import should_reorg
+from indexer.utils.tracing import span
 
 T = TypeVar("T")
 
@@ -115,6 +118,7 @@ class BaseJob(metaclass=BaseJobMeta):
     def __init__(self, **kwargs):
 
         self._required_output_types = kwargs["required_output_types"]
+        self._required_dependency_types = kwargs.get("required_dependency_types", [])
         self._item_exporters = kwargs["item_exporters"]
         self._batch_web3_provider = kwargs["batch_web3_provider"]
         self._web3 = Web3(Web3.HTTPProvider(self._batch_web3_provider.endpoint_uri))
@@ -132,28 +136,41 @@ class BaseJob(metaclass=BaseJobMeta):
         self.user_defined_config = kwargs["config"][job_name_snake] if kwargs["config"].get(job_name_snake) else {}
 
     def run(self, **kwargs):
-        try:
-            self._start(**kwargs)
-
-            if self.able_to_reorg and self._reorg:
-                start_time = datetime.now()
-                self.logger.info(f"Stage _pre_reorg starting.")
-                self._pre_reorg(**kwargs)
-                self.logger.info(f"Stage _pre_reorg finished. Took {datetime.now() - start_time}")
-
-            if not self._reorg or self._should_reorg:
-                if is_overwrite_udf(self.__class__):
-                    parameters = self._build_udf_parameter()
-                    self._udf(**parameters)
-                else:
-                    self._collect(**kwargs)
-                    self._process(**kwargs)
-
-            if not self._reorg:
-                self._export()
-
-        finally:
-            self._end()
+        run_start, cpu_start = time.perf_counter(), time.process_time()
+        with span(self.job_name, start_block=kwargs.get("start_block"), end_block=kwargs.get("end_block")):
+            try:
+                self._start(**kwargs)
+
+                if self.able_to_reorg and self._reorg:
+                    start_time = datetime.now()
+                    self.logger.info(f"Stage _pre_reorg starting.")
+                    with span("_pre_reorg"):
+                        self._pre_reorg(**kwargs)
+                    self.logger.info(f"Stage _pre_reorg finished. Took {datetime.now() - start_time}")
+
+                if not self._reorg or self._should_reorg:
+                    if is_overwrite_udf(self.__class__):
+                        parameters = self._build_udf_parameter()
+                        with span("_udf"):
+                            self._udf(**parameters)
+                    else:
+                        with span("_collect"):
+                            self._collect(**kwargs)
+                        with span("_process"):
+                            self._process(**kwargs)
+
+                if not self._reorg:
+                    with span("_export"):
+                        self._export()
+
+            finally:
+                self._end()
+                JOB_DURATION.observe(time.perf_counter() - run_start, job=self.job_name)
+                JOB_CPU.inc(time.process_time() - cpu_start, job=self.job_name)
+                for output_type in self.output_types:
+                    JOB_ITEMS.inc(
+                        len(self._data_buff.get(output_type.type(), [])), job=self.job_name, type=output_type.type()
+                    )
 
     def _start(self, **kwargs):
         pass
@@ -163,14 +180,15 @@ class BaseJob(metaclass=BaseJobMeta):
             raise FastShutdownError("PG Service is not set")
 
         reorg_block = int(kwargs["start_block"])
+        end_block = int(kwargs.get("end_block", reorg_block))
 
         output_table = {}
         for domain in self.output_types:
-            output_table[domain_model_mapping[domain.__name__]["table"]] = domain.type()
-            # output_table.add(domain_model_mapping[domain.__name__]["table"])
+            if domain in domain_model_mapping:
+                output_table[domain_model_mapping[domain]["table"]] = domain.type()
 
         for table in output_table.keys():
-            if should_reorg(reorg_block, table, self._service):
+            if should_reorg(reorg_block, table, self._service, end_block):
                 self._should_reorg_type.add(output_table[table])
                 self._should_reorg = True
 
@@ -47,8 +47,7 @@ class ExportBlocksJob(BaseExportJob):
         if self._service is None:
             raise FastShutdownError("PG Service is not set")
 
-        reorg_block = int(kwargs["start_block"])
-        set_reorg_sign(self._reorg_jobs, reorg_block, self._service)
+        set_reorg_sign(self._reorg_jobs, int(kwargs["start_block"]), self._service, int(kwargs["end_block"]))
         self._should_reorg_type.add(Block.type())
         self._should_reorg = True
 
@@ -113,8 +112,8 @@ class ExportBlocksJob(BaseExportJob):
         self._collect_items(BlockTsMapper.type(), [BlockTsMapper((ts, block)) for ts, block in ts_dict.items()])
 
 
-def blocks_rpc_requests(make_request, block_number_batch, is_batch):
-    block_number_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch, True))
+def blocks_rpc_requests(make_request, block_number_batch, is_batch, include_transactions=True):
+    block_number_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch, include_transactions))
 
     if is_batch:
         response = make_request(params=orjson.dumps(block_number_rpc))
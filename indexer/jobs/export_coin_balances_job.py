@@ -1,8 +1,8 @@
-import json
 import logging
 from dataclasses import dataclass
 from typing import List
 
+import orjson
 from eth_utils import to_int
 
 from common.utils.exception_control import RPCNotReachable
@@ -10,9 +10,11 @@ from enumeration.record_level import RecordLevel
 from indexer.domain.block import Block
 from indexer.domain.coin_balance import CoinBalance
 from indexer.domain.contract_internal_transaction import ContractInternalTransaction
+from indexer.domain.trace import Trace
 from indexer.domain.transaction import Transaction
 from indexer.executors.batch_work_executor import BatchWorkExecutor
 from indexer.jobs.base_job import BaseExportJob
+from indexer.utils.coin_balance_deriver import CoinBalanceDeriver
 from indexer.utils.exception_recorder import ExceptionRecorder
 from indexer.utils.json_rpc_requests import generate_get_balance_json_rpc
 from indexer.utils.rpc_utils import rpc_response_to_result, zip_rpc_response
@@ -30,7 +32,7 @@ class AddressRecord:
 
 # Exports coin balances
 class ExportCoinBalancesJob(BaseExportJob):
-    dependency_types = [Block, ContractInternalTransaction]
+    dependency_types = [Block, Trace, ContractInternalTransaction]
     output_types = [CoinBalance]
     able_to_reorg = True
 
@@ -44,7 +46,27 @@ class ExportCoinBalancesJob(BaseExportJob):
         )
         self._is_batch = kwargs["batch_size"] > 1
 
+        balance_source = self.user_defined_config.get("balance_source", "rpc")
+        if balance_source == "derive":
+            self._deriver = CoinBalanceDeriver(
+                reconcile_interval=self.user_defined_config.get("reconcile_interval", 10000),
+                max_cached_addresses=self.user_defined_config.get("max_cached_addresses", 1000000),
+            )
+        elif balance_source == "rpc":
+            self._deriver = None
+        else:
+            raise ValueError(f"Unknown coin balance source: {balance_source}, it should be rpc or derive")
+
     def _collect(self, **kwargs):
+        if self._deriver is not None and not self._reorg:
+            coin_balances = self._deriver.derive(
+                self._data_buff[Block.type()],
+                self._data_buff[Trace.type()],
+                self._fetch_coin_balances,
+            )
+            self._collect_items(CoinBalance.type(), [CoinBalance(coin_balance) for coin_balance in coin_balances])
+            return
+
         transactions = [transaction for block in self._data_buff[Block.type()] for transaction in block.transactions]
         coin_addresses = distinct_addresses(
             self._data_buff[Block.type()],
@@ -62,6 +84,18 @@ class ExportCoinBalancesJob(BaseExportJob):
         for coin_balance in coin_balances:
             self._collect_item(CoinBalance.type(), CoinBalance(coin_balance))
 
+    def _fetch_coin_balances(self, coin_addresses):
+        coin_balances = []
+        self._batch_work_executor.execute(
+            coin_addresses,
+            lambda addresses: coin_balances.extend(
+                coin_balances_rpc_requests(self._batch_web3_provider.make_request, addresses, self._is_batch)
+            ),
+            total_items=len(coin_addresses),
+        )
+        self._batch_work_executor.wait()
+        return coin_balances
+
     def _process(self, **kwargs):
         self._data_buff[CoinBalance.type()].sort(key=lambda x: (x.block_number, x.address))
 
@@ -123,9 +157,9 @@ def coin_balances_rpc_requests(make_requests, addresses, is_batch):
     coin_balance_rpc = list(generate_get_balance_json_rpc(addresses))
 
     if is_batch:
-        response = make_requests(params=json.dumps(coin_balance_rpc))
+        response = make_requests(params=orjson.dumps(coin_balance_rpc))
     else:
-        response = [make_requests(params=json.dumps(coin_balance_rpc[0]))]
+        response = [make_requests(params=orjson.dumps(coin_balance_rpc[0]))]
 
     coin_balances = []
     for data in list(zip_rpc_response(addresses, response)):
@@ -17,6 +17,7 @@ class ExportReorgJob(BaseJob):
 
     def _process(self, **kwargs):
         block_number = int(kwargs["start_block"])
+        end_block = int(kwargs.get("end_block", block_number))
         conn = self._service.get_conn()
         cur = conn.cursor()
 
@@ -25,10 +26,10 @@ class ExportReorgJob(BaseJob):
                 if len(self._data_buff[key]) > 0:
                     items = self._data_buff[key]
                     domain = type(items[0])
-                    if domain.__name__ not in domain_model_mapping:
+                    if domain not in domain_model_mapping:
                         continue
 
-                    pg_config = domain_model_mapping[domain.__name__]
+                    pg_config = domain_model_mapping[domain]
 
                     table = pg_config["table"]
                     do_update = pg_config["conflict_do_update"]
@@ -46,7 +47,7 @@ class ExportReorgJob(BaseJob):
                     insert_stmt = sql_insert_statement(table, do_update, columns, where_clause=update_strategy)
 
                     if table.__tablename__ != "blocks":
-                        cur.execute(self._build_clean_sql(table.__tablename__, block_number))
+                        cur.execute(self._build_clean_sql(table.__tablename__, block_number, end_block))
 
                     execute_values(cur, insert_stmt, values, page_size=500)
 
@@ -61,5 +62,6 @@ class ExportReorgJob(BaseJob):
         self._data_buff.clear()
 
     @staticmethod
-    def _build_clean_sql(table, block_number):
-        return f"DELETE FROM {table} WHERE block_number={block_number} AND reorg=TRUE"
+    def _build_clean_sql(table, block_number, end_block=None):
+        end_block = block_number if end_block is None else end_block
+        return f"DELETE FROM {table} WHERE block_number BETWEEN {block_number} AND {end_block} AND reorg=TRUE"
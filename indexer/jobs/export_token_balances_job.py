@@ -50,11 +50,22 @@ class ExportTokenBalancesJob(BaseExportJob):
         self._is_batch = kwargs["batch_size"] > 1
         self._is_multi_call = kwargs["multicall"]
         self.token_fetcher = TokenFetcher(self._web3, kwargs)
+        self._balance_granularity = self._plan_balance_granularity()
+
+    def _plan_balance_granularity(self):
+        # Historical balances are needed when TokenBalance itself is exported or consumed by a downstream job,
+        # otherwise only the last touch of every holder matters for CurrentTokenBalance.
+        if TokenBalance in self._required_output_types or TokenBalance in self._required_dependency_types:
+            granularity = int(self.user_defined_config.get("history_balance_granularity", 1))
+            if granularity < 1:
+                raise ValueError(f"history_balance_granularity should be a positive integer, got {granularity}")
+            return granularity
+        return None
 
     @calculate_execution_time
     def _collect(self, **kwargs):
         token_transfers = self._collect_all_token_transfers()
-        parameters = extract_token_parameters(token_transfers)
+        parameters = extract_token_parameters(token_transfers, granularity=self._balance_granularity)
         self._collect_batch(parameters)
 
     @calculate_execution_time
@@ -113,23 +124,35 @@ def encode_balance_abi_parameter(address, token_type, token_id):
 def extract_token_parameters(
     token_transfers: List[Union[ERC20TokenTransfer, ERC721TokenTransfer, ERC1155TokenTransfer]],
     block_number: Union[Optional[int], str] = None,
+    granularity: Optional[int] = 1,
 ):
-    origin_parameters = set()
+    """
+    Plan one balance query per (holder, token_address, token_id) and block window.
+
+    granularity: the window size in blocks, the last touch inside each window is queried.
+                 1 keeps every touched block, None keeps only the last touch of the whole batch.
+    """
+    origin_parameters = {}
     token_parameters = []
     for transfer in token_transfers:
-        common_params = {
-            "token_address": transfer.token_address,
-            "token_id": (transfer.token_id if isinstance(transfer, ERC1155TokenTransfer) else None),
-            "token_type": transfer.token_type,
-            "block_number": transfer.block_number if block_number is None else block_number,
-            "block_timestamp": transfer.block_timestamp,
-        }
-        if transfer.from_address != ZERO_ADDRESS:
-            origin_parameters.add(TokenBalanceParam(address=transfer.from_address, **common_params))
-        if transfer.to_address != ZERO_ADDRESS:
-            origin_parameters.add(TokenBalanceParam(address=transfer.to_address, **common_params))
-
-    for parameter in origin_parameters:
+        token_id = transfer.token_id if isinstance(transfer, ERC1155TokenTransfer) else None
+        window = transfer.block_number // granularity if granularity else None
+        for address in (transfer.from_address, transfer.to_address):
+            if address == ZERO_ADDRESS:
+                continue
+            key = (address, transfer.token_address, token_id, window)
+            touched = origin_parameters.get(key)
+            if touched is None or touched.block_number < transfer.block_number:
+                origin_parameters[key] = TokenBalanceParam(
+                    address=address,
+                    token_address=transfer.token_address,
+                    token_id=token_id,
+                    token_type=transfer.token_type,
+                    block_number=transfer.block_number,
+                    block_timestamp=transfer.block_timestamp,
+                )
+
+    for parameter in origin_parameters.values():
         token_parameters.append(
             {
                 "address": parameter.address,
@@ -14,8 +14,14 @@ from indexer.domain.trace import Trace
 from indexer.executors.batch_work_executor import BatchWorkExecutor
 from indexer.jobs.base_job import BaseExportJob
 from indexer.utils.exception_recorder import ExceptionRecorder
-from indexer.utils.json_rpc_requests import generate_trace_block_by_number_json_rpc
-from indexer.utils.rpc_utils import rpc_response_to_result, zip_rpc_response
+from indexer.utils.rpc_utils import rpc_response_to_result
+from indexer.utils.trace_sources import (
+    TRACE_SOURCE_AUTO,
+    CallTracerSource,
+    TraceSource,
+    detect_trace_source,
+    get_trace_source,
+)
 
 logger = logging.getLogger(__name__)
 exception_recorder = ExceptionRecorder()
@@ -38,7 +44,15 @@ class ExportTracesJob(BaseExportJob):
         )
         self._is_batch = kwargs["debug_batch_size"] > 1
 
+        trace_source = self.user_defined_config.get("trace_source", TRACE_SOURCE_AUTO)
+        self._trace_source = None if trace_source == TRACE_SOURCE_AUTO else get_trace_source(trace_source)
+
     def _collect(self, **kwargs):
+        if self._trace_source is None and self._data_buff[Block.type()]:
+            self._trace_source = detect_trace_source(
+                self._batch_web3_provider.make_request, self._data_buff[Block.type()][0].number
+            )
+
         self._batch_work_executor.execute(
             self._data_buff[Block.type()],
             self._collect_batch,
@@ -48,20 +62,20 @@ class ExportTracesJob(BaseExportJob):
         self._batch_work_executor.wait()
 
     def _collect_batch(self, blocks):
-        traces = traces_rpc_requests(
+        traces, internal_transactions = [], []
+        for trace in traces_rpc_requests(
             self._batch_web3_provider.make_request,
             [dataclass_to_dict(block) for block in blocks],
             self._is_batch,
-        )
+            self._trace_source,
+        ):
+            traces.append(trace)
+            if trace.is_contract_creation() or trace.is_transfer_value():
+                internal_transactions.append(ContractInternalTransaction.from_trace(trace))
 
-        for trace in traces:
-            trace_entity = Trace.from_rpc(trace)
-            self._collect_item(Trace.type(), trace_entity)
-            if trace_entity.is_contract_creation() or trace_entity.is_transfer_value():
-                self._collect_item(
-                    ContractInternalTransaction.type(),
-                    ContractInternalTransaction.from_rpc(trace),
-                )
+        # collected once the whole batch is extracted, a failed batch is retried without leaving duplicates
+        self._collect_items(Trace.type(), traces)
+        self._collect_items(ContractInternalTransaction.type(), internal_transactions)
 
     def _process(self, **kwargs):
         self._data_buff[Trace.type()].sort(key=lambda x: (x.block_number, x.transaction_index, x.trace_index))
@@ -85,98 +99,25 @@ class ExportTracesJob(BaseExportJob):
             )
 
 
-class ExtractTraces:
-
-    def __init__(self):
-        self._trace_idx = 0
-
-    def geth_trace_to_traces(self, geth_trace):
-        transaction_traces = geth_trace["transaction_traces"]
-
-        traces = []
-
-        for tx_index, tx in enumerate(transaction_traces):
-            self._trace_idx = 0
-
-            traces.extend(self._iterate_transaction_trace(geth_trace, tx_index, tx["txHash"], tx["result"]))
-
-        return traces
-
-    def _iterate_transaction_trace(self, geth_trace, tx_index, tx_hash, tx_trace, trace_address=[]):
-        block_number = geth_trace["block_number"]
-        transaction_index = tx_index
-        trace_index = self._trace_idx
-
-        self._trace_idx += 1
-        trace_id = f"{block_number}_{transaction_index}_{trace_index}"
-
-        # lowercase for compatibility with parity traces
-        trace_type = tx_trace.get("type").lower()
-        call_type = ""
-        calls = tx_trace.get("calls", [])
-        if trace_type == "selfdestruct":
-            # rename to suicide for compatibility with parity traces
-            trace_type = "suicide"
-
-        elif trace_type in ("call", "callcode", "delegatecall", "staticcall"):
-            call_type = trace_type
-            trace_type = "call"
-
-        trace = {
-            "trace_id": trace_id,
-            "from_address": tx_trace.get("from"),
-            "to_address": tx_trace.get("to"),
-            "input": tx_trace.get("input"),
-            "output": tx_trace.get("output"),
-            "value": tx_trace.get("value"),
-            "gas": tx_trace.get("gas"),
-            "gas_used": tx_trace.get("gasUsed"),
-            "trace_type": trace_type,
-            "call_type": call_type,
-            "subtraces": len(calls),
-            "trace_address": trace_address,
-            "error": tx_trace.get("error"),
-            "status": 1 if tx_trace.get("error") is None else 0,
-            "block_number": block_number,
-            "block_hash": geth_trace["block_hash"],
-            "block_timestamp": geth_trace["block_timestamp"],
-            "transaction_index": tx_index,
-            "transaction_hash": tx_hash,
-            "trace_index": self._trace_idx,
-        }
-
-        result = [trace]
-
-        for call_index, call_trace in enumerate(calls):
-            result.extend(
-                self._iterate_transaction_trace(
-                    geth_trace,
-                    tx_index,
-                    tx_hash,
-                    call_trace,
-                    trace_address + [call_index],
-                )
-            )
-
-        return result
-
-
-def traces_rpc_requests(make_requests, blocks: List[dict], is_batch):
-    block_numbers = []
-    for block in blocks:
-        block["number"] = block["number"]
-        block_numbers.append(block["number"])
-    trace_block_rpc = list(generate_trace_block_by_number_json_rpc(block_numbers))
+def traces_rpc_requests(make_requests, blocks: List[dict], is_batch, trace_source: TraceSource = None):
+    """
+    Trace the blocks and yield their Trace entities, block by block. The responses of a block are released
+    as soon as its traces are extracted, so only the traces and the responses not yet flattened are kept.
+    """
+    trace_source = trace_source or CallTracerSource()
+    trace_block_rpc = trace_source.rpc_requests([block["number"] for block in blocks])
 
     if is_batch:
         responses = make_requests(params=orjson.dumps(trace_block_rpc))
     else:
         responses = [make_requests(params=orjson.dumps(trace_block_rpc[0]))]
+    responses = {response["id"]: response for response in responses}
 
-    total_traces = []
-    for block, response in zip_rpc_response(blocks, responses, index="number"):
+    for block in blocks:
         block_number = block["number"]
-        transactions = block["transactions"]
+        response = responses.pop(block_number, None)
+        if response is None:
+            continue
         try:
             result = rpc_response_to_result(response)
         except HistoryUnavailableError as e:
@@ -187,34 +128,17 @@ def traces_rpc_requests(make_requests, blocks: List[dict], is_batch):
                 message=e.message,
                 level=RecordLevel.ERROR,
             )
-            trace = {
-                "trace_id": f"{to_int(hexstr=block_number)}_?_?",
-                "block_number": to_int(hexstr=block_number),
-                "block_hash": block["hash"],
-                "block_timestamp": block["timestamp"],
-                "transaction_index": 0,
-                "trace_index": 0,
-            }
-
-            total_traces.append(trace)
+            yield Trace.from_rpc(
+                {
+                    "trace_id": f"{to_int(hexstr=block_number)}_?_?",
+                    "block_number": to_int(hexstr=block_number),
+                    "block_hash": block["hash"],
+                    "block_timestamp": block["timestamp"],
+                    "transaction_index": 0,
+                    "trace_index": 0,
+                }
+            )
             continue
+        del response
 
-        if len(result) > 0 and "txHash" not in result[0]:
-            if len(result) != len(transactions):
-                raise ValueError("The number of traces is wrong " + str(result))
-
-            for idx, trace_result in enumerate(result):
-                trace_result["txHash"] = transactions[idx]["hash"]
-
-        geth_trace = {
-            "block_number": block_number,
-            "block_hash": block["hash"],
-            "block_timestamp": block["timestamp"],
-            "transaction_traces": result,
-        }
-        trace_spliter = ExtractTraces()
-        traces = trace_spliter.geth_trace_to_traces(geth_trace)
-
-        total_traces.extend(traces)
-
-    return total_traces
+        yield from trace_source.iter_block_traces(block, result)
@@ -0,0 +1,135 @@
+import ast
+import logging
+import os
+from collections import defaultdict
+from importlib import import_module
+from typing import List
+
+from common.utils.registry_manifest import cached_section, project_root
+from indexer.domain import Domain, domains_mapping
+from indexer.jobs.base_job import BaseJob, generate_dependency_types
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_MODULES_PACKAGE = "indexer.modules"
+
+
+def custom_module_files():
+    package_dir = os.path.join(project_root, *CUSTOM_MODULES_PACKAGE.split("."))
+    return [
+        os.path.join(directory, file)
+        for directory, _, files in os.walk(package_dir)
+        for file in files
+        if file.endswith(".py")
+    ]
+
+
+def _module_name(path):
+    module = os.path.relpath(path, project_root)[:-3].replace(os.path.sep, ".")
+    return module[: -len(".__init__")] if module.endswith(".__init__") else module
+
+
+def _base_names(node: ast.ClassDef):
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            yield base.id
+        elif isinstance(base, ast.Attribute):
+            yield base.attr
+
+
+def job_candidate_modules(files):
+    """
+    The modules defining a class that derives, directly or through other classes of the custom modules,
+    from a base whose name ends with Job. Endpoints and helpers are never imported this way.
+    """
+    classes = {}
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                classes[(path, node.name)] = set(_base_names(node))
+
+    job_names, candidates = set(), set()
+    changed = True
+    while changed:
+        changed = False
+        for (path, name), bases in classes.items():
+            if name not in job_names and any(base.endswith("Job") or base in job_names for base in bases):
+                job_names.add(name)
+                candidates.add(_module_name(path))
+                changed = True
+    return sorted(candidates)
+
+
+def build_job_manifest():
+    for module in job_candidate_modules(custom_module_files()):
+        import_module(module)
+
+    jobs = {}
+    for cls in BaseJob.discover_jobs():
+        if not cls.__module__.startswith(CUSTOM_MODULES_PACKAGE + "."):
+            continue
+        generate_dependency_types(cls)
+        jobs[f"{cls.__module__}.{cls.__name__}"] = {
+            "module": cls.__module__,
+            "output_types": [output_type.type() for output_type in cls.output_types],
+            "dependency_types": [dependency.type() for dependency in cls.dependency_types],
+        }
+    return jobs
+
+
+def job_manifest():
+    return cached_section(f"jobs:{CUSTOM_MODULES_PACKAGE}", custom_module_files(), build_job_manifest)
+
+
+def import_job_modules(output_types: List[Domain] = None):
+    """
+    Import the custom modules whose jobs produce the given output types or their dependencies,
+    or every module defining a job when output_types is None.
+    """
+    if output_types is None:
+        return _import_modules(None)
+    return _import_modules([output_type.type() for output_type in output_types])
+
+
+def import_domain_types(type_names: List[str]):
+    """
+    Resolve domain types by their snake case name, importing only the domain or job modules defining them.
+    """
+    domains = Domain.get_all_domain_dict()
+    missing = [name for name in type_names if name not in domains]
+    if missing:
+        # importing a domain module, or a job module producing the type, registers the domain class
+        for name in missing:
+            domains_mapping.get(name)
+        _import_modules(missing)
+        domains = Domain.get_all_domain_dict()
+    return {name: domains[name] for name in type_names if name in domains}
+
+
+def _import_modules(type_names):
+    jobs = job_manifest()
+    if type_names is None:
+        modules = {job["module"] for job in jobs.values()}
+    else:
+        producers = defaultdict(list)
+        for job in jobs.values():
+            for output_type in job["output_types"]:
+                producers[output_type].append(job)
+
+        modules, visited = set(), set()
+        queue = list(type_names)
+        while queue:
+            output_type = queue.pop()
+            if output_type in visited:
+                continue
+            visited.add(output_type)
+            for job in producers[output_type]:
+                modules.add(job["module"])
+                queue.extend(job["dependency_types"])
+
+    for module in sorted(modules):
+        import_module(module)
+    logger.info(f"Imported {len(modules)} of {len(set(job['module'] for job in jobs.values()))} custom job modules")
+    return modules
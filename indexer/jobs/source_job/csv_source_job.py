@@ -1,10 +1,6 @@
 import logging
-import os
-from collections import defaultdict
 
-import pandas
-
-from indexer.domain import dict_to_dataclass, domains_mapping
+from indexer.domain import domains_mapping
 from indexer.domain.block import Block, UpdateBlockInternalCount
 from indexer.domain.block_ts_mapper import BlockTsMapper
 from indexer.domain.coin_balance import CoinBalance
@@ -26,6 +22,7 @@ from indexer.domain.trace import Trace
 from indexer.domain.transaction import Transaction
 from indexer.executors.batch_work_executor import BatchWorkExecutor
 from indexer.jobs.base_job import BaseSourceJob
+from indexer.jobs.source_job.file_source import FileSource
 from indexer.utils.parameter_utils import extract_path_from_parameter
 
 logger = logging.getLogger(__name__)
@@ -65,44 +62,20 @@ class CSVSourceJob(BaseSourceJob):
             kwargs["max_workers"],
             job_name=self.__class__.__name__,
         )
-        self._dataclass_mapping = scan_datas_file(self._source_path)
+        self._file_source = FileSource(self._source_path)
 
     def _collect(self, **kwargs):
         self._start_block = int(kwargs["start_block"])
         self._end_block = int(kwargs["end_block"])
 
-        for key in self._dataclass_mapping.keys():
-            target_files = []
-            for domain_info in self._dataclass_mapping[key]:
-                data_range = domain_info["data_range"]
-                if self._start_block >= data_range[0] and self._end_block <= data_range[1]:
-                    target_files.append(
-                        os.path.join(domain_info["dir_path"], f"{key}-{data_range[0]}-{data_range[1]}.csv")
-                    )
-
-            for file in target_files:
-                items = pandas.read_csv(file).to_dict(orient="records")
-                for item in items:
-                    if (
-                        ("number" in item and self._start_block <= item["number"] <= self._end_block)
-                        or "block_number" in item
-                        and self._start_block <= item["block_number"] <= self._end_block
-                    ):
-                        self._collect_item(key, dict_to_dataclass(item, domains_mapping[key]))
-
-
-def scan_datas_file(files_path) -> dict[str, list[dict]]:
-    dataclass_mapping = defaultdict(list)
-    for root, dirs, files in os.walk(files_path):
-        for file in files:
-            name_compose = file[:-4].split("-")
-            domain = name_compose[0]
-            blocks_range = (int(name_compose[1]), int(name_compose[2]))
-            dataclass_mapping[domain].append(
-                {
-                    "dir_path": root,
-                    "data_range": blocks_range,
-                }
-            )
-
-    return dataclass_mapping
+        for key in self._file_source.domains():
+            if key not in domains_mapping:
+                continue
+            try:
+                items = self._file_source.read(key, domains_mapping[key], self._start_block, self._end_block)
+            except FileNotFoundError:
+                # a segment was merged into its window file since the files were listed
+                self._file_source.refresh()
+                items = self._file_source.read(key, domains_mapping[key], self._start_block, self._end_block)
+            if items:
+                self._collect_items(key, items)
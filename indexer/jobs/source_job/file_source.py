@@ -0,0 +1,265 @@
+import ast
+import bisect
+import os
+import typing
+from collections import OrderedDict, defaultdict
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Dict, List, Union, get_args, get_origin
+
+import orjson
+import pandas
+
+from indexer.domain import dict_to_dataclass
+from indexer.exporters.file_manifest import MANIFEST_FILE, manifest_files
+from indexer.exporters.segmented_file_item_exporter import block_key
+
+FILE_EXTENSIONS = ("csv", "parquet")
+DEFAULT_CACHED_FILES = 16
+
+
+def scan_datas_file(files_path) -> Dict[str, List[dict]]:
+    """
+    The files of every domain with their block ranges, listed by the manifest of the domain directory when
+    it was written by a segmented or parquet exporter, and parsed from the {domain}-{start}-{end}.csv names of
+    older exports otherwise. Files without a block range are skipped.
+    """
+    dataclass_mapping = defaultdict(list)
+    for root, dirs, files in os.walk(files_path):
+        if MANIFEST_FILE in files:
+            dirs.clear()
+            domain = os.path.basename(root)
+            for domain_info in manifest_files(root, FILE_EXTENSIONS):
+                if None not in domain_info["data_range"]:
+                    dataclass_mapping[domain].append(domain_info)
+            continue
+
+        for file in files:
+            if not file.endswith(".csv"):
+                continue
+            name_compose = file[:-4].split("-")
+            if len(name_compose) != 3:
+                continue
+            domain = name_compose[0]
+            blocks_range = (int(name_compose[1]), int(name_compose[2]))
+            dataclass_mapping[domain].append(
+                {
+                    "path": os.path.join(root, file),
+                    "data_range": blocks_range,
+                }
+            )
+
+    return dataclass_mapping
+
+
+class FileRangeIndex:
+    """
+    The files of every domain sorted by their first block. A lookup bisects the first blocks and walks back
+    while the running maximum of the last blocks still reaches the range, so it returns every file overlapping
+    the range, partially or not, without scanning the others.
+    """
+
+    def __init__(self, dataclass_mapping: Dict[str, List[dict]]):
+        self._files = {}
+        for domain, domain_infos in dataclass_mapping.items():
+            domain_infos = sorted(domain_infos, key=lambda info: info["data_range"])
+            starts = [info["data_range"][0] for info in domain_infos]
+            max_ends = []
+            for info in domain_infos:
+                max_ends.append(max(info["data_range"][1], max_ends[-1] if max_ends else info["data_range"][1]))
+            self._files[domain] = (starts, max_ends, domain_infos)
+
+    def domains(self):
+        return list(self._files.keys())
+
+    def overlapping(self, domain, start_block, end_block) -> List[dict]:
+        if domain not in self._files:
+            return []
+        starts, max_ends, domain_infos = self._files[domain]
+        index = bisect.bisect_right(starts, end_block) - 1
+        result = []
+        while index >= 0 and max_ends[index] >= start_block:
+            if domain_infos[index]["data_range"][1] >= start_block:
+                result.append(domain_infos[index])
+            index -= 1
+        result.reverse()
+        return result
+
+
+def _is_missing(value):
+    # pandas reads empty csv cells as nan
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _parse_text(value):
+    # parquet files store lists, dicts and nested domains as json, csv files as their python repr
+    if not isinstance(value, str):
+        return value
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+
+
+def _field_converter(field_type):
+    origin, args = get_origin(field_type), get_args(field_type)
+    if origin is Union and type(None) in args and len(args) == 2:
+        field_type = args[0] if args[1] is type(None) else args[1]
+        origin, args = get_origin(field_type), get_args(field_type)
+
+    if origin is list:
+        item_type = args[0] if args else None
+        if is_dataclass(item_type):
+            return lambda value: [
+                dict_to_dataclass(item, item_type) if isinstance(item, dict) else item for item in _parse_text(value)
+            ]
+        return lambda value: _parse_text(value) if value else []
+    if origin is dict or field_type is dict:
+        return _parse_text
+    if is_dataclass(field_type):
+        return lambda value: dict_to_dataclass(_parse_text(value), field_type)
+    if field_type is int:
+        # integers beyond the int64 range are read as text, ints with empty cells as floats
+        return lambda value: int(value) if isinstance(value, (str, float)) else value
+    return None
+
+
+class DomainBuilder:
+    """
+    Build the domains of a file from its rows, with the field conversions resolved once per file instead of
+    once per value like dict_to_dataclass does. Missing fields keep their
+    dataclass defaults, and otherwise get the ones dict_to_dataclass gives them.
+    """
+
+    def __init__(self, domain_class, columns):
+        self.domain_class = domain_class
+        try:
+            hints = typing.get_type_hints(domain_class)
+        except Exception:
+            hints = {}
+        field_types = {field.name: hints.get(field.name, field.type) for field in fields(domain_class)}
+        defaults = {field.name for field in fields(domain_class) if field.default is not MISSING}
+        defaults.update(field.name for field in fields(domain_class) if field.default_factory is not MISSING)
+
+        self.converters = [
+            (index, column, _field_converter(field_types[column]))
+            for index, column in enumerate(columns)
+            if column in field_types
+        ]
+        self.missing = []
+        for name, field_type in field_types.items():
+            if name in columns or name in defaults:
+                continue
+            if get_origin(field_type) is Union and type(None) in get_args(field_type):
+                self.missing.append((name, lambda: None))
+            else:
+                self.missing.append((name, field_type))
+
+    def build(self, row):
+        values = {}
+        for index, name, converter in self.converters:
+            value = row[index]
+            if _is_missing(value):
+                values[name] = None
+            else:
+                values[name] = converter(value) if converter else value
+        for name, factory in self.missing:
+            values[name] = factory()
+        return self.domain_class(**values)
+
+    def build_all(self, rows) -> list:
+        return [self.build(row) for row in rows]
+
+
+class FileSource:
+    """
+    Read the domains of a block range from exported csv and parquet files.
+
+    Only the files overlapping the range are read, only the columns of the domain are parsed, and rows are
+    selected by block with a vectorized filter for csv files and a row group filter for parquet files.
+    The parsed columns of the most recently read csv files are kept, a window file spanning many batches is
+    parsed once.
+    """
+
+    def __init__(self, files_path, cached_files=DEFAULT_CACHED_FILES):
+        self.files_path = files_path
+        self.cached_files = cached_files
+        self._cache = OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        self.index = FileRangeIndex(scan_datas_file(self.files_path))
+        self._cache.clear()
+
+    def domains(self):
+        return self.index.domains()
+
+    def read(self, domain, domain_class, start_block, end_block) -> list:
+        result = []
+        for domain_info in self.index.overlapping(domain, start_block, end_block):
+            path = domain_info["path"]
+            inside = start_block <= domain_info["data_range"][0] and domain_info["data_range"][1] <= end_block
+            if ".parquet" in os.path.basename(path):
+                result.extend(self._read_parquet(path, domain_class, None if inside else (start_block, end_block)))
+            else:
+                result.extend(self._read_csv(path, domain_class, None if inside else (start_block, end_block)))
+        return result
+
+    def _read_csv(self, path, domain_class, block_range):
+        frame = self._cache.get(path)
+        if frame is None:
+            names = set(domain_class.__dataclass_fields__)
+            frame = pandas.read_csv(path, usecols=lambda column: column in names)
+            self._cache[path] = frame
+            while len(self._cache) > self.cached_files:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(path)
+
+        key = block_key(domain_class)
+        if key is None or key not in frame.columns:
+            return []
+        if block_range is not None:
+            frame = frame[(frame[key] >= block_range[0]) & (frame[key] <= block_range[1])]
+        builder = DomainBuilder(domain_class, list(frame.columns))
+        return builder.build_all(frame.itertuples(index=False, name=None))
+
+    def _read_parquet(self, path, domain_class, block_range):
+        from indexer.exporters.parquet_file_item_exporter import _import_pyarrow
+
+        pa, pq = _import_pyarrow()
+        key = block_key(domain_class)
+        schema = pq.read_schema(path)
+        if key is None or key not in schema.names:
+            return []
+        columns = [name for name in schema.names if name in domain_class.__dataclass_fields__]
+        filters = None if block_range is None else [(key, ">=", block_range[0]), (key, "<=", block_range[1])]
+        table = pq.read_table(path, columns=columns, filters=filters)
+
+        builder = DomainBuilder(domain_class, columns)
+        values = [_parquet_column_values(pa, table.column(name)) for name in columns]
+        return builder.build_all(zip(*values))
+
+
+def _hex(value):
+    return None if value is None else "0x" + value.hex()
+
+
+def _parquet_column_values(pa, column) -> list:
+    """
+    The python values of a parquet column, in the types the domains had before the parquet exporter typed them.
+    """
+    arrow_type = column.type
+    if pa.types.is_timestamp(arrow_type):
+        # parquet has no second unit, the seconds come back as milliseconds
+        return column.cast(pa.timestamp("s", tz=arrow_type.tz)).cast(pa.int64()).to_pylist()
+    values = column.to_pylist()
+    if pa.types.is_binary(arrow_type):
+        return [_hex(value) for value in values]
+    if pa.types.is_list(arrow_type) and pa.types.is_binary(arrow_type.value_type):
+        return [None if value is None else [_hex(item) for item in value] for value in values]
+    if pa.types.is_decimal(arrow_type):
+        return [None if value is None else int(value) for value in values]
+    return values
@@ -1,13 +1,14 @@
 import copy
 import inspect
 import logging
+import threading
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
-from queue import Queue
+from queue import Empty, Full, Queue
 from typing import List, Type, Union, get_args, get_origin
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, select
 
 from common.converter.pg_converter import domain_model_mapping
 from common.models.blocks import Blocks
@@ -35,6 +36,9 @@ from indexer.utils.collection_utils import distinct_collections_by_group, flatte
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_STREAM_CHUNK_SIZE = 5000
+DEFAULT_STREAM_PREFETCH_CHUNKS = 4
+
 
 class PGSourceJob(BaseSourceJob):
     output_types = [
@@ -51,6 +55,10 @@ class PGSourceJob(BaseSourceJob):
         self.post_build = defaultdict()
         self.domain_mapping = defaultdict(dict)
         self.pg_datas = defaultdict(list)
+        self._stream_chunk_size = self.user_defined_config.get("stream_chunk_size", DEFAULT_STREAM_CHUNK_SIZE)
+        self._stream_prefetch_chunks = self.user_defined_config.get(
+            "stream_prefetch_chunks", DEFAULT_STREAM_PREFETCH_CHUNKS
+        )
         self._filters = flatten(kwargs.get("filters", []))
         self._is_filter = kwargs.get("is_filter", False)
         self._specification = AlwaysFalseSpecification() if self._is_filter else AlwaysTrueSpecification()
@@ -69,7 +77,7 @@ class PGSourceJob(BaseSourceJob):
         start_timestamp = self._query_timestamp_with_block(start_block)
         end_timestamp = self._query_timestamp_with_block(end_block)
 
-        self.pg_datas.clear()
+        self._close_streams()
         if self._is_filter:
             filter_blocks = set()
             logs_transaction_hash = set()
@@ -176,24 +184,29 @@ class PGSourceJob(BaseSourceJob):
         self._collect_from_pg(blocks, start_timestamp, end_timestamp)
 
     def _collect_from_pg(self, blocks, start_timestamp, end_timestamp):
-
+        # every table streams in the background while the ones before it in the build order are converted
         for output_type in self.output_types:
             table = domain_model_mapping[output_type]["table"]
             if len(self.pg_datas[table]) == 0:
-                start_time = datetime.now()
                 self.pg_datas[table] = self._query_with_blocks(table, blocks, start_timestamp, end_timestamp)
-                self.logger.info(
-                    f"Read {table.__tablename__} from postgres finished. Took {datetime.now() - start_time}"
-                )
 
     def _process(self, **kwargs):
         self.domain_mapping.clear()
-        for output_type in self.build_order:
-            table = domain_model_mapping[output_type]["table"]
-            domains = self._dataclass_build(self.pg_datas[table], output_type)
-            if hasattr(table, "__query_order__"):
-                domains.sort(key=lambda x: tuple(getattr(x, column.name) for column in table.__query_order__))
-            self._data_buff[output_type.type()] = domains
+        try:
+            for output_type in self.build_order:
+                table = domain_model_mapping[output_type]["table"]
+                domains = self._dataclass_build(self.pg_datas[table], output_type)
+                if hasattr(table, "__query_order__"):
+                    domains.sort(key=lambda x: tuple(getattr(x, column.name) for column in table.__query_order__))
+                self._data_buff[output_type.type()] = domains
+        finally:
+            self._close_streams()
+
+    def _close_streams(self):
+        for rows in self.pg_datas.values():
+            if isinstance(rows, PGRowStream):
+                rows.close()
+        self.pg_datas.clear()
 
     def _export(self):
         pass
@@ -211,39 +224,27 @@ class PGSourceJob(BaseSourceJob):
         if len(blocks) == 0:
             return []
 
-        session = self._service.get_service_session()
-        unnest_query = select(func.unnest(blocks).label("block_number")).subquery()
-
-        try:
-            if hasattr(table, "number") and hasattr(table, "timestamp"):
-                sub_table = (
-                    select(table)
-                    .filter(and_(table.timestamp >= start_timestamp, table.timestamp <= end_timestamp))
-                    .subquery(table.__tablename__)
-                )
-
-                result = (
-                    session.query(sub_table).join(unnest_query, sub_table.c.number == unnest_query.c.block_number).all()
-                )
-            elif hasattr(table, "block_number") and hasattr(table, "block_timestamp"):
-                sub_table = (
-                    select(table)
-                    .filter(and_(table.block_timestamp >= start_timestamp, table.block_timestamp <= end_timestamp))
-                    .subquery(table.__tablename__)
-                )
-
-                result = (
-                    session.query(sub_table)
-                    .join(unnest_query, sub_table.c.block_number == unnest_query.c.block_number)
-                    .all()
-                )
-            else:
-                result = []
-
-        finally:
-            session.close()
+        if hasattr(table, "number") and hasattr(table, "timestamp"):
+            block_column, timestamp_column = table.number, table.timestamp
+        elif hasattr(table, "block_number") and hasattr(table, "block_timestamp"):
+            block_column, timestamp_column = table.block_number, table.block_timestamp
+        else:
+            return []
 
-        return result
+        # plain range predicates, so the block number and timestamp indexes bound the scan
+        conditions = [block_column >= blocks[0], block_column <= blocks[-1]]
+        if start_timestamp is not None and end_timestamp is not None:
+            conditions.extend([timestamp_column >= start_timestamp, timestamp_column <= end_timestamp])
+        if len(blocks) < blocks[-1] - blocks[0] + 1:
+            conditions.append(block_column.in_(blocks))
+
+        return PGRowStream(
+            self._service,
+            select(*table.__table__.columns).where(and_(*conditions)),
+            chunk_size=self._stream_chunk_size,
+            prefetch_chunks=self._stream_prefetch_chunks,
+            name=table.__tablename__,
+        )
 
     def _query_logs_filter(self, start_block, end_block, start_timestamp, end_timestamp, log_filter):
         logs = []
@@ -425,6 +426,73 @@ class PGSourceJob(BaseSourceJob):
             self.build_order.append(build_queue.get())
 
 
+class PGRowStream:
+    """
+    The rows of a query read through a server side cursor by a background thread, a chunk at a time.
+
+    At most prefetch_chunks chunks wait in memory, so reading ahead overlaps with converting the rows into
+    domains without holding the whole result. The stream is iterated once, a failed read is raised there.
+    """
+
+    _END = object()
+
+    def __init__(self, service, statement, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, prefetch_chunks=1, name=None):
+        self._service = service
+        self._statement = statement
+        self._chunk_size = chunk_size
+        self._name = name
+        self._queue = Queue(maxsize=max(1, prefetch_chunks))
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._read, name=f"pg-row-stream-{name}", daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._END:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield from chunk
+
+    def close(self):
+        self._closed.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except Empty:
+                pass
+        self._thread.join()
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _read(self):
+        start_time = datetime.now()
+        count = 0
+        session = self._service.get_service_session()
+        try:
+            result = session.execute(
+                self._statement, execution_options={"stream_results": True, "yield_per": self._chunk_size}
+            )
+            for chunk in result.partitions(self._chunk_size):
+                count += len(chunk)
+                if not self._put(chunk):
+                    return
+            logger.info(f"Read {count} rows of {self._name} from postgres finished. Took {datetime.now() - start_time}")
+        except Exception as e:
+            self._put(e)
+        finally:
+            session.close()
+            self._put(self._END)
+
+
 def check_dependency(column_type, target_type) -> (bool, object):
     is_dependent = False
     if get_origin(column_type) is Union:
@@ -384,7 +384,7 @@ class AddressIndexerJob(ExtensionJob):
         token_transfers = self._get_domains([ERC20TokenTransfer, ERC721TokenTransfer, ERC1155TokenTransfer])
 
         # Generate token transfer parameters
-        all_token_parameters = extract_token_parameters(token_transfers, "latest")
+        all_token_parameters = extract_token_parameters(token_transfers, "latest", granularity=None)
         all_token_parameters.sort(key=lambda x: (x["address"], x["token_address"], x.get("token_id") or 0))
         parameters = [
             list(group)[-1]
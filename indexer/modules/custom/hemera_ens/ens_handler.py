@@ -7,6 +7,7 @@
 import logging
 from collections import defaultdict
 from dataclasses import asdict, replace
+from functools import cached_property
 from multiprocessing import Queue
 from typing import List
 
@@ -32,14 +33,27 @@ logger = logging.getLogger(__name__)
 
 class EnsConfLoader:
     def __init__(self, provider=None):
-        self.contract_object_map = None
-        self.event_map = None
-        self.function_map = None
         if not provider:
             provider = "https://ethereum-rpc.publicnode.com"
         self.w3 = Web3(Web3.HTTPProvider(provider))
         self.w3.codec = ABICodec(lifo_registry)
-        self.build_contract_map()
+
+    # the contract objects and signature maps are built on first use rather than at job construction
+    @cached_property
+    def _contract_maps(self):
+        return self.build_contract_map()
+
+    @property
+    def contract_object_map(self):
+        return self._contract_maps[0]
+
+    @property
+    def event_map(self):
+        return self._contract_maps[1]
+
+    @property
+    def function_map(self):
+        return self._contract_maps[2]
 
     def build_contract_map(self):
         contract_object_map = {}
@@ -66,9 +80,7 @@ class EnsConfLoader:
             for function in functions:
                 sig = self.get_function_signature(function)
                 function_map[sig[0:10]] = function
-        self.contract_object_map = contract_object_map
-        self.event_map = event_map
-        self.function_map = function_map
+        return contract_object_map, event_map, function_map
 
     def get_signature_of_event(self, event):
         name = event["name"]
@@ -97,11 +109,20 @@ class EnsHandler:
         self.rss = []
         self.result = Queue()
         self.ens_conf_loader = ens_conf_loader
-        self.contract_object_map = self.ens_conf_loader.contract_object_map
-        self.function_map = self.ens_conf_loader.function_map
-        self.event_map = self.ens_conf_loader.event_map
         self.extractors = [extractor() for extractor in BaseExtractor.__subclasses__()]
 
+    @property
+    def contract_object_map(self):
+        return self.ens_conf_loader.contract_object_map
+
+    @property
+    def function_map(self):
+        return self.ens_conf_loader.function_map
+
+    @property
+    def event_map(self):
+        return self.ens_conf_loader.event_map
+
     def is_ens_address(self, address):
         return address.lower() in self.ens_conf_loader.contract_object_map
 
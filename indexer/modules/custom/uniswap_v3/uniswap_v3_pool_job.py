@@ -94,6 +94,9 @@ class ExportUniSwapV3PoolJob(FilterTransactionDataJob):
                         self._collect_domain(uniswap_v3_pool)
 
     def get_existing_pools(self):
+        if self._service is None:
+            # nothing is stored without a database, e.g. in hemera bench with the void output
+            return []
         session = self._service.Session()
         try:
             pools_orm = session.query(UniswapV3Pools).all()
@@ -212,6 +212,9 @@ class ExportUniSwapV3PoolJob(FilterTransactionDataJob):
         self._collect_domains(list(current_price_dict.values()))
 
     def get_existing_pools(self):
+        if self._service is None:
+            # the pools are requested by rpc instead
+            return {}
         session = self._service.Session()
         try:
             pools_orm = session.query(UniswapV3Pools).all()
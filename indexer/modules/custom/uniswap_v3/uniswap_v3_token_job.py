@@ -321,6 +321,8 @@ class ExportUniSwapV3TokensJob(FilterTransactionDataJob):
         return token0, token1, tick_lower, tick_upper, liquidity, fee
 
     def get_existing_tokens(self):
+        if self._service is None:
+            return []
         session = self._service.get_service_session()
         tokens_orm = session.query(
             UniswapV3Tokens.position_token_address, UniswapV3Tokens.token_id, UniswapV3Tokens.pool_address
@@ -338,6 +340,8 @@ class ExportUniSwapV3TokensJob(FilterTransactionDataJob):
         return position_token_address_token_id_pool_address_dict
 
     def get_existing_pools(self):
+        if self._service is None:
+            return {}
         session = self._service.Session()
         try:
             pools_orm = session.query(UniswapV3Pools).all()
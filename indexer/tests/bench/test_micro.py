@@ -0,0 +1,52 @@
+import orjson
+import pytest
+
+from indexer.bench.micro import BENCHMARKS, DEFAULT_BASELINE, compare, run_benchmarks
+
+
+def report(**results):
+    return {
+        "results": {
+            name: {"items": 1, "ops_per_second": ops, "peak_bytes_per_op": memory}
+            for name, (ops, memory) in results.items()
+        }
+    }
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_compare_flags_slower_and_larger_hot_paths():
+    baseline = report(a=(1000, 100), b=(1000, 100), c=(1000, 100), gone=(10, 10))
+    current = report(a=(950, 100), b=(800, 100), c=(1000, 200))
+
+    rows = {row["name"]: row for row in compare(baseline, current, threshold=0.1, memory_threshold=0.25)}
+
+    assert set(rows) == {"a", "b", "c", "gone"}
+    assert not rows["a"]["regressed"]
+    assert rows["b"]["regressed"] and rows["b"]["speed_change"] == -0.2
+    assert rows["c"]["regressed"] and rows["c"]["memory_change"] == 1.0
+    # a renamed or removed hot path fails the gate
+    assert rows["gone"]["regressed"] and rows["gone"]["ops_per_second"] is None
+
+    # unless it was left out of the run on purpose
+    assert [row["name"] for row in compare(baseline, current, names=["a"])] == ["a"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_the_committed_baseline_covers_every_hot_path():
+    with open(DEFAULT_BASELINE, "rb") as f:
+        baseline = orjson.loads(f.read())
+
+    assert set(baseline["results"]) == set(BENCHMARKS)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_every_hot_path_runs():
+    result = run_benchmarks(min_time=0.001, repeat=1)
+
+    assert set(result["results"]) == set(BENCHMARKS)
+    for name, measurement in result["results"].items():
+        assert measurement["items"] > 0, name
+        assert measurement["ops_per_second"] > 0, name
@@ -0,0 +1,66 @@
+import orjson
+import pytest
+import requests
+
+from indexer.bench.rpc_server import NOT_RECORDED_ERROR, RecordedResponses, StandInRPCServer
+
+
+def post(uri, payload):
+    return requests.post(uri, data=orjson.dumps(payload), headers={"Content-Type": "application/json"})
+
+
+@pytest.fixture
+def responses():
+    return RecordedResponses(
+        [
+            {"method": "eth_chainId", "params": [], "result": "0x1"},
+            {"method": "eth_getBlockByNumber", "params": ["0x10", True], "result": {"number": "0x10"}},
+            {"method": "eth_call", "params": [{"to": "0xab", "data": "0x01"}, "0x10"], "result": "0x02"},
+        ]
+    )
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_replays_single_and_batch_requests(responses):
+    with StandInRPCServer(responses) as server:
+        single = post(server.uri, {"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 7}).json()
+        batch = post(
+            server.uri,
+            [
+                {"jsonrpc": "2.0", "method": "eth_getBlockByNumber", "params": ["0x10", True], "id": 1},
+                # param keys may come in any order
+                {"jsonrpc": "2.0", "method": "eth_call", "params": [{"data": "0x01", "to": "0xab"}, "0x10"], "id": 2},
+                {"jsonrpc": "2.0", "method": "eth_getBlockByNumber", "params": ["0x11", True], "id": 3},
+            ],
+        ).json()
+
+    assert single == {"jsonrpc": "2.0", "id": 7, "result": "0x1"}
+    assert [item["id"] for item in batch] == [1, 2, 3]
+    assert batch[0]["result"] == {"number": "0x10"}
+    assert batch[1]["result"] == "0x02"
+    assert batch[2]["error"]["code"] == NOT_RECORDED_ERROR
+    assert server.stats() == {"http_requests": 2, "rpc_calls": 4, "misses": 1, "injected_errors": 0}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_injects_errors(responses):
+    with StandInRPCServer(responses, error_rate=1.0, seed=1) as server:
+        response = post(server.uri, {"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1})
+
+    assert response.status_code == 503
+    assert server.stats()["injected_errors"] == 1
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_records_misses_from_upstream(responses, tmp_path):
+    recorded = RecordedResponses()
+    with StandInRPCServer(responses) as upstream, StandInRPCServer(recorded, upstream_uri=upstream.uri) as server:
+        result = post(server.uri, [{"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 5}]).json()
+
+    assert result == [{"jsonrpc": "2.0", "id": 5, "result": "0x1"}]
+    path = str(tmp_path / "fixture.jsonl.gz")
+    recorded.save(path)
+    assert RecordedResponses.load(path).get("eth_chainId", [])["result"] == "0x1"
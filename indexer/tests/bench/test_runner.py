@@ -0,0 +1,54 @@
+import pytest
+
+from indexer.bench.rpc_server import StandInRPCServer
+from indexer.bench.runner import build_report, run_scenario, sum_by_label
+from indexer.bench.scenarios import SCENARIOS, get_scenario
+from indexer.bench.synthetic_chain import ChainProfile, SyntheticChain
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_sum_by_label_reports_growth():
+    before = {"calls": [{"labels": {"method": "eth_call", "endpoint": "a"}, "value": 5}]}
+    after = {
+        "calls": [
+            {"labels": {"method": "eth_call", "endpoint": "a"}, "value": 8},
+            {"labels": {"method": "eth_call", "endpoint": "b"}, "value": 2},
+            {"labels": {"method": "eth_getLogs", "endpoint": "a"}, "value": 4},
+        ]
+    }
+    assert sum_by_label(before, after, "calls", "method") == {"eth_call": 5, "eth_getLogs": 4}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_build_report():
+    after = {
+        "hemera_rpc_requests_total": [{"labels": {"method": "eth_getBlockByNumber", "endpoint": "x"}, "value": 20}],
+        "hemera_job_cpu_seconds_total": [{"labels": {"job": "ExportBlocksJob"}, "value": 1.5}],
+        "hemera_job_duration_seconds": [{"labels": {"job": "ExportBlocksJob"}, "sum": 2.0, "count": 2}],
+    }
+    report = build_report(get_scenario("explorer_base"), 1, 10, 4.0, 3.0, {}, after)
+
+    assert report["blocks_per_second"] == 2.5
+    assert report["rpc_calls_per_block"] == 2
+    assert report["job_cpu_seconds"] == {"ExportBlocksJob": 1.5}
+    assert report["job_wall_seconds"] == {"ExportBlocksJob": 2.0}
+    assert report["peak_rss_bytes"] > 0
+
+    with pytest.raises(ValueError):
+        get_scenario("unknown")
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_every_scenario_runs_against_the_stand_in_node(name):
+    chain = SyntheticChain(ChainProfile(blocks=6, transactions_per_block=3))
+    with StandInRPCServer(chain) as server:
+        report = run_scenario(get_scenario(name), server.uri, 1, 4, block_batch_size=2, max_workers=2)
+
+    assert report["scenario"] == name
+    assert report["items"]["block"] == 4
+    assert report["rpc_calls"] > 0
+    assert server.stats()["misses"] == 0
@@ -0,0 +1,87 @@
+import pytest
+from eth_abi import decode, encode
+
+from indexer.bench.synthetic_chain import (
+    ERC20,
+    ERC721,
+    EXECUTION_REVERTED,
+    ChainProfile,
+    SyntheticChain,
+    account_address,
+    token_address,
+)
+from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION, TOKEN_DECIMALS_FUNCTION, TOKEN_SYMBOL_FUNCTION
+from indexer.utils.multicall_hemera.abi import TRY_BLOCK_AND_AGGREGATE_FUNC
+from indexer.utils.multicall_hemera.constants import DEFAULT_MULTICALL_ADDRESS
+
+
+def result(chain, method, *params):
+    return chain.get(method, list(params))["result"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_blocks_are_deterministic_and_linked():
+    profile = ChainProfile(blocks=20, transactions_per_block=10, seed=7)
+    chain, same_chain = SyntheticChain(profile), SyntheticChain(profile)
+
+    block = result(chain, "eth_getBlockByNumber", "0x5", True)
+    assert block == result(same_chain, "eth_getBlockByNumber", "0x5", True)
+    assert block["parentHash"] == result(chain, "eth_getBlockByNumber", "0x4", False)["hash"]
+    assert len(block["transactions"]) == 10
+    assert result(chain, "eth_getBlockByNumber", "latest", False)["number"] == "0x13"
+    assert result(chain, "eth_getBlockByNumber", "0x14", False) is None
+    assert (
+        block
+        != SyntheticChain(ChainProfile(blocks=20, transactions_per_block=10, seed=8)).get(
+            "eth_getBlockByNumber", ["0x5", True]
+        )["result"]
+    )
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_receipts_and_traces_match_transactions():
+    chain = SyntheticChain(ChainProfile(blocks=5, transactions_per_block=8, logs_per_transaction=3))
+    block = result(chain, "eth_getBlockByNumber", "0x3", True)
+    traces = result(chain, "debug_traceBlockByNumber", "0x3", {"tracer": "callTracer"})
+
+    log_indexes = []
+    for transaction, trace in zip(block["transactions"], traces):
+        receipt = result(chain, "eth_getTransactionReceipt", transaction["hash"])
+        assert receipt["transactionIndex"] == transaction["transactionIndex"]
+        assert trace["txHash"] == transaction["hash"]
+        log_indexes.extend(int(log["logIndex"], 16) for log in receipt["logs"])
+    assert log_indexes == list(range(len(log_indexes)))
+    assert len(log_indexes) == 24
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_bench
+def test_eth_call_answers_tokens_directly_and_through_multicall():
+    chain = SyntheticChain(ChainProfile(blocks=5))
+    erc20, erc721 = token_address(ERC20, 3), token_address(ERC721, 3)
+    balance_call = ERC20_BALANCE_OF_FUNCTION.get_signature() + encode(["address"], [account_address(1)]).hex()
+
+    symbol = result(chain, "eth_call", {"to": erc20, "data": TOKEN_SYMBOL_FUNCTION.get_signature()}, "0x2")
+    assert decode(["string"], bytes.fromhex(symbol[2:])) == ("SERC203",)
+    balance = result(chain, "eth_call", {"to": erc20, "data": balance_call}, "0x2")
+    assert balance == result(chain, "eth_call", {"to": erc20, "data": balance_call}, "0x2")
+    assert chain.get("eth_call", [{"to": erc721, "data": TOKEN_DECIMALS_FUNCTION.get_signature()}, "0x2"]) == {
+        "error": EXECUTION_REVERTED
+    }
+
+    calls = [
+        (erc20, bytes.fromhex(balance_call[2:])),
+        (erc721, bytes.fromhex(TOKEN_DECIMALS_FUNCTION.get_signature()[2:])),
+    ]
+    data = (
+        TRY_BLOCK_AND_AGGREGATE_FUNC.get_signature()
+        + encode(TRY_BLOCK_AND_AGGREGATE_FUNC.get_inputs_type(), [False, calls]).hex()
+    )
+    output = TRY_BLOCK_AND_AGGREGATE_FUNC.decode_function_output_data(
+        result(chain, "eth_call", {"to": DEFAULT_MULTICALL_ADDRESS, "data": data}, "0x2")
+    )
+    assert output["blockNumber"] == 2
+    assert output["returnData"][0] == {"success": True, "returnData": bytes.fromhex(balance[2:])}
+    assert output["returnData"][1]["success"] is False
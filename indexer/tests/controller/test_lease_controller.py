@@ -0,0 +1,87 @@
+import pytest
+
+from indexer.controller.lease_controller import LeaseController
+from indexer.utils.lease_queue import AdaptiveChunker
+
+
+class FakeLeaseQueue:
+    key = "backfill"
+    worker = "host:1"
+    lease_seconds = 300
+
+    def __init__(self, start_block, end_block):
+        self.pending = [(start_block, end_block)]
+        self.completed = []
+        self.released = []
+
+    def plan(self, start_block, end_block, chunk_size):
+        pass
+
+    def claim(self, max_blocks):
+        if not self.pending:
+            return None
+        start_block, end_block = self.pending.pop(0)
+        lease_end = min(end_block, start_block + max_blocks - 1)
+        if lease_end < end_block:
+            self.pending.insert(0, (lease_end + 1, end_block))
+        return start_block, lease_end
+
+    def heartbeat(self, start_block):
+        return True
+
+    def complete(self, start_block):
+        self.completed.append(start_block)
+        return True
+
+    def release(self, start_block):
+        self.released.append(start_block)
+        return True
+
+    def outstanding(self):
+        return len(self.pending)
+
+
+class FakeScheduler:
+    def __init__(self, fail_at=None):
+        self.batches = []
+        self.fail_at = fail_at
+
+    def run_jobs(self, start_block, end_block):
+        if start_block == self.fail_at:
+            raise ValueError("boom")
+        self.batches.append((start_block, end_block))
+
+
+@pytest.mark.indexer
+def test_adaptive_chunker_follows_throughput():
+    chunker = AdaptiveChunker(initial_blocks=10, min_blocks=10, max_blocks=1000, target_seconds=100, smoothing=1)
+
+    assert chunker.size == 10
+    assert chunker.update(10, 2) == 500
+    assert chunker.update(500, 1) == 1000
+    assert chunker.update(100, 1000) == 10
+
+
+@pytest.mark.indexer
+def test_lease_controller_drains_queue():
+    queue = FakeLeaseQueue(1, 25)
+    scheduler = FakeScheduler()
+    controller = LeaseController(scheduler, queue, AdaptiveChunker(10, 10, 10))
+
+    controller.action(start_block=1, end_block=25, block_batch_size=4)
+
+    assert queue.completed == [1, 11, 21]
+    assert scheduler.batches[:3] == [(1, 4), (5, 8), (9, 10)]
+    assert scheduler.batches[-1] == (25, 25)
+
+
+@pytest.mark.indexer
+def test_lease_controller_releases_failed_lease():
+    queue = FakeLeaseQueue(1, 20)
+    controller = LeaseController(FakeScheduler(fail_at=5), queue, AdaptiveChunker(10, 10, 10))
+
+    with pytest.raises(ValueError):
+        controller.action(start_block=1, end_block=20, block_batch_size=4)
+
+    assert queue.released == [1]
+    assert queue.completed == []
@@ -0,0 +1,39 @@
+import pytest
+
+from indexer.controller.reorg_controller import ReorgController
+
+
+def build_controller(stored_hashes, canonical_hashes):
+    controller = ReorgController.__new__(ReorgController)
+    controller.get_stored_block_hashes = lambda start_block, end_block: {
+        number: hashes for number, hashes in stored_hashes.items() if start_block <= number <= end_block
+    }
+    controller.get_canonical_block_hashes = lambda block_numbers: canonical_hashes
+    return controller
+
+
+@pytest.mark.indexer
+def test_find_fork_range():
+    canonical = {number: f"0x{number:x}" for number in range(100, 120)}
+    stored = {number: {f"0x{number:x}"} for number in range(100, 115)}
+    for number in range(108, 115):
+        stored[number] = {f"0xdead{number:x}"}
+
+    controller = build_controller(stored, canonical)
+
+    assert controller.find_fork_range(100, 119) == (108, 114)
+    assert controller.find_fork_range(100, 107) == (None, None)
+    assert controller.find_fork_range(115, 119) == (None, None)
+
+
+@pytest.mark.indexer
+def test_find_fork_range_not_monotonic():
+    canonical = {number: f"0x{number:x}" for number in range(100, 110)}
+    stored = {number: {f"0x{number:x}"} for number in range(100, 110)}
+    # rows of block 102 were marked as reorg but never replaced
+    stored[102] = set()
+    stored[109] = {"0xdead"}
+
+    controller = build_controller(stored, canonical)
+
+    assert controller.find_fork_range(100, 109) == (102, 109)
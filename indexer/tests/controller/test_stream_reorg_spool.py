@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+
+from indexer.controller.stream_controller import StreamController
+
+
+@pytest.mark.indexer
+def test_spooled_blocks_drain_before_an_inline_reorg_repair():
+    calls = []
+    controller = StreamController.__new__(StreamController)
+    controller.job_scheduler = SimpleNamespace(get_data_buff=lambda: {})
+    controller.recent_headers = SimpleNamespace(
+        extend=lambda blocks: 103,
+        numbers=lambda: [101, 102, 103, 104],
+        get=lambda block_number: f"0x{block_number:x}",
+        oldest=lambda: 101,
+        update=lambda hashes: None,
+        size=4,
+    )
+    controller.reorg_controller = SimpleNamespace(
+        get_canonical_block_hashes=lambda block_numbers: {
+            number: f"0x{number:x}" if number < 103 else "0xcanonical" for number in block_numbers
+        },
+        fix_range=lambda start_block, end_block: calls.append(("fix_range", start_block, end_block)),
+    )
+    controller.spool = SimpleNamespace(flush=lambda: calls.append(("flush",)))
+
+    controller._check_consensus(104)
+
+    assert calls == [("flush",), ("fix_range", 103, 104)]
@@ -0,0 +1,52 @@
+import os
+from decimal import Decimal
+
+import orjson
+import pytest
+
+from indexer.exporters.item_exporter import ItemExporterType, determine_item_exporter_type
+from indexer.tests.factories import make_transaction
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from indexer.exporters.parquet_file_item_exporter import ParquetFileItemExporter
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_parquet_files_are_typed_and_partitioned_by_block_range(tmp_path):
+    assert determine_item_exporter_type(f"parquetfile://{tmp_path}") == ItemExporterType.PARQUETFILE
+    exporter = ParquetFileItemExporter(f"parquetfile://{tmp_path}", {"blocks_per_file": 10})
+
+    exporter.export_items([make_transaction(number) for number in (12, 8, 9, 10)])
+
+    directory = tmp_path / "transaction"
+    assert sorted(os.listdir(directory / "0-9")) == ["transaction-8-9.parquet"]
+    assert sorted(os.listdir(directory / "10-19")) == ["transaction-10-12.parquet"]
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+
+    table = pq.read_table(directory / "10-19" / "transaction-10-12.parquet")
+    assert table.schema.field("hash").type == pa.binary()
+    assert table.schema.field("value").type == pa.decimal256(76, 0)
+    assert table.schema.field("block_number").type == pa.int64()
+    assert table.schema.field("blob_versioned_hashes").type.value_type == pa.binary()
+    rows = table.to_pylist()
+    assert [row["block_number"] for row in rows] == [10, 12]
+    assert rows[0]["hash"] == (10).to_bytes(32, "big")
+    assert rows[0]["value"] == Decimal(10**18)
+
+    manifest = orjson.loads((directory / "_manifest.json").read_bytes())
+    entry = manifest["files"][os.path.join("10-19", "transaction-10-12.parquet")]
+    assert (entry["start_block"], entry["end_block"], entry["rows"]) == (10, 12, 2)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_values_out_of_the_column_range_are_written_as_null(tmp_path):
+    exporter = ParquetFileItemExporter(f"parquetfile://{tmp_path}", {"blocks_per_file": 10})
+
+    exporter.export_items([make_transaction(1, value=2**256 - 1), make_transaction(2)])
+
+    rows = pq.read_table(tmp_path / "transaction" / "0-9" / "transaction-1-2.parquet").to_pylist()
+    assert [row["value"] for row in rows] == [None, Decimal(10**18)]
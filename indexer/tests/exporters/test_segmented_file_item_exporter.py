@@ -0,0 +1,125 @@
+import os
+from dataclasses import dataclass
+
+import orjson
+import pandas
+import pytest
+
+from indexer.domain import Domain
+from indexer.domain.log import Log
+from indexer.exporters.csv_file_item_exporter import CSVFileItemExporter
+from indexer.exporters.json_file_item_exporter import JSONFileItemExporter
+from indexer.jobs.source_job.file_source import scan_datas_file
+
+
+@dataclass
+class Note(Domain):
+    text: str
+
+
+def make_log(block_number, log_index=0):
+    return Log(
+        log_index=log_index,
+        address="0x" + "ab" * 20,
+        data="0x",
+        transaction_hash="0x" + f"{block_number:064x}",
+        transaction_index=0,
+        block_timestamp=1700000000 + block_number,
+        block_number=block_number,
+        block_hash="0x" + "cd" * 32,
+        topic0="0x" + "ef" * 32,
+    )
+
+
+def read_manifest(directory):
+    return orjson.loads((directory / "_manifest.json").read_bytes())["files"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_batches_of_the_same_window_are_appended_and_merged(tmp_path):
+    exporter = CSVFileItemExporter(f"csvfile://{tmp_path}", {"blocks_per_file": 10, "file_compression": "gzip"})
+
+    exporter.export_items([make_log(1), make_log(2)])
+    exporter.export_items([make_log(3), make_log(4, 1)])
+
+    directory = tmp_path / "log"
+    assert len(os.listdir(directory / "segments")) == 2
+    assert [entry["rows"] for entry in read_manifest(directory).values()] == [2, 2]
+
+    # moving into the next window merges the previous one in the background
+    exporter.export_items([make_log(12)])
+    exporter._compactor.wait()
+    files = read_manifest(directory)
+    window = files["log-0-9.csv.gz"]
+    assert (window["start_block"], window["end_block"], window["rows"]) == (1, 4, 4)
+    assert [name for name, entry in files.items() if entry.get("segment")] == [
+        name for name in files if name.startswith("segments/log-12-12-")
+    ]
+
+    rows = pandas.read_csv(directory / "log-0-9.csv.gz")
+    assert rows["block_number"].tolist() == [1, 2, 3, 4]
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_new_run_appends_to_merged_windows(tmp_path):
+    first = JSONFileItemExporter(f"jsonfile://{tmp_path}", {"blocks_per_file": 10})
+    first.export_items([make_log(1), Note(text="without a block")])
+    first.flush()
+
+    second = JSONFileItemExporter(f"jsonfile://{tmp_path}", {"blocks_per_file": 10})
+    second.export_items([make_log(5, 2**70)])
+    second.flush()
+
+    lines = (tmp_path / "log" / "log-0-9.json").read_bytes().splitlines()
+    assert [orjson.loads(line)["block_number"] for line in lines] == [1, 5]
+    assert '"log_index": 1180591620717411303424' in lines[1].decode()
+    assert os.listdir(tmp_path / "log" / "segments") == []
+    assert orjson.loads((tmp_path / "note" / "note.json").read_bytes()) == {"text": "without a block", "item": "note"}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_csv_source_lists_files_through_the_manifest(tmp_path):
+    exporter = CSVFileItemExporter(f"csvfile://{tmp_path}", {"blocks_per_file": 10})
+    exporter.export_items([make_log(8), make_log(11)])
+    exporter.flush()
+    exporter.export_items([make_log(15)])
+    # a legacy export next to the segmented one
+    legacy = tmp_path / "legacy" / "log"
+    legacy.mkdir(parents=True)
+    (legacy / "log-20-29.csv").write_text("block_number\n20\n")
+
+    mapping = scan_datas_file(str(tmp_path))
+
+    assert sorted(info["data_range"] for info in mapping["log"]) == [(8, 8), (11, 11), (15, 15), (20, 29)]
+    assert all(os.path.exists(info["path"]) for info in mapping["log"])
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_batch_exported_twice_replaces_its_rows(tmp_path):
+    batch = [make_log(number) for number in range(10)]
+    exporter = CSVFileItemExporter(f"csvfile://{tmp_path}", {"blocks_per_file": 10})
+    exporter.export_items(batch)
+    exporter.export_items(batch)
+    exporter.flush()
+
+    rows = pandas.read_csv(tmp_path / "log" / "log-0-9.csv")
+    assert rows["block_number"].tolist() == list(range(10))
+    assert read_manifest(tmp_path / "log")["log-0-9.csv"]["rows"] == 10
+
+    # a later run exporting part of the merged window again, with changed rows
+    again = JSONFileItemExporter(f"jsonfile://{tmp_path}", {"blocks_per_file": 10})
+    again.export_items(batch + [Note(text="without a block")])
+    again.flush()
+    again.export_items([make_log(number, log_index=1) for number in (4, 5)] + [Note(text="without a block")])
+    again.flush()
+
+    lines = [orjson.loads(line) for line in (tmp_path / "log" / "log-0-9.json").read_bytes().splitlines()]
+    assert [(line["block_number"], line["log_index"]) for line in lines] == [
+        (number, 1 if number in (4, 5) else 0) for number in range(10)
+    ]
+    assert (tmp_path / "note" / "note.json").read_bytes().count(b"without a block") == 1
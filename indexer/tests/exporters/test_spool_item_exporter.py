@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from indexer.exporters.base_exporter import BaseExporter
+from indexer.exporters.spool_item_exporter import (
+    SPOOL_HEADER,
+    SPOOL_MAGIC,
+    SPOOL_VERSION,
+    SpoolCorruptedError,
+    SpoolItemExporter,
+)
+
+
+class FlakyExporter(BaseExporter):
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.items = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def export_items(self, items, **kwargs):
+        self.release.wait()
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("database is unavailable")
+        self.items.extend(item.number for item in items)
+
+
+def spool_batch(spool, start_block, end_block):
+    spool.begin_batch(start_block, end_block)
+    spool.export_items(
+        [SimpleNamespace(number=number) for number in range(start_block, end_block + 1)], job_name="ExportBlocksJob"
+    )
+    spool.end_batch()
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_batches_drain_in_order_through_failures(tmp_path):
+    exporter = FlakyExporter(failures=2)
+    drained = []
+    spool = SpoolItemExporter([exporter], str(tmp_path), retry_interval=0.01, on_drained=drained.append)
+
+    spool_batch(spool, 1, 2)
+    spool_batch(spool, 3, 5)
+    spool.flush()
+    spool.stop()
+
+    assert exporter.items == [1, 2, 3, 4, 5]
+    assert drained == [2, 5]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_full_spool_holds_the_stream_back(tmp_path):
+    exporter = FlakyExporter()
+    exporter.release.clear()
+    spool = SpoolItemExporter([exporter], str(tmp_path), max_spool_bytes=1)
+    spool_batch(spool, 1, 2)
+
+    second = threading.Thread(target=spool_batch, args=(spool, 3, 4))
+    second.start()
+    second.join(timeout=0.5)
+    assert second.is_alive() and spool.spooled_batches == 1
+
+    exporter.release.set()
+    second.join(timeout=5)
+    spool.flush()
+    spool.stop()
+    assert exporter.items == [1, 2, 3, 4]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_spooled_batches_survive_a_restart(tmp_path):
+    spool = SpoolItemExporter([FlakyExporter(failures=100)], str(tmp_path), retry_interval=0.01)
+    spool_batch(spool, 1, 2)
+    spool_batch(spool, 3, 4)
+    spool.stop()
+
+    exporter = FlakyExporter()
+    restarted = SpoolItemExporter([exporter], str(tmp_path))
+    assert restarted.last_spooled_block == 4
+    restarted.flush()
+    restarted.stop()
+    assert exporter.items == [1, 2, 3, 4]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_corrupted_batch_stops_the_drain(tmp_path):
+    spool = SpoolItemExporter([FlakyExporter(failures=100)], str(tmp_path), retry_interval=0.01)
+    spool_batch(spool, 1, 2)
+    spool.stop()
+    path = tmp_path / os.listdir(tmp_path)[0]
+    path.write_bytes(path.read_bytes()[:-1] + b"\x00")
+
+    restarted = SpoolItemExporter([FlakyExporter()], str(tmp_path))
+    with pytest.raises(SpoolCorruptedError):
+        restarted.flush()
+    assert os.listdir(tmp_path) == [path.name + ".corrupt"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_batch_that_can_not_be_unpickled_is_corrupted(tmp_path):
+    payload = zlib.compress(b"not a pickle")
+    name = f"{1:012d}-{2:012d}.spool"
+    (tmp_path / name).write_bytes(
+        SPOOL_HEADER.pack(SPOOL_MAGIC, SPOOL_VERSION, zlib.crc32(payload), len(payload)) + payload
+    )
+
+    spool = SpoolItemExporter([FlakyExporter()], str(tmp_path))
+    with pytest.raises(SpoolCorruptedError):
+        spool.flush()
+    spool.stop()
+    assert os.listdir(tmp_path) == [name + ".corrupt"]
+    assert spool.first_missing_block == 1
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_restart_after_corruption_streams_the_missing_blocks_again(tmp_path):
+    spool = SpoolItemExporter([FlakyExporter(failures=100)], str(tmp_path), retry_interval=0.01)
+    for start_block in (1, 11, 21):
+        spool_batch(spool, start_block, start_block + 9)
+    spool.stop()
+    path = tmp_path / sorted(os.listdir(tmp_path))[0]
+    path.write_bytes(path.read_bytes()[:-1] + b"\x00")
+
+    drained = []
+    corrupted = SpoolItemExporter([FlakyExporter()], str(tmp_path), on_drained=drained.append)
+    with pytest.raises(SpoolCorruptedError):
+        corrupted.flush()
+    corrupted.stop()
+
+    exporter = FlakyExporter()
+    restarted = SpoolItemExporter([exporter], str(tmp_path), on_drained=drained.append)
+    assert restarted.first_missing_block == 1
+    assert restarted.last_spooled_block == 0
+    restarted.start()
+    time.sleep(0.1)
+    assert drained == [] and exporter.items == []
+
+    spool_batch(restarted, 1, 10)
+    restarted.flush()
+    restarted.stop()
+    assert drained == [10, 20, 30]
+    assert exporter.items == list(range(1, 31))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_a_restarted_drain_skips_the_exports_already_written(tmp_path):
+    written, failing = FlakyExporter(), FlakyExporter(failures=100)
+    spool = SpoolItemExporter([written, failing], str(tmp_path), retry_interval=0.01)
+    spool.begin_batch(1, 4)
+    spool.export_items([SimpleNamespace(number=number) for number in (1, 2)], job_name="ExportBlocksJob")
+    spool.export_items([SimpleNamespace(number=number) for number in (3, 4)], job_name="ExportTracesJob")
+    spool.end_batch()
+    deadline = time.time() + 5
+    while not written.items and time.time() < deadline:
+        time.sleep(0.01)
+    spool.stop()
+
+    first, second = FlakyExporter(), FlakyExporter()
+    restarted = SpoolItemExporter([first, second], str(tmp_path))
+    restarted.flush()
+    restarted.stop()
+    # the blocks were written once to the first exporter, before and after the restart
+    assert written.items == [1, 2] and first.items == [3, 4]
+    assert second.items == [1, 2, 3, 4]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,48 @@
+import pytest
+
+from indexer.exporters.base_exporter import BaseExporter
+from indexer.exporters.staging_item_exporter import StagingItemExporter
+from indexer.tests.factories import make_block
+
+
+class RecordingExporter(BaseExporter):
+    def __init__(self):
+        self.items = []
+
+    def export_items(self, items, **kwargs):
+        self.items.extend(items)
+
+
+def stage(staging, start_block, end_block, fork=""):
+    blocks = [make_block(number, fork) for number in range(start_block, end_block + 1)]
+    staging.begin_batch(start_block, end_block)
+    staging.export_items(blocks, job_name="ExportBlocksJob")
+    staging.end_batch(blocks)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_staging_promotes_finalized_batches():
+    exporter = RecordingExporter()
+    staging = StagingItemExporter([exporter], max_staged_blocks=10)
+    stage(staging, 1, 2)
+    stage(staging, 3, 4)
+
+    assert staging.staged_blocks == 4
+    assert staging.promote(3, lambda number: f"0x{number:x}") == (2, None)
+    assert [block.number for block in exporter.items] == [1, 2]
+    assert staging.last_staged_block == 4
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_exporter
+def test_staging_drops_stale_batches():
+    exporter = RecordingExporter()
+    staging = StagingItemExporter([exporter])
+    stage(staging, 1, 2)
+    stage(staging, 3, 4, fork="f")
+    stage(staging, 5, 6, fork="f")
+
+    assert staging.promote(6, lambda number: f"0x{number:x}") == (2, 2)
+    assert [block.number for block in exporter.items] == [1, 2]
+    assert staging.last_staged_block is None
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from indexer.domain.transaction import Transaction
+
+
+def make_transaction(block_number, value=10**18):
+    return Transaction(
+        hash="0x" + f"{block_number:064x}",
+        nonce=block_number,
+        transaction_index=0,
+        from_address="0x" + "ab" * 20,
+        to_address=None,
+        value=value,
+        gas_price=10**9,
+        gas=21000,
+        transaction_type=2,
+        input="0x",
+        block_number=block_number,
+        block_timestamp=1700000000 + block_number,
+        block_hash="0x" + "cd" * 32,
+        blob_versioned_hashes=["0x" + "01" * 32],
+    )
+
+
+def make_block(number, fork=""):
+    # only the header fields reorg detection reads, a fork changes every hash from its first block on
+    return SimpleNamespace(number=number, hash=f"0x{fork}{number:x}", parent_hash=f"0x{fork}{number - 1:x}")
@@ -3,9 +3,11 @@ import pytest
 from indexer.controller.scheduler.job_scheduler import JobScheduler
 from indexer.domain.contract_internal_transaction import ContractInternalTransaction
 from indexer.exporters.console_item_exporter import ConsoleItemExporter
+from indexer.jobs.export_traces_job import traces_rpc_requests
 from indexer.tests import LINEA_PUBLIC_NODE_RPC_URL
 from indexer.utils.provider import get_provider_from_uri
 from indexer.utils.thread_local_proxy import ThreadLocalProxy
+from indexer.utils.trace_sources import ExtractTraces
 
 
 @pytest.mark.indexer
@@ -33,3 +35,54 @@ def test_export_job():
     data_buff = job_scheduler.get_data_buff()
     assert len(data_buff[ContractInternalTransaction.type()]) == 24
     job_scheduler.clear_data_buff()
+
+
+def frame(trace_type, calls=(), value="0x0", error=None):
+    trace = {"type": trace_type, "from": "0xaa", "to": "0xbb", "value": value, "gas": "0x10", "gasUsed": "0x8"}
+    if calls:
+        trace["calls"] = list(calls)
+    if error:
+        trace["error"] = error
+    return trace
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_traces_are_flattened_depth_first_in_one_pass():
+    block = {"number": 10, "hash": "0xhash", "timestamp": 1700000000, "transactions": [{"hash": "0xtx"}]}
+    tx_trace = frame(
+        "CALL",
+        [frame("DELEGATECALL", [frame("CREATE2", value="0x5")]), frame("SELFDESTRUCT", error="reverted")],
+        value="0x1",
+    )
+    responses = [{"jsonrpc": "2.0", "id": 10, "result": [{"result": tx_trace}]}]
+
+    traces = list(traces_rpc_requests(lambda params: responses, [block], is_batch=True))
+
+    assert [trace.trace_address for trace in traces] == [[], [0], [0, 0], [1]]
+    assert [trace.trace_type for trace in traces] == ["call", "call", "create2", "suicide"]
+    assert [trace.call_type for trace in traces] == ["call", "delegatecall", "", ""]
+    assert [trace.subtraces for trace in traces] == [2, 1, 0, 0]
+    assert [trace.trace_id for trace in traces] == ["10_0_0", "10_0_1", "10_0_2", "10_0_3"]
+    assert [trace.trace_index for trace in traces] == [1, 2, 3, 4]
+    assert traces[2].value == 5 and traces[3].status == 0
+    assert all(trace.transaction_hash == "0xtx" for trace in traces)
+    assert responses[0]["result"] == [None]
+
+    internal_transaction = ContractInternalTransaction.from_trace(traces[2])
+    assert internal_transaction.is_contract_creation()
+    assert internal_transaction.trace_address == [0, 0] and internal_transaction.gas_used == 8
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_deep_traces_do_not_recurse():
+    tx_trace = frame("CALL")
+    for _ in range(5000):
+        tx_trace = frame("CALL", [tx_trace])
+    geth_trace = {"block_number": 1, "block_hash": "0xhash", "block_timestamp": 0, "transaction_traces": []}
+
+    traces = list(ExtractTraces().iter_transaction_traces(geth_trace, 0, "0xtx", tx_trace))
+
+    assert len(traces) == 5001
+    assert len(traces[-1].trace_address) == 5000
@@ -0,0 +1,61 @@
+import pytest
+
+from indexer.domain.transaction import Transaction
+from indexer.exporters.csv_file_item_exporter import CSVFileItemExporter
+from indexer.jobs.source_job.file_source import FileRangeIndex, FileSource
+from indexer.tests.factories import make_transaction
+
+
+def export(exporter, numbers):
+    exporter.export_items([make_transaction(number, value=2**200 if number == 12 else 10**18) for number in numbers])
+    exporter.flush()
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_range_index_returns_partially_overlapping_files():
+    index = FileRangeIndex(
+        {
+            "block": [
+                {"path": "c", "data_range": (20, 29)},
+                {"path": "a", "data_range": (0, 9)},
+                {"path": "wide", "data_range": (5, 100)},
+                {"path": "b", "data_range": (10, 19)},
+            ]
+        }
+    )
+
+    assert [info["path"] for info in index.overlapping("block", 15, 22)] == ["wide", "b", "c"]
+    assert [info["path"] for info in index.overlapping("block", 0, 4)] == ["a"]
+    assert index.overlapping("block", 101, 200) == []
+    assert index.overlapping("log", 0, 10) == []
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_csv_rows_of_a_range_are_read_back_as_domains(tmp_path):
+    export(CSVFileItemExporter(f"csvfile://{tmp_path}", {"blocks_per_file": 10}), range(5, 15))
+    source = FileSource(str(tmp_path))
+
+    transactions = source.read("transaction", Transaction, 8, 12)
+
+    assert transactions == [
+        make_transaction(number, value=2**200 if number == 12 else 10**18) for number in range(8, 13)
+    ]
+    # the window file is parsed once for every batch reading it
+    assert source.read("transaction", Transaction, 5, 6)[0].block_number == 5
+    assert len(source._cache) == 2
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_parquet_rows_of_a_range_are_read_back_as_domains(tmp_path):
+    pytest.importorskip("pyarrow")
+    from indexer.exporters.parquet_file_item_exporter import ParquetFileItemExporter
+
+    exporter = ParquetFileItemExporter(f"parquetfile://{tmp_path}", {"blocks_per_file": 10})
+    exporter.export_items([make_transaction(number) for number in range(5, 15)])
+
+    transactions = FileSource(str(tmp_path)).read("transaction", Transaction, 8, 12)
+
+    assert transactions == [make_transaction(number) for number in range(8, 13)]
@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+
+from common.utils import registry_manifest
+from common.utils.module_loading import LazyImportMapping
+from common.utils.registry_manifest import cached_section, clear_manifest
+from indexer.jobs.job_modules import import_domain_types, import_job_modules, job_candidate_modules, job_manifest
+from indexer.modules.custom.uniswap_v2.domain.feature_uniswap_v2 import UniswapV2Pool
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv(registry_manifest.MANIFEST_ENV, str(tmp_path / "registry.json"))
+    clear_manifest()
+    yield tmp_path / "registry.json"
+    clear_manifest()
+
+
+@pytest.mark.indexer
+def test_cached_section_rebuilds_when_a_source_changes(manifest, tmp_path):
+    source = tmp_path / "module.py"
+    source.write_text("class A: pass\n")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"classes": len(builds)}
+
+    assert cached_section("test", [str(source)], build) == {"classes": 1}
+    registry_manifest._manifest = None
+    assert cached_section("test", [str(source)], build) == {"classes": 1}
+    assert manifest.exists() and len(builds) == 1
+
+    source.write_text("class A: pass\nclass B: pass\n")
+    assert cached_section("test", [str(source)], build) == {"classes": 2}
+
+
+@pytest.mark.indexer
+def test_job_candidates_skip_endpoints(tmp_path):
+    package = tmp_path / "indexer" / "modules" / "custom" / "demo"
+    package.mkdir(parents=True)
+    (package / "jobs.py").write_text("class DemoJob(FilterTransactionDataJob):\n    pass\n")
+    (package / "more_jobs.py").write_text("from .jobs import DemoJob\nclass DerivedDemo(DemoJob):\n    pass\n")
+    (package / "routes.py").write_text("class DemoRoute(Resource):\n    pass\n")
+
+    files = [str(path) for path in package.iterdir()]
+    names = [module.rsplit(".", 1)[-1] for module in job_candidate_modules(files)]
+    assert names == ["jobs", "more_jobs"]
+
+
+@pytest.mark.indexer
+def test_import_job_modules_follows_output_types(manifest):
+    jobs = job_manifest()
+    producers = [name for name, job in jobs.items() if UniswapV2Pool.type() in job["output_types"]]
+    assert producers and all(not job["module"].endswith(("routes", "endpoint")) for job in jobs.values())
+
+    modules = import_job_modules([UniswapV2Pool])
+    assert {jobs[name]["module"] for name in producers} <= modules
+    assert all(module in sys.modules for module in modules)
+    assert len(modules) < len({job["module"] for job in jobs.values()})
+
+
+@pytest.mark.indexer
+def test_lazy_import_mapping_imports_on_lookup():
+    mapping = LazyImportMapping({"path_join": "os.path.join", "missing": "os.path.does_not_exist"})
+    assert "path_join" in mapping and "other" not in mapping
+    assert mapping.get("other") is None
+    assert mapping["path_join"] is os.path.join
+    assert dict.__contains__(mapping, "path_join") and not dict.__contains__(mapping, "missing")
+    with pytest.raises(ImportError):
+        mapping.values()
+
+
+@pytest.mark.indexer
+def test_domain_model_mapping_resolves_on_lookup():
+    from common.converter.pg_converter import domain_model_mapping
+    from indexer.domain.transaction import Transaction
+
+    assert Transaction in domain_model_mapping and "transaction" not in domain_model_mapping
+    assert domain_model_mapping[Transaction]["table"].__tablename__ == "transactions"
+
+
+@pytest.mark.indexer
+def test_import_domain_types_imports_the_defining_modules(manifest):
+    domains = import_domain_types(["uniswap_v2_pool", "transaction", "no_such_domain"])
+    assert domains["uniswap_v2_pool"] is UniswapV2Pool
+    assert domains["transaction"].__name__ == "Transaction"
+    assert "no_such_domain" not in domains
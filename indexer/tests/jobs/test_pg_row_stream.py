@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from common.models.blocks import Blocks
+from indexer.jobs.source_job.pg_source_job import PGRowStream, PGSourceJob
+
+metadata = MetaData()
+numbers = Table("numbers", metadata, Column("number", Integer, primary_key=True))
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/numbers.db")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(numbers), [{"number": number} for number in range(100)])
+    return SimpleNamespace(get_service_session=sessionmaker(bind=engine))
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_rows_stream_in_chunks_with_bounded_read_ahead(service):
+    stream = PGRowStream(service, select(numbers.c.number).order_by(numbers.c.number), chunk_size=7)
+
+    rows = iter(stream)
+    assert next(rows).number == 0
+    # one chunk is being consumed and at most one more waits
+    assert stream._queue.qsize() <= 1
+
+    assert [row.number for row in rows] == list(range(1, 100))
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_a_failed_read_is_raised_to_the_consumer(service):
+    stream = PGRowStream(service, select(Column("missing", Integer)).select_from(numbers))
+
+    with pytest.raises(Exception):
+        list(stream)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_closing_a_stream_stops_its_reader(service):
+    stream = PGRowStream(service, select(numbers.c.number), chunk_size=1)
+
+    stream.close()
+
+    assert not stream._thread.is_alive()
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_block_ranges_are_read_with_range_predicates(monkeypatch):
+    statements = []
+    monkeypatch.setattr(
+        "indexer.jobs.source_job.pg_source_job.PGRowStream",
+        lambda service, statement, **kwargs: statements.append(statement),
+    )
+    job = SimpleNamespace(_service=None, _stream_chunk_size=10, _stream_prefetch_chunks=2)
+
+    PGSourceJob._query_with_blocks(job, Blocks, [5, 6, 7], 1700000000, 1700000100)
+    PGSourceJob._query_with_blocks(job, Blocks, [5, 9], 1700000000, 1700000100)
+
+    contiguous, sparse = [str(statement.compile(dialect=postgresql.dialect())) for statement in statements]
+    assert "blocks.number >= %(number_1)s AND blocks.number <= %(number_2)s" in contiguous
+    assert "blocks.timestamp >=" in contiguous
+    assert " IN " not in contiguous and "unnest" not in contiguous
+    assert "blocks.number IN" in sparse
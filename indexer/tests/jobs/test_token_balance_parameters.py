@@ -0,0 +1,89 @@
+import pytest
+
+from common.utils.web3_utils import ZERO_ADDRESS
+from indexer.domain.token_transfer import ERC20TokenTransfer, ERC1155TokenTransfer
+from indexer.jobs.export_token_balances_job import extract_token_parameters
+
+TOKEN = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+HOLDER = "0x86d169ffe8f1ac313abea5fa64aad51725ceaf32"
+OTHER = "0x42619f1eb89b993f7f5193de6ab1423a703fc344"
+
+
+def erc20_transfer(block_number, from_address=HOLDER, to_address=OTHER):
+    return ERC20TokenTransfer(
+        transaction_hash="0x" + "00" * 32,
+        log_index=0,
+        from_address=from_address,
+        to_address=to_address,
+        value=1,
+        token_type="ERC20",
+        token_address=TOKEN,
+        block_number=block_number,
+        block_hash="0x" + "00" * 32,
+        block_timestamp=block_number * 12,
+    )
+
+
+def holder_blocks(parameters, address=HOLDER):
+    return sorted(p["block_number"] for p in parameters if p["address"] == address)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_extract_token_parameters_every_touch():
+    transfers = [erc20_transfer(block_number) for block_number in (100, 100, 101, 105, 110)]
+
+    parameters = extract_token_parameters(transfers)
+
+    assert holder_blocks(parameters) == [100, 101, 105, 110]
+    assert holder_blocks(parameters, OTHER) == [100, 101, 105, 110]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_extract_token_parameters_last_touch_only():
+    transfers = [erc20_transfer(block_number) for block_number in (110, 100, 105)]
+    transfers.append(erc20_transfer(120, from_address=ZERO_ADDRESS))
+
+    parameters = extract_token_parameters(transfers, granularity=None)
+
+    assert holder_blocks(parameters) == [110]
+    assert holder_blocks(parameters, OTHER) == [120]
+    assert all(p["address"] != ZERO_ADDRESS for p in parameters)
+    assert parameters[0]["block_timestamp"] == parameters[0]["block_number"] * 12
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_extract_token_parameters_sampled_windows():
+    transfers = [erc20_transfer(block_number) for block_number in (100, 101, 109, 110, 125)]
+
+    parameters = extract_token_parameters(transfers, granularity=10)
+
+    assert holder_blocks(parameters) == [109, 110, 125]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_jobs
+def test_extract_token_parameters_keeps_token_ids_apart():
+    transfers = [
+        ERC1155TokenTransfer(
+            transaction_hash="0x" + "00" * 32,
+            log_index=0,
+            from_address=HOLDER,
+            to_address=OTHER,
+            token_id=token_id,
+            value=1,
+            token_type="ERC1155",
+            token_address=TOKEN,
+            block_number=block_number,
+            block_hash="0x" + "00" * 32,
+            block_timestamp=block_number * 12,
+        )
+        for token_id, block_number in ((1, 100), (2, 101), (1, 102))
+    ]
+
+    parameters = extract_token_parameters(transfers, "latest", granularity=None)
+
+    holder_parameters = sorted((p["token_id"], p["block_number"]) for p in parameters if p["address"] == HOLDER)
+    assert holder_parameters == [(1, "latest"), (2, "latest")]
@@ -0,0 +1,77 @@
+import pytest
+from eth_abi import encode
+
+from common.utils.abi_code_utils import Function, encode_data
+from indexer.utils.abi_setting import ERC20_BALANCE_OF_FUNCTION, ERC721_OWNER_OF_FUNCTION, TOKEN_TOTAL_SUPPLY_FUNCTION
+from indexer.utils.multicall_hemera import Call
+
+HOLDER = "0x" + "ab" * 20
+
+POSITIONS_FUNCTION = Function(
+    {
+        "name": "positions",
+        "type": "function",
+        "inputs": [{"name": "tokenId", "type": "uint256"}],
+        "outputs": [
+            {"name": "nonce", "type": "uint96"},
+            {"name": "operator", "type": "address"},
+            {"name": "token0", "type": "address"},
+            {"name": "token1", "type": "address"},
+            {"name": "fee", "type": "uint24"},
+            {"name": "tickLower", "type": "int24"},
+            {"name": "tickUpper", "type": "int24"},
+            {"name": "liquidity", "type": "uint128"},
+        ],
+    }
+)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+@pytest.mark.parametrize(
+    "function, arguments",
+    [
+        (ERC20_BALANCE_OF_FUNCTION, [HOLDER]),
+        (ERC721_OWNER_OF_FUNCTION, [2**255]),
+        (TOKEN_TOTAL_SUPPLY_FUNCTION, []),
+        (POSITIONS_FUNCTION, [7]),
+    ],
+)
+def test_static_calls_encode_like_the_generic_codec(function, arguments):
+    assert function.encode_function_call_data(arguments) == encode_data(
+        function.get_abi(), arguments, function.get_signature()
+    )
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_static_outputs_decode_by_slices():
+    values = [3, HOLDER, HOLDER, HOLDER, 3000, -887220, 887220, 2**100]
+    data = "0x" + encode(POSITIONS_FUNCTION.get_outputs_type(), values).hex()
+
+    decoded = POSITIONS_FUNCTION.decode_function_output_data(data)
+
+    assert list(decoded.values()) == values
+    assert decoded["tickLower"] == -887220
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_invalid_outputs_fall_back_to_the_generic_codec():
+    dirty_address = "0x" + "01" * 32
+
+    assert ERC721_OWNER_OF_FUNCTION.decode_function_output_data(dirty_address) is None
+    assert ERC20_BALANCE_OF_FUNCTION.decode_function_output_data("0x01") is None
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_calls_get_checksum_targets_and_sequential_ids():
+    first = Call(HOLDER, ERC20_BALANCE_OF_FUNCTION, [HOLDER], block_number=1)
+    second = Call(HOLDER, ERC20_BALANCE_OF_FUNCTION, [HOLDER], block_number=1)
+
+    first_param, second_param = first.rpc_param, second.rpc_param
+
+    assert first.target == "0xABaBaBaBABabABabAbAbABAbABabababaBaBABaB"
+    assert second_param["id"] == first_param["id"] + 1
+    assert first_param["params"] == second_param["params"]
@@ -0,0 +1,155 @@
+import pytest
+
+from indexer.domain.block import Block
+from indexer.domain.trace import Trace
+from indexer.domain.transaction import Transaction
+from indexer.utils.coin_balance_deriver import CoinBalanceDeriver
+
+MINER = "0x0000000000000000000000000000000000000001"
+ALICE = "0x000000000000000000000000000000000000000a"
+BOB = "0x000000000000000000000000000000000000000b"
+CAROL = "0x000000000000000000000000000000000000000c"
+
+
+def make_block(number, transactions=(), withdrawals=(), base_fee_per_gas=10):
+    return Block(
+        number=number,
+        timestamp=number * 12,
+        hash=f"0x{number:064x}",
+        parent_hash=f"0x{number - 1:064x}",
+        nonce="0x0",
+        gas_limit=30000000,
+        gas_used=0,
+        base_fee_per_gas=base_fee_per_gas,
+        blob_gas_used=0,
+        excess_blob_gas=0,
+        difficulty=0,
+        size=0,
+        miner=MINER,
+        sha3_uncles="0x",
+        transactions_root="0x",
+        state_root="0x",
+        receipts_root="0x",
+        transactions=list(transactions),
+        withdrawals=list(withdrawals),
+    )
+
+
+def make_transaction(block_number, tx_hash, from_address, to_address, value, gas_price=15):
+    return Transaction(
+        hash=tx_hash,
+        nonce=0,
+        transaction_index=0,
+        from_address=from_address,
+        to_address=to_address,
+        value=value,
+        gas_price=gas_price,
+        gas=21000,
+        transaction_type=2,
+        input="0x",
+        block_number=block_number,
+        block_timestamp=block_number * 12,
+        block_hash=f"0x{block_number:064x}",
+    )
+
+
+def make_trace(block_number, tx_hash, from_address, to_address, value, trace_address, gas_used=None, status=1):
+    return Trace(
+        trace_id=f"{block_number}_0_{len(trace_address)}",
+        from_address=from_address,
+        to_address=to_address,
+        value=value,
+        input="0x",
+        output="0x",
+        trace_type="call",
+        call_type="call",
+        gas=None,
+        gas_used=gas_used,
+        subtraces=0,
+        error=None if status else "execution reverted",
+        status=status,
+        block_number=block_number,
+        block_hash=f"0x{block_number:064x}",
+        block_timestamp=block_number * 12,
+        transaction_index=0,
+        transaction_hash=tx_hash,
+        trace_index=len(trace_address),
+        trace_address=trace_address,
+    )
+
+
+class FakeNode:
+    def __init__(self, balances):
+        self.balances = balances
+        self.requests = []
+
+    def fetch(self, addresses):
+        self.requests.extend((address["address"], address["block_number"]) for address in addresses)
+        return [
+            {
+                "address": address["address"],
+                "balance": self.balances[address["address"]],
+                "block_number": address["block_number"],
+                "block_timestamp": address["block_timestamp"],
+            }
+            for address in addresses
+        ]
+
+
+def balances_at(coin_balances, block_number):
+    return {b["address"]: b["balance"] for b in coin_balances if b["block_number"] == block_number}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_derive_coin_balances_from_traces():
+    node = FakeNode({MINER: 0, ALICE: 1000000, BOB: 0, CAROL: 0})
+    deriver = CoinBalanceDeriver()
+
+    deriver.derive([make_block(100)], [], node.fetch)
+    assert node.requests == [(MINER, 100)]
+
+    tx = make_transaction(101, "0x01", ALICE, BOB, 500)
+    traces = [
+        make_trace(101, "0x01", ALICE, BOB, 500, [], gas_used=21000),
+        make_trace(101, "0x01", BOB, CAROL, 100, [0]),
+    ]
+    block = make_block(101, [tx], withdrawals=[{"address": CAROL, "amount": 2}])
+    coin_balances = deriver.derive([block], traces, node.fetch)
+
+    # first seen addresses are fetched at the block they are touched in
+    assert sorted(node.requests) == sorted([(MINER, 100), (ALICE, 101), (BOB, 101), (CAROL, 101)])
+
+    node.requests.clear()
+    tx = make_transaction(102, "0x02", ALICE, BOB, 300)
+    traces = [
+        make_trace(102, "0x02", ALICE, BOB, 300, [], gas_used=21000),
+        make_trace(102, "0x02", BOB, CAROL, 50, [0], status=0),
+    ]
+    coin_balances = deriver.derive(
+        [make_block(102, [tx], withdrawals=[{"address": CAROL, "amount": 1}])], traces, node.fetch
+    )
+
+    assert node.requests == []
+    balances = balances_at(coin_balances, 102)
+    assert balances[ALICE] == 1000000 - 300 - 21000 * 15
+    assert balances[BOB] == 300
+    assert balances[CAROL] == 10**9
+    assert balances[MINER] == 2 * 21000 * 5
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_derive_coin_balances_reconcile_and_gap():
+    node = FakeNode({MINER: 7})
+    deriver = CoinBalanceDeriver(reconcile_interval=2)
+
+    deriver.derive([make_block(100)], [], node.fetch)
+    deriver.derive([make_block(101)], [], node.fetch)
+    deriver.derive([make_block(102)], [], node.fetch)
+    assert node.requests == [(MINER, 100), (MINER, 102)]
+
+    # a non contiguous batch drops every cached balance
+    deriver.derive([make_block(110)], [], node.fetch)
+    assert node.requests[-1] == (MINER, 110)
+    assert deriver.mismatches == 0
@@ -0,0 +1,89 @@
+import urllib.request
+
+import pytest
+
+from indexer.utils.metrics import MetricsRegistry, start_metrics_server
+from indexer.utils.provider import record_rpc_metrics
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_items_total", "Items.")
+    counter.inc(3, job="ExportBlocksJob")
+    counter.inc(2, job="ExportBlocksJob")
+    registry.gauge("test_lag", "Lag.").set(7)
+
+    assert registry.counter("test_items_total", "Items.") is counter
+    text = registry.render()
+    assert "# TYPE test_items_total counter" in text
+    assert 'test_items_total{job="ExportBlocksJob"} 5' in text
+    assert "test_lag 7" in text
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_histogram_buckets_and_snapshot():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Seconds.", buckets=(1, 5))
+    histogram.observe(0.5, job="a")
+    histogram.observe(3, job="a")
+    histogram.observe(10, job="a")
+
+    text = registry.render()
+    assert 'test_seconds_bucket{job="a",le="1"} 1' in text
+    assert 'test_seconds_bucket{job="a",le="5"} 2' in text
+    assert 'test_seconds_bucket{job="a",le="+Inf"} 3' in text
+    assert registry.snapshot() == {"test_seconds": [{"labels": {"job": "a"}, "sum": 13.5, "count": 3}]}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_rpc_metrics_count_batched_calls():
+    from indexer.utils.metrics import RPC_REQUESTS
+
+    request = b'[{"jsonrpc":"2.0","method":"eth_getLogs","id":1},{"jsonrpc":"2.0","method":"eth_getLogs","id":2}]'
+    before = dict((tuple(sorted(s["labels"].items())), s["value"]) for s in RPC_REQUESTS.snapshot())
+    record_rpc_metrics("test-node", request, 100, 0.01)
+    after = dict((tuple(sorted(s["labels"].items())), s["value"]) for s in RPC_REQUESTS.snapshot())
+
+    key = (("endpoint", "test-node"), ("method", "eth_getLogs"), ("status", "ok"))
+    assert after[key] - before.get(key, 0) == 2
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_rpc_metrics_record_failed_requests(monkeypatch):
+    from indexer.utils import provider
+    from indexer.utils.metrics import RPC_DURATION, RPC_REQUESTS
+
+    def make_post_request(endpoint_uri, data, **kwargs):
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr(provider, "make_post_request", make_post_request)
+    key = (("endpoint", "failing-node"), ("method", "eth_blockNumber"), ("status", "TimeoutError"))
+    before = dict((tuple(sorted(s["labels"].items())), s["value"]) for s in RPC_REQUESTS.snapshot())
+
+    with pytest.raises(TimeoutError):
+        provider.BatchHTTPProvider("http://failing-node:8545").make_request(
+            params=b'{"jsonrpc":"2.0","method":"eth_blockNumber","id":1}'
+        )
+
+    after = dict((tuple(sorted(s["labels"].items())), s["value"]) for s in RPC_REQUESTS.snapshot())
+    assert after[key] - before.get(key, 0) == 1
+    assert any(tuple(sorted(s["labels"].items())) == key for s in RPC_DURATION.snapshot())
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_metrics_server_listens_on_loopback_by_default():
+    server = start_metrics_server(0)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,68 @@
+import os
+import time
+
+import orjson
+import pytest
+
+from indexer.utils.profiling import BatchProfiler, configure_profiling, disable_profiling, profile_batch
+
+
+class Item:
+    def __init__(self, value):
+        self.value = value
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_sampled_batches_write_collapsed_stacks(tmp_path):
+    profiler = configure_profiling(str(tmp_path), every=2, interval=0.001)
+    try:
+        for start_block in (1, 11, 21):
+            with profile_batch(start_block, start_block + 9):
+                busy(0.05)
+    finally:
+        disable_profiling()
+
+    assert profiler.batches == 3
+    files = sorted(os.listdir(tmp_path))
+    pid = os.getpid()
+    assert files == sorted(
+        f"stream-{start}-{start + 9}-{pid}.{ext}" for start in (1, 21) for ext in ("collapsed", "txt")
+    )
+
+    stacks = open(tmp_path / f"stream-1-10-{pid}.collapsed").read().splitlines()
+    assert stacks and all(int(line.rsplit(" ", 1)[1]) > 0 for line in stacks)
+    assert any(line.startswith("idle;") and "busy (utils/test_profiling.py" in line for line in stacks)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_only_slow_batches_are_kept(tmp_path):
+    profiler = BatchProfiler(str(tmp_path), label="reorg", every=0, slower_than=0.05, mode="cprofile")
+    with profiler.batch(1, 1):
+        pass
+    with profiler.batch(2, 2):
+        busy(0.06)
+
+    assert sorted(os.listdir(tmp_path)) == [f"reorg-2-2-{os.getpid()}.prof", f"reorg-2-2-{os.getpid()}.txt"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_memory_report_groups_buffer_items_by_allocation_site(tmp_path):
+    data_buff = {}
+    profiler = BatchProfiler(str(tmp_path), memory=True, interval=0.01)
+    with profiler.batch(5, 6, data_buff):
+        data_buff["item"] = [Item(str(index)) for index in range(1000)]
+
+    report = orjson.loads(open(tmp_path / f"stream-5-6-{os.getpid()}.memory.json", "rb").read())
+    buffered = report["data_buff"]["item"]
+    assert buffered["items"] == 1000 and buffered["bytes"] > 0
+    assert "test_profiling.py" in buffered["sites"][0]["site"]
+    assert report["top_allocation_sites"]
@@ -0,0 +1,65 @@
+import pytest
+
+from indexer.utils.range_ledger import (
+    RANGE_COMPLETED,
+    RANGE_FAILED,
+    RANGE_RUNNING,
+    FileRangeLedger,
+    contiguous_end,
+    find_gaps,
+    merge_ranges,
+)
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_range_arithmetic():
+    ranges = [(11, 20), (1, 10), (31, 40), (35, 45)]
+
+    assert merge_ranges(ranges) == [(1, 20), (31, 45)]
+    assert find_gaps(ranges, 1, 50) == [(21, 30), (46, 50)]
+    assert find_gaps(ranges, 5, 18) == []
+    assert contiguous_end(ranges, 0) == 20
+    assert contiguous_end(ranges, 25) == 25
+    assert contiguous_end(ranges, 30) == 45
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_file_range_ledger_resumes_gaps(tmp_path):
+    ledger = FileRangeLedger(str(tmp_path / "sync_record.ranges"))
+    for start_block, end_block, status in [
+        (1, 10, RANGE_COMPLETED),
+        (11, 20, RANGE_RUNNING),
+        (21, 30, RANGE_COMPLETED),
+        (31, 40, RANGE_FAILED),
+    ]:
+        ledger.record(start_block, end_block, status, worker="host:1", start_time=1.0)
+
+    assert ledger.high_water_mark(0) == 10
+    assert ledger.find_gaps(1, 40) == [(11, 20), (31, 40)]
+    assert ledger.get_ranges(status=RANGE_FAILED) == [(31, 40)]
+
+    ledger.record(11, 20, RANGE_COMPLETED, worker="host:2", start_time=2.0, end_time=3.0)
+    assert ledger.high_water_mark(0) == 30
+    assert ledger.high_water_mark(0, end_block=15) == 15
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_file_range_ledger_reads_the_lines_appended_by_other_workers(tmp_path):
+    file_name = str(tmp_path / "sync_record.ranges")
+    ledger, other_worker = FileRangeLedger(file_name), FileRangeLedger(file_name)
+    ledger.record(1, 10, RANGE_COMPLETED)
+    assert ledger.high_water_mark(0) == 10
+
+    other_worker.record(11, 20, RANGE_COMPLETED)
+    with open(file_name, "ab") as ledger_file:
+        # a line the other worker is still appending
+        ledger_file.write(b'{"start_block_number": 21, "end_block_number": 30,')
+    assert ledger.high_water_mark(0) == 20
+
+    with open(file_name, "ab") as ledger_file:
+        ledger_file.write(b' "status": "completed"}\n')
+    assert ledger.high_water_mark(0) == 30
+    assert FileRangeLedger(file_name).high_water_mark(0) == 30
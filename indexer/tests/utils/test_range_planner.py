@@ -0,0 +1,45 @@
+import pytest
+
+from indexer.utils.range_planner import BlockRangePlanner, DensitySource
+
+
+class FakeDensitySource(DensitySource):
+    def __init__(self, counts):
+        self.counts = counts
+        self.requests = []
+
+    def get_counts(self, start_block, end_block):
+        self.requests.append((start_block, end_block))
+        return {number: self.counts[number] for number in range(start_block, end_block + 1) if number in self.counts}
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_planner_sizes_batches_by_density():
+    counts = {number: 0 for number in range(1, 101)}
+    counts.update({number: 400 for number in range(101, 111)})
+    source = FakeDensitySource(counts)
+    planner = BlockRangePlanner(source, target_items=1000, min_blocks=2, max_blocks=50)
+
+    # empty blocks are only bounded by max_blocks
+    assert planner.plan(1, 200) == 50
+    assert planner.plan(51, 200) == 100
+    # dense blocks stop at the target, but never below min_blocks
+    assert planner.plan(101, 200) == 102
+    assert planner.plan(103, 200) == 104
+    # the head limits the batch
+    assert planner.plan(105, 106) == 106
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_planner_reuses_prefetched_counts():
+    source = FakeDensitySource({number: 10 for number in range(1, 21)})
+    planner = BlockRangePlanner(source, target_items=50, min_blocks=1, max_blocks=10)
+
+    assert planner.plan(1, 100) == 5
+    assert planner.plan(6, 100) == 10
+    assert source.requests == [(1, 10), (11, 15)]
+
+    # unknown blocks fall back to min_blocks
+    assert planner.plan(21, 100) == 21
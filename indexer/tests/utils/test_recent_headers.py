@@ -0,0 +1,35 @@
+import pytest
+
+from indexer.tests.factories import make_block
+from indexer.utils.recent_headers import RecentHeaders
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_recent_headers_detects_parent_mismatch():
+    headers = RecentHeaders(size=4)
+
+    assert headers.extend([make_block(number) for number in range(100, 103)]) is None
+    assert headers.extend([make_block(number) for number in range(103, 106)]) is None
+    assert headers.numbers() == [102, 103, 104, 105]
+    assert headers.oldest() == 102
+
+    assert headers.extend([make_block(106, fork="f"), make_block(107, fork="f")]) == 106
+    assert headers.get(107) == "0xf6b"
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_recent_headers_persist_and_truncate(tmp_path):
+    file_name = str(tmp_path / "recent_headers.json")
+    headers = RecentHeaders(size=8, file_name=file_name)
+    headers.extend([make_block(number) for number in range(10, 15)])
+    headers.update({12: "0xabc"})
+    headers.save()
+
+    loaded = RecentHeaders(size=8, file_name=file_name)
+    loaded.load()
+    loaded.truncate(12)
+    assert loaded.numbers() == [10, 11, 12]
+    assert loaded.get(12) == "0xabc"
+    assert 13 not in loaded
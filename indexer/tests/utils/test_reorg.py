@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+
+import pytest
+
+from indexer.domain.block import Block
+from indexer.domain.log import Log
+from indexer.domain.transaction import Transaction
+from indexer.utils import reorg
+
+
+class FakeCursor:
+    def __init__(self, rowcounts, rows):
+        self.rowcounts = rowcounts
+        self.rows = rows
+        self.executed = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+        table_name = sql.split()[1]
+        self.rowcount = self.rowcounts.get(table_name, 0)
+
+    def fetchall(self):
+        return self.rows.pop(0)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class FakeService:
+    def __init__(self, rowcounts=None, rows=None):
+        self.cur = FakeCursor(rowcounts or {}, rows or [])
+        self.conn = FakeConnection(self.cur)
+
+    @contextmanager
+    def connection_scope(self):
+        yield self.conn
+
+    @contextmanager
+    def cursor_scope(self):
+        yield self.cur
+
+
+class BlocksJob:
+    output_types = [Block]
+
+
+class TransactionsJob:
+    output_types = [Transaction, Log]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_set_reorg_sign_marks_range_in_one_transaction():
+    service = FakeService(rowcounts={"blocks": 3, "transactions": 5})
+    reorg.reset_reorged_tables_cache([BlocksJob, TransactionsJob])
+
+    marked = reorg.set_reorg_sign([BlocksJob, TransactionsJob, BlocksJob], 100, service, 102)
+
+    assert marked == {"blocks", "transactions"}
+    assert service.conn.commits == 1
+    assert [sql.split()[1] for sql, _ in service.cur.executed] == ["blocks", "transactions", "logs"]
+    assert all(params[1:] == (100, 102) for _, params in service.cur.executed)
+
+    # the answer is reused by every job in the rerun without touching the database
+    tables = {config["table"].__tablename__: config["table"] for config in reorg.domain_model_mapping.values()}
+    assert reorg.should_reorg(100, tables["transactions"], service, 102)
+    assert not reorg.should_reorg(100, tables["logs"], service, 102)
+    assert len(service.cur.executed) == 3
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_should_reorg_checks_candidate_tables_together():
+    service = FakeService(rows=[[("logs",)], []])
+    reorg.reset_reorged_tables_cache([BlocksJob, TransactionsJob])
+    tables = {config["table"].__tablename__: config["table"] for config in reorg.domain_model_mapping.values()}
+
+    assert reorg.should_reorg(7, tables["logs"], service)
+    assert not reorg.should_reorg(7, tables["transactions"], service)
+    assert not reorg.should_reorg(7, tables["blocks"], service)
+
+    # one query for the tables keyed by number, one for those keyed by block_number
+    assert len(service.cur.executed) == 2
+    groups = sorted(sorted(params[0::3]) for _, params in service.cur.executed)
+    assert groups == [["blocks"], ["logs", "transactions"]]
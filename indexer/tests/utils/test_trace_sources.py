@@ -0,0 +1,140 @@
+import os
+from dataclasses import replace
+
+import orjson
+import pytest
+
+from indexer.bench.synthetic_chain import ChainProfile, SyntheticChain
+from indexer.jobs.export_traces_job import traces_rpc_requests
+from indexer.utils.trace_sources import TRACE_SOURCES, detect_trace_source, get_trace_source, is_unsupported_error
+
+CHAIN = SyntheticChain(
+    ChainProfile(blocks=3, transactions_per_block=20, trace_depth=3, trace_fanout=3, contract_creation_rate=0.3)
+)
+
+
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "traces_block_15000000.json"), "rb") as f:
+    # one block in the responses of geth and erigon: nested calls, a selfdestruct, a reverted transaction,
+    # a create out of gas, a failed call below a create2, and block and uncle rewards
+    FIXTURE = orjson.loads(f.read())
+
+
+def make_request(params, unsupported=()):
+    payload = orjson.loads(params)
+    responses = []
+    for call in payload if isinstance(payload, list) else [payload]:
+        tracer = call["params"][1].get("tracer") if call["method"] == "debug_traceBlockByNumber" else None
+        if call["method"] in unsupported:
+            error = {"code": -32601, "message": f"the method {call['method']} does not exist/is not available"}
+            responses.append({"jsonrpc": "2.0", "id": call["id"], "error": error})
+        elif tracer in unsupported:
+            responses.append(
+                {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": "tracer not found"}}
+            )
+        else:
+            responses.append({"jsonrpc": "2.0", "id": call["id"], **CHAIN.get(call["method"], call["params"])})
+    # through json like a real node, the sources release the frames of the responses they consume
+    return orjson.loads(orjson.dumps(responses if isinstance(payload, list) else responses[0]))
+
+
+def blocks():
+    result = []
+    for number in (1, 2):
+        block = CHAIN.get_block_by_number(hex(number), True)
+        result.append(
+            {
+                "number": number,
+                "hash": block["hash"],
+                "timestamp": int(block["timestamp"], 16),
+                "transactions": block["transactions"],
+            }
+        )
+    return result
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_every_source_produces_the_call_tracer_traces():
+    expected = list(traces_rpc_requests(make_request, blocks(), True, get_trace_source("call_tracer")))
+    assert any(trace.is_contract_creation() for trace in expected)
+    assert any(trace.call_type == "delegatecall" and trace.trace_address for trace in expected)
+
+    for name in TRACE_SOURCES:
+        assert list(traces_rpc_requests(make_request, blocks(), True, get_trace_source(name))) == expected, name
+
+
+def make_fixture_request(params):
+    payload = orjson.loads(params)
+    responses = []
+    for call in payload:
+        if call["method"] == "trace_block":
+            result = FIXTURE["trace_block"]
+        else:
+            result = FIXTURE["debug_traceBlockByNumber"][call["params"][1]["tracer"]]
+        responses.append({"jsonrpc": "2.0", "id": call["id"], "result": result})
+    return orjson.loads(orjson.dumps(responses))
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_node_responses_of_every_source_give_the_call_tracer_traces():
+    expected = list(
+        traces_rpc_requests(make_fixture_request, [FIXTURE["block"]], True, get_trace_source("call_tracer"))
+    )
+    assert [(trace.trace_type, trace.call_type, trace.status) for trace in expected] == [
+        ("call", "call", 1),
+        ("call", "delegatecall", 1),
+        ("call", "staticcall", 1),
+        ("suicide", "", 1),
+        ("call", "call", 0),
+        ("call", "call", 1),
+        ("create", "", 0),
+        ("call", "call", 1),
+        ("create2", "", 1),
+        ("call", "call", 0),
+    ]
+    # the parity format has no result for a failed frame
+    expected_parity = [
+        replace(trace, gas_used=None, output=None) if trace.error is not None else trace for trace in expected
+    ]
+
+    for name in ("trace_block", "flat_call_tracer"):
+        traces = list(traces_rpc_requests(make_fixture_request, [FIXTURE["block"]], True, get_trace_source(name)))
+        assert traces == expected_parity, name
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_only_method_and_tracer_errors_are_unsupported():
+    assert is_unsupported_error({"code": -32601, "message": "Method not found"})
+    assert is_unsupported_error({"code": -32000, "message": "the method trace_block does not exist/is not available"})
+    assert is_unsupported_error({"code": -32000, "message": "tracer not found"})
+    assert is_unsupported_error({"code": -32000, "message": "Method trace_block is not supported"})
+
+    assert not is_unsupported_error({"code": -32000, "message": "header not found"})
+    assert not is_unsupported_error({"code": -32000, "message": "block #15000000 not found"})
+    assert not is_unsupported_error({"code": -32000, "message": "required historical state unavailable"})
+    assert not is_unsupported_error({"code": -32000, "message": "state for block 15000000 does not exist"})
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+@pytest.mark.parametrize(
+    "unsupported, expected",
+    [
+        ((), "trace_block"),
+        (("trace_block",), "flat_call_tracer"),
+        (("trace_block", "flatCallTracer"), "call_tracer"),
+    ],
+)
+def test_detect_trace_source_falls_back_to_supported_sources(unsupported, expected):
+    source = detect_trace_source(lambda params: make_request(params, unsupported), 1)
+
+    assert source.name == expected
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_unknown_trace_source_is_rejected():
+    with pytest.raises(ValueError):
+        get_trace_source("prestate_tracer")
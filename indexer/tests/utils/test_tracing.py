@@ -0,0 +1,95 @@
+import orjson
+import pytest
+
+from indexer.executors.bounded_executor import BoundedExecutor
+from indexer.utils import tracing
+from indexer.utils.tracing import NOOP_SPAN, configure_tracing, disable_tracing, span
+
+
+def read_chrome_events(path):
+    content = open(path, "rb").read().rstrip().rstrip(b",")
+    return [event for event in orjson.loads(content + b"]") if event["ph"] == "X"]
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_span_is_noop_when_disabled():
+    disable_tracing()
+    assert span("run_jobs") is NOOP_SPAN
+    fn = lambda: 1
+    assert tracing.propagate(fn) is fn
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_chrome_trace_links_spans_across_threads(tmp_path):
+    path = str(tmp_path / "trace.json")
+    configure_tracing(path, "chrome")
+    try:
+        executor = BoundedExecutor(10, 2)
+        with span("run_jobs", start_block=1, end_block=10):
+            with span("_collect"):
+                futures = [executor.submit(lambda: span("batch_work", size=1).finish()) for _ in range(3)]
+                for future in futures:
+                    future.result()
+        executor.shutdown()
+    finally:
+        disable_tracing()
+
+    events = {event["args"]["span_id"]: event for event in read_chrome_events(path) if event["name"] != "batch_work"}
+    works = [event for event in read_chrome_events(path) if event["name"] == "batch_work"]
+    collect = next(event for event in events.values() if event["name"] == "_collect")
+    root = next(event for event in events.values() if event["name"] == "run_jobs")
+
+    assert len(works) == 3
+    assert all(work["args"]["parent_span_id"] == collect["args"]["span_id"] for work in works)
+    assert collect["args"]["parent_span_id"] == root["args"]["span_id"]
+    assert "parent_span_id" not in root["args"]
+    assert root["args"]["start_block"] == 1
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_otlp_trace_shares_trace_id(tmp_path):
+    path = str(tmp_path / "trace.otlp.jsonl")
+    configure_tracing(path, "otlp")
+    try:
+        with span("run_jobs"):
+            with pytest.raises(ValueError):
+                with span("_export"):
+                    raise ValueError("boom")
+    finally:
+        disable_tracing()
+
+    lines = open(path, "rb").read().splitlines()
+    spans = [s for line in lines for s in orjson.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    by_name = {s["name"]: s for s in spans}
+
+    assert by_name["_export"]["traceId"] == by_name["run_jobs"]["traceId"]
+    assert by_name["_export"]["parentSpanId"] == by_name["run_jobs"]["spanId"]
+    assert by_name["_export"]["status"] == {"code": 2}
+    assert by_name["run_jobs"]["parentSpanId"] == ""
+
+
+@pytest.mark.indexer
+@pytest.mark.indexer_utils
+def test_failed_rpc_requests_are_traced(tmp_path, monkeypatch):
+    from indexer.utils import provider
+
+    def make_post_request(endpoint_uri, data, **kwargs):
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr(provider, "make_post_request", make_post_request)
+    path = str(tmp_path / "trace.json")
+    configure_tracing(path, "chrome")
+    try:
+        with pytest.raises(TimeoutError):
+            provider.BatchHTTPProvider("http://failing-node:8545").make_request(
+                params=b'{"jsonrpc":"2.0","method":"eth_blockNumber","id":1}'
+            )
+    finally:
+        disable_tracing()
+
+    rpc = next(event for event in read_chrome_events(path) if event["name"] == "rpc")
+    assert rpc["args"]["method"] == "eth_blockNumber"
+    assert rpc["args"]["error"] == "TimeoutError"
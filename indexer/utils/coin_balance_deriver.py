@@ -0,0 +1,231 @@
+import logging
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Set
+
+from indexer.domain.block import Block
+from indexer.domain.trace import Trace
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10**9
+
+# value moving is skipped for these frames, they run foreign code against the caller's own balance
+NON_TRANSFER_CALL_TYPES = {"delegatecall", "callcode", "staticcall"}
+
+
+@dataclass
+class BlockBalanceChange:
+    number: int
+    timestamp: int
+    deltas: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    touched: Dict[str, None] = field(default_factory=dict)
+    forced: Set[str] = field(default_factory=set)
+    # unknown state changes happened in this block, cached balances can not be trusted anymore
+    reset: bool = False
+
+    def touch(self, address):
+        if address is not None:
+            self.touched[address] = None
+
+    def move(self, from_address, to_address, value):
+        self.deltas[from_address] -= value
+        self.deltas[to_address] += value
+
+
+def is_placeholder_trace(trace: Trace):
+    return trace.trace_id is not None and trace.trace_id.endswith("_?_?")
+
+
+def trace_path(trace: Trace):
+    return tuple(trace.trace_address) if isinstance(trace.trace_address, list) else None
+
+
+def block_balance_change(block: Block, traces: List[Trace]) -> BlockBalanceChange:
+    change = BlockBalanceChange(number=block.number, timestamp=block.timestamp)
+    change.touch(block.miner)
+
+    # pre-merge blocks pay static block and uncle rewards which are not visible in traces
+    if block.difficulty:
+        change.forced.add(block.miner)
+
+    traces_by_transaction = defaultdict(list)
+    for trace in traces:
+        if is_placeholder_trace(trace) or trace_path(trace) is None:
+            change.reset = True
+        traces_by_transaction[trace.transaction_hash].append(trace)
+
+    base_fee_per_gas = block.base_fee_per_gas or 0
+    for transaction in block.transactions:
+        change.touch(transaction.from_address)
+        change.touch(transaction.to_address)
+
+        transaction_traces = traces_by_transaction.get(transaction.hash)
+        if not transaction_traces:
+            change.reset = True
+            continue
+
+        root = next((trace for trace in transaction_traces if trace_path(trace) == ()), None)
+        receipt = transaction.receipt
+        gas_used = receipt.gas_used if receipt and receipt.gas_used is not None else (root and root.gas_used)
+        gas_price = (
+            receipt.effective_gas_price
+            if receipt and receipt.effective_gas_price is not None
+            else transaction.gas_price
+        )
+        if gas_used is None or gas_price is None:
+            change.forced.add(transaction.from_address)
+        else:
+            change.deltas[transaction.from_address] -= gas_used * gas_price
+            change.deltas[block.miner] += gas_used * max(gas_price - base_fee_per_gas, 0)
+
+        if receipt:
+            change.deltas[transaction.from_address] -= receipt.l1_fee or 0
+            change.deltas[transaction.from_address] -= (receipt.blob_gas_used or 0) * (receipt.blob_gas_price or 0)
+        elif transaction.blob_versioned_hashes:
+            change.forced.add(transaction.from_address)
+
+        failed_paths = {trace_path(trace) for trace in transaction_traces if trace.status == 0}
+        for trace in transaction_traces:
+            if not (trace.is_contract_creation() or trace.is_transfer_value()):
+                continue
+            change.touch(trace.from_address)
+            change.touch(trace.to_address)
+
+            if not trace.value or trace.call_type in NON_TRANSFER_CALL_TYPES:
+                continue
+            path = trace_path(trace)
+            if any(path[:depth] in failed_paths for depth in range(len(path) + 1)):
+                continue
+            change.move(trace.from_address, trace.to_address, trace.value)
+
+        for trace in transaction_traces:
+            # a self destruct to itself burns the balance before cancun
+            if trace.trace_type == "suicide" and trace.from_address == trace.to_address:
+                change.touch(trace.from_address)
+                change.forced.add(trace.from_address)
+
+    for withdrawal in block.withdrawals or []:
+        if isinstance(withdrawal, dict):
+            change.touch(withdrawal["address"])
+            change.deltas[withdrawal["address"]] += withdrawal["amount"] * GWEI
+        else:
+            change.reset = True
+
+    return change
+
+
+class CoinBalanceDeriver:
+    """
+    Derive native coin balances from value transfers, gas fees, miner tips and withdrawals.
+
+    eth_getBalance is only requested for addresses seen for the first time, addresses whose changes can not be
+    derived from the given data, and addresses whose last verified balance is older than reconcile_interval blocks.
+    The cache is only valid while batches come in block order, it is dropped whenever a batch is not contiguous.
+    Balance changes that never show up in traces (L2 deposit mints, fee vaults, uncle rewards) are only corrected
+    by the periodic reconciliation.
+    """
+
+    def __init__(self, reconcile_interval=10000, max_cached_addresses=1000000):
+        self.reconcile_interval = reconcile_interval
+        self.max_cached_addresses = max_cached_addresses
+        # address -> (balance, last verified block number)
+        self._balances = OrderedDict()
+        self._last_block = None
+        self.mismatches = 0
+
+    def derive(self, blocks: List[Block], traces: List[Trace], fetch_balances: Callable[[List[dict]], List[dict]]):
+        if not blocks:
+            return []
+
+        blocks = sorted(blocks, key=lambda block: block.number)
+        if self._last_block is None or blocks[0].number != self._last_block + 1:
+            self._balances.clear()
+
+        traces_by_block = defaultdict(list)
+        for trace in traces:
+            traces_by_block[trace.block_number].append(trace)
+        changes = [block_balance_change(block, traces_by_block[block.number]) for block in blocks]
+
+        queries = self._plan_queries(changes)
+        fetched = {}
+        if queries:
+            for coin_balance in fetch_balances(queries):
+                fetched[(coin_balance["address"], coin_balance["block_number"])] = coin_balance["balance"]
+
+        coin_balances = self._apply(changes, fetched)
+        while len(self._balances) > self.max_cached_addresses:
+            self._balances.popitem(last=False)
+        self._last_block = blocks[-1].number
+
+        logger.info(
+            f"Derived {len(coin_balances) - len(queries)} coin balances, requested {len(queries)} from rpc, "
+            f"{len(self._balances)} addresses cached"
+        )
+        return coin_balances
+
+    def _need_query(self, change: BlockBalanceChange, address, verified_block):
+        return (
+            change.reset
+            or address in change.forced
+            or verified_block is None
+            or change.number - verified_block >= self.reconcile_interval
+        )
+
+    def _plan_queries(self, changes: List[BlockBalanceChange]):
+        verified = {address: verified_block for address, (_, verified_block) in self._balances.items()}
+        queries = []
+        for change in changes:
+            if change.reset:
+                verified.clear()
+            for address in change.touched:
+                if self._need_query(change, address, verified.get(address)):
+                    queries.append(
+                        {"address": address, "block_number": change.number, "block_timestamp": change.timestamp}
+                    )
+                    verified[address] = change.number
+        return queries
+
+    def _apply(self, changes: List[BlockBalanceChange], fetched: dict):
+        coin_balances = []
+        for change in changes:
+            if change.reset:
+                self._balances.clear()
+            for address in change.touched:
+                cached = self._balances.get(address)
+                if (address, change.number) in fetched:
+                    balance = fetched[(address, change.number)]
+                    if (
+                        cached is not None
+                        and balance is not None
+                        and address not in change.forced
+                        and cached[0] + change.deltas.get(address, 0) != balance
+                    ):
+                        self.mismatches += 1
+                        logger.warning(
+                            f"Derived coin balance of {address} at block {change.number} drifted from the node, "
+                            f"derived {cached[0] + change.deltas.get(address, 0)}, fetched {balance}"
+                        )
+                    verified_block = change.number
+                elif cached is not None:
+                    balance = cached[0] + change.deltas.get(address, 0)
+                    verified_block = cached[1]
+                else:
+                    # the base balance request failed, wait for the next touch to fetch again
+                    balance = None
+
+                if balance is None:
+                    self._balances.pop(address, None)
+                else:
+                    self._balances[address] = (balance, verified_block)
+                    self._balances.move_to_end(address)
+
+                coin_balances.append(
+                    {
+                        "address": address,
+                        "balance": balance,
+                        "block_number": change.number,
+                        "block_timestamp": change.timestamp,
+                    }
+                )
+        return coin_balances
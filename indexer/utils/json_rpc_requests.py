@@ -10,16 +10,25 @@ def generate_get_block_by_number_json_rpc(block_numbers, include_transactions):
         )
 
 
-def generate_trace_block_by_number_json_rpc(block_numbers):
+def generate_trace_block_by_number_json_rpc(block_numbers, tracer="callTracer"):
     for block_number in block_numbers:
         yield generate_json_rpc(
             method="debug_traceBlockByNumber",
-            params=[hex(block_number), {"tracer": "callTracer"}],
+            params=[hex(block_number), {"tracer": tracer}],
             # save block_number in request ID, so later we can identify block number in response
             request_id=block_number,
         )
 
 
+def generate_trace_block_json_rpc(block_numbers):
+    for block_number in block_numbers:
+        yield generate_json_rpc(
+            method="trace_block",
+            params=[hex(block_number)],
+            request_id=block_number,
+        )
+
+
 def generate_get_receipt_json_rpc(transaction_hashes):
     for idx, transaction_hash in enumerate(transaction_hashes):
         yield generate_json_rpc(
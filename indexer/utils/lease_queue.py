@@ -0,0 +1,206 @@
+import logging
+import os
+import socket
+import zlib
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEASE_PENDING = "pending"
+LEASE_LEASED = "leased"
+LEASE_COMPLETED = "completed"
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class AdaptiveChunker:
+    """
+    Size the next lease from the throughput of the previous ones, so every lease takes about target_seconds
+    whatever the block density of the range is.
+    """
+
+    def __init__(self, initial_blocks, min_blocks, max_blocks, target_seconds=120, smoothing=0.5):
+        self.min_blocks = min_blocks
+        self.max_blocks = max_blocks
+        self.target_seconds = target_seconds
+        self.smoothing = smoothing
+        self.size = self._clamp(initial_blocks)
+        self._blocks_per_second = None
+
+    def _clamp(self, blocks):
+        return int(max(self.min_blocks, min(self.max_blocks, blocks)))
+
+    def update(self, blocks, seconds):
+        if blocks <= 0 or seconds <= 0:
+            return self.size
+        rate = blocks / seconds
+        if self._blocks_per_second is None:
+            self._blocks_per_second = rate
+        else:
+            self._blocks_per_second = self.smoothing * rate + (1 - self.smoothing) * self._blocks_per_second
+        self.size = self._clamp(self._blocks_per_second * self.target_seconds)
+        return self.size
+
+
+class PGLeaseQueue:
+    """
+    Block range leases shared by every worker of a mission. Ranges are claimed with FOR UPDATE SKIP LOCKED,
+    so concurrent workers never wait on each other, and a lease whose holder stops heartbeating expires and
+    is claimed again by someone else.
+    """
+
+    def __init__(self, key, service, lease_seconds=300, worker=None):
+        self.key = key
+        self.service = service
+        self.lease_seconds = lease_seconds
+        self.worker = worker or default_worker_name()
+
+    def plan(self, start_block, end_block, chunk_size=100000):
+        # chunk boundaries only depend on the arguments, every worker can plan the same mission safely
+        rows = [
+            (self.key, chunk_start, min(chunk_start + chunk_size - 1, end_block), LEASE_PENDING)
+            for chunk_start in range(start_block, end_block + 1, chunk_size)
+        ]
+        with self.service.connection_scope() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT 1 FROM block_range_leases WHERE mission_sign = %s AND start_block_number <= %s "
+                        "AND end_block_number >= %s LIMIT 1",
+                        (self.key, end_block, start_block),
+                    )
+                    if cur.fetchone() is not None:
+                        logger.info(f"Lease queue {self.key} is already planned, joining it.")
+                        conn.rollback()
+                        return
+                    cur.executemany(
+                        "INSERT INTO block_range_leases "
+                        "(mission_sign, start_block_number, end_block_number, status, attempts, update_time) "
+                        "VALUES (%s, %s, %s, %s, 0, now()) ON CONFLICT DO NOTHING",
+                        rows,
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        logger.info(f"Planned {len(rows)} leases for blocks {start_block} to {end_block} in queue {self.key}")
+
+    def claim(self, max_blocks) -> Optional[Tuple[int, int]]:
+        with self.service.connection_scope() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT start_block_number, end_block_number FROM block_range_leases "
+                        "WHERE mission_sign = %s AND (status = %s OR (status = %s AND lease_expire_time < now())) "
+                        "ORDER BY start_block_number LIMIT 1 FOR UPDATE SKIP LOCKED",
+                        (self.key, LEASE_PENDING, LEASE_LEASED),
+                    )
+                    row = cur.fetchone()
+                    if row is None:
+                        conn.rollback()
+                        return None
+
+                    start_block, end_block = row
+                    lease_end = min(end_block, start_block + max_blocks - 1)
+                    if lease_end < end_block:
+                        # hand the rest of the range back to the queue
+                        cur.execute(
+                            "INSERT INTO block_range_leases "
+                            "(mission_sign, start_block_number, end_block_number, status, attempts, update_time) "
+                            "VALUES (%s, %s, %s, %s, 0, now())",
+                            (self.key, lease_end + 1, end_block, LEASE_PENDING),
+                        )
+                    cur.execute(
+                        "UPDATE block_range_leases SET end_block_number = %s, status = %s, worker = %s, "
+                        "attempts = attempts + 1, lease_expire_time = now() + make_interval(secs => %s), "
+                        "heartbeat_time = now(), update_time = now() "
+                        "WHERE mission_sign = %s AND start_block_number = %s",
+                        (lease_end, LEASE_LEASED, self.worker, self.lease_seconds, self.key, start_block),
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return start_block, lease_end
+
+    def _update_lease(self, start_block, set_clause, params):
+        with self.service.connection_scope() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"UPDATE block_range_leases SET {set_clause}, update_time = now() "
+                        "WHERE mission_sign = %s AND start_block_number = %s AND worker = %s AND status = %s",
+                        (*params, self.key, start_block, self.worker, LEASE_LEASED),
+                    )
+                    updated = cur.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return updated > 0
+
+    def heartbeat(self, start_block) -> bool:
+        # False means the lease expired and may already be held by another worker
+        return self._update_lease(
+            start_block,
+            "lease_expire_time = now() + make_interval(secs => %s), heartbeat_time = now()",
+            (self.lease_seconds,),
+        )
+
+    def complete(self, start_block) -> bool:
+        return self._update_lease(start_block, "status = %s", (LEASE_COMPLETED,))
+
+    def release(self, start_block) -> bool:
+        return self._update_lease(start_block, "status = %s, lease_expire_time = NULL", (LEASE_PENDING,))
+
+    def outstanding(self) -> int:
+        with self.service.cursor_scope() as cur:
+            cur.execute(
+                "SELECT count(*) FROM block_range_leases WHERE mission_sign = %s AND status <> %s",
+                (self.key, LEASE_COMPLETED),
+            )
+            return cur.fetchone()[0]
+
+
+class PGLeaderLock:
+    """
+    Session level advisory lock, only the holder of the lock follows the chain tip for a mission.
+    """
+
+    def __init__(self, key, service):
+        self.key = key
+        self.service = service
+        self.lock_id = zlib.crc32(f"hemera_leader:{key}".encode())
+        self._conn = None
+
+    def try_acquire(self) -> bool:
+        if self._conn is not None:
+            return True
+        conn = self.service.get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+                acquired = cur.fetchone()[0]
+            conn.commit()
+        except Exception:
+            self.service.release_conn(conn)
+            raise
+        if acquired:
+            # the lock lives as long as this connection, keep it out of the pool
+            self._conn = conn
+        else:
+            self.service.release_conn(conn)
+        return acquired
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (self.lock_id,))
+            self._conn.commit()
+        finally:
+            self.service.release_conn(self._conn)
+            self._conn = None
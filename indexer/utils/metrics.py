@@ -0,0 +1,209 @@
+import logging
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in pairs) + "}"
+
+
+class Metric(object):
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}{_format_labels(key)}", value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state["buckets"]):
+                    samples.append((f"{self.name}_bucket{_format_labels(key, [('le', bound)])}", count))
+                samples.append((f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])}", state["count"]))
+                samples.append((f"{self.name}_sum{_format_labels(key)}", state["sum"]))
+                samples.append((f"{self.name}_count{_format_labels(key)}", state["count"]))
+        return samples
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {"labels": dict(key), "sum": state["sum"], "count": state["count"]}
+                for key, state in self._values.items()
+            ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, documentation, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, documentation, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation) -> Counter:
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name, documentation) -> Gauge:
+        return self._register(Gauge, name, documentation)
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the prometheus text exposition format.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(f"{sample} {value}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+
+registry = MetricsRegistry()
+
+JOB_DURATION = registry.histogram("hemera_job_duration_seconds", "Wall time of one job run.")
+JOB_CPU = registry.counter("hemera_job_cpu_seconds_total", "Process cpu time spent while a job was running.")
+JOB_ITEMS = registry.counter("hemera_job_items_total", "Items produced by jobs, by output type.")
+RPC_REQUESTS = registry.counter("hemera_rpc_requests_total", "JSON-RPC calls sent, batched calls counted one by one.")
+RPC_DURATION = registry.histogram("hemera_rpc_request_duration_seconds", "Latency of one RPC round trip.")
+RPC_REQUEST_BYTES = registry.counter("hemera_rpc_request_bytes_total", "Bytes sent to RPC endpoints.")
+RPC_RESPONSE_BYTES = registry.counter("hemera_rpc_response_bytes_total", "Bytes received from RPC endpoints.")
+EXECUTOR_BATCH_SIZE = registry.histogram(
+    "hemera_executor_batch_size", "Batch sizes chosen by BatchWorkExecutor.", buckets=SIZE_BUCKETS
+)
+MULTICALL_CHUNKS = registry.counter("hemera_multicall_chunks_total", "Multicall chunks sent.")
+MULTICALL_CHUNK_CALLS = registry.histogram(
+    "hemera_multicall_chunk_calls", "Calls aggregated in one multicall chunk.", buckets=SIZE_BUCKETS
+)
+MULTICALL_FALLBACK_CALLS = registry.counter(
+    "hemera_multicall_fallback_calls_total", "Calls sent as plain eth_call, before deployment or after failure."
+)
+EXPORTER_ROWS = registry.counter("hemera_exporter_rows_total", "Rows written by exporters, by table.")
+EXPORTER_DURATION = registry.histogram("hemera_exporter_write_seconds", "Time spent writing one table in a batch.")
+BUFFER_ITEMS = registry.gauge("hemera_buffer_items", "Items held in the job data buffer, by type.")
+PROCESS_MAX_RSS = registry.gauge("hemera_process_max_rss_bytes", "Peak resident memory of the process.")
+LAST_SYNCED_BLOCK = registry.gauge("hemera_last_synced_block", "Last block recorded as synced.")
+CHAIN_HEAD_LAG = registry.gauge("hemera_chain_head_lag_blocks", "Blocks between the chain head and the last synced.")
+
+
+def record_process_memory():
+    # ru_maxrss is in kilobytes on linux
+    PROCESS_MAX_RSS.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        record_process_memory()
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+def start_metrics_logger(interval_seconds):
+    def report():
+        while True:
+            time.sleep(interval_seconds)
+            record_process_memory()
+            logger.info(orjson.dumps({"metrics": registry.snapshot()}).decode())
+
+    thread = threading.Thread(target=report, name="metrics-logger", daemon=True)
+    thread.start()
+    return thread
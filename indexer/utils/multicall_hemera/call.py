@@ -1,18 +1,25 @@
 import logging
+from functools import lru_cache
 from typing import Any, List, Optional, Sequence, Union
 
-import orjson
 from eth_typing import Address, ChecksumAddress, HexAddress
 from eth_utils import to_checksum_address
 
 from common.utils.abi_code_utils import Function
 from common.utils.format_utils import format_block_id
+from indexer.utils.multicall_hemera.util import next_rpc_id
 
 logger = logging.getLogger(__name__)
 
 AnyAddress = Union[str, Address, ChecksumAddress, HexAddress]
 
 
+@lru_cache(maxsize=65536)
+def checksum_address(address: AnyAddress) -> ChecksumAddress:
+    # the same contracts are called for every block, cache their keccak based checksums
+    return to_checksum_address(address)
+
+
 class Call:
 
     def __init__(
@@ -24,7 +31,7 @@ class Call:
         gas_limit: Optional[int] = None,
         user_defined_k: Optional[Any] = None,
     ) -> None:
-        self.target = to_checksum_address(target)
+        self.target = checksum_address(target)
         self.block_number = block_number
         self.gas_limit = gas_limit
 
@@ -63,7 +70,7 @@ class Call:
                 "jsonrpc": "2.0",
                 "method": "eth_call",
                 "params": args,
-                "id": abs(hash(orjson.dumps(args))),
+                "id": next_rpc_id(),
             }
         return self._rpc_params
 
@@ -1,12 +1,10 @@
 from typing import List, Optional
 
-import orjson
-
 from common.utils.format_utils import format_block_id, hex_str_to_bytes
 from indexer.utils.multicall_hemera import Call
 from indexer.utils.multicall_hemera.abi import AGGREGATE_FUNC, TRY_BLOCK_AND_AGGREGATE_FUNC
 from indexer.utils.multicall_hemera.constants import GAS_LIMIT, get_multicall_address, get_multicall_network
-from indexer.utils.multicall_hemera.util import calculate_execution_time
+from indexer.utils.multicall_hemera.util import calculate_execution_time, next_rpc_id
 
 
 class Multicall:
@@ -47,5 +45,5 @@ class Multicall:
             "jsonrpc": "2.0",
             "method": "eth_call",
             "params": args,
-            "id": abs(hash(orjson.dumps(args))),
+            "id": next_rpc_id(),
         }
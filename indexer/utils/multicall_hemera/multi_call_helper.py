@@ -11,6 +11,7 @@ from typing import List
 
 from common.utils.exception_control import FastShutdownError
 from common.utils.format_utils import bytes_to_hex_str
+from indexer.utils.metrics import MULTICALL_CHUNK_CALLS, MULTICALL_CHUNKS, MULTICALL_FALLBACK_CALLS
 from indexer.utils.multicall_hemera import Call, Multicall
 from indexer.utils.multicall_hemera.abi import TRY_BLOCK_AND_AGGREGATE_FUNC
 from indexer.utils.multicall_hemera.constants import CALLS_LIMIT, GAS_LIMIT, get_multicall_network
@@ -101,6 +102,9 @@ class MultiCallHelper:
             multicall_rpc = self.construct_multicall_rpc(to_execute_multi_calls)
             chunks = list(rebatch_by_size(multicall_rpc, to_execute_multi_calls))
             self.logger.info(f"multicall helper after chunk, got={len(chunks)}")
+            MULTICALL_CHUNKS.inc(len(to_execute_multi_calls), chain_id=self.chain_id)
+            for multi_calls in to_execute_multi_calls:
+                MULTICALL_CHUNK_CALLS.observe(len(multi_calls), chain_id=self.chain_id)
             res = self.fetch_result(chunks)
             self.decode_result(to_execute_multi_calls, res, chunks)
             for cls in to_execute_multi_calls:
@@ -109,6 +113,7 @@ class MultiCallHelper:
                         to_execute_batch_calls.append(cl)
         if len(to_execute_batch_calls) > 0:
             self.logger.info(f"multicall helper batch call, got={len(to_execute_batch_calls)}")
+            MULTICALL_FALLBACK_CALLS.inc(len(to_execute_batch_calls), chain_id=self.chain_id)
             self.fetch_raw_calls(to_execute_batch_calls)
         return calls
 
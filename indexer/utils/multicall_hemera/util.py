@@ -5,6 +5,7 @@
 # @File  util.py.py
 # @Brief
 import atexit
+import itertools
 import logging
 import os
 import threading
@@ -17,6 +18,13 @@ from indexer.utils.multicall_hemera.constants import RPC_PAYLOAD_SIZE
 
 logger = logging.getLogger(__name__)
 
+# json-rpc ids only need to be unique within a batch, next() on a count is atomic under the GIL
+_rpc_ids = itertools.count(1)
+
+
+def next_rpc_id():
+    return next(_rpc_ids)
+
 
 def calculate_execution_time(func):
     def wrapper(*args, **kwargs):
@@ -5,12 +5,12 @@ import re
 import click
 
 from common.utils.format_utils import to_snake_case
-from indexer.domain import Domain
 from indexer.exporters.item_exporter import ItemExporterType, check_exporter_in_chosen
+from indexer.jobs.job_modules import import_domain_types
 
 
 def extract_path_from_parameter(cli_path: str) -> str:
-    substrings_to_remove = ["csvfile://", "jsonfile://"]
+    substrings_to_remove = ["csvfile://", "jsonfile://", "parquetfile://"]
     pattern = "|".join(re.escape(sub) for sub in substrings_to_remove)
     file_path = re.sub(pattern, "", cli_path)
 
@@ -21,6 +21,7 @@ def check_file_exporter_parameter(outputs, block_batch_size, blocks_per_file):
     if outputs is not None and (
         check_exporter_in_chosen(outputs, ItemExporterType.CSVFILE)
         or check_exporter_in_chosen(outputs, ItemExporterType.JSONFILE)
+        or check_exporter_in_chosen(outputs, ItemExporterType.PARQUETFILE)
     ):
         if block_batch_size > blocks_per_file and block_batch_size % blocks_per_file != 0:
             raise click.ClickException(
@@ -65,11 +66,11 @@ def generate_dataclass_type_list_from_parameter(require_types: str, generate_typ
     if not require_types:
         return []
 
-    domain_dict = Domain.get_all_domain_dict()
+    require_types = [to_snake_case(output_type) for output_type in require_types.split(",")]
+    domain_dict = import_domain_types(require_types)
     parse_output_types = set()
 
-    for output_type in require_types.split(","):
-        output_type = to_snake_case(output_type)
+    for output_type in require_types:
         if output_type not in domain_dict:
             raise click.ClickException(f"{generate_type} type {output_type} is not supported")
         parse_output_types.add(domain_dict[output_type])
@@ -0,0 +1,254 @@
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+MEMORY_TRACEBACK_FRAMES = 8
+
+_profiler = None
+
+
+def _frame_name(code):
+    filename = "/".join(code.co_filename.replace(os.sep, "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample the stacks of every other thread each interval seconds and count them as collapsed stacks,
+    the input format of flamegraph.pl, speedscope and inferno. The outermost frame running a job method
+    tags the stack with the job name, so work items on pool threads are attributed to their job too.
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(name="hemera-profiler", daemon=True)
+        self.interval = interval
+        self.samples = Counter()
+        self.started = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # imported on demand, the jobs depend on the utils and not the other way round
+        from indexer.jobs.base_job import BaseJob
+
+        own_ident = threading.get_ident()
+        self.started.set()
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self.samples[self._collapse(frame, BaseJob)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def _collapse(self, frame, job_type):
+        frames, job_name = [], None
+        while frame is not None:
+            code = frame.f_code
+            frames.append(_frame_name(code))
+            if code.co_varnames and code.co_varnames[0] == "self":
+                owner = frame.f_locals.get("self")
+                if isinstance(owner, job_type):
+                    # the outermost job frame wins, keep overwriting while walking outwards
+                    job_name = owner.job_name
+            frame = frame.f_back
+        frames.append(job_name or "idle")
+        return ";".join(reversed(frames))
+
+
+class BatchProfiler:
+    """
+    Profile selected batches of a stream or reorg run and write one set of files per batch into output_dir,
+    named after the label, the block range and the process id.
+
+    A batch is kept when it is one of every N batches, 0 disables it, or when it took longer than slower_than
+    seconds. With slower_than every batch is profiled and only the kept ones are written, so prefer the
+    sample mode for it.
+    The sample mode writes a collapsed stack file for flamegraphs and a summary of the hottest frames by job,
+    the cprofile mode writes a pstats file and a text report of the main thread.
+    With memory, allocations are traced during the batch and the largest allocation sites, overall and of
+    the items left in the data buffer, are written as json.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        label="stream",
+        every=1,
+        slower_than=0,
+        mode="sample",
+        interval=0.005,
+        memory=False,
+        top=30,
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}, it should be one of {PROFILE_MODES}")
+        self.output_dir = output_dir
+        self.label = label
+        self.every = every
+        self.slower_than = slower_than
+        self.mode = mode
+        self.interval = interval
+        self.memory = memory
+        self.top = top
+        self.batches = 0
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _every_nth(self):
+        with self._lock:
+            self.batches += 1
+            return self.every > 0 and (self.batches - 1) % self.every == 0
+
+    @contextmanager
+    def batch(self, start_block, end_block, data_buff=None):
+        every_nth = self._every_nth()
+        if not every_nth and self.slower_than <= 0:
+            yield
+            return
+
+        tag = f"{self.label}-{start_block}-{end_block}-{os.getpid()}"
+        sampler, profile = None, None
+        if self.mode == "sample":
+            sampler = StackSampler(self.interval)
+            sampler.start()
+            sampler.started.wait()
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+        trace_memory = self.memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start(MEMORY_TRACEBACK_FRAMES)
+
+        batch_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - batch_start
+            snapshot = tracemalloc.take_snapshot() if self.memory and tracemalloc.is_tracing() else None
+            if sampler is not None:
+                sampler.stop()
+            if profile is not None:
+                profile.disable()
+
+            if every_nth or seconds >= self.slower_than:
+                path = os.path.join(self.output_dir, tag)
+                if sampler is not None:
+                    self._write_samples(path, sampler.samples, seconds)
+                if profile is not None:
+                    self._write_profile(path, profile, seconds)
+                if snapshot is not None:
+                    self._write_memory(path, snapshot, data_buff)
+                logger.info(f"Profiled blocks {start_block} to {end_block} in {seconds:.3f}s into {path}.*")
+            if trace_memory:
+                tracemalloc.stop()
+
+    def _write_samples(self, path, samples, seconds):
+        with open(path + ".collapsed", "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self_samples, job_samples = Counter(), Counter()
+        for stack, count in samples.items():
+            frames = stack.split(";")
+            job_samples[frames[0]] += count
+            self_samples[(frames[0], frames[-1])] += count
+        total = sum(samples.values()) or 1
+        with open(path + ".txt", "w") as f:
+            f.write(f"{seconds:.3f}s, {total} samples every {self.interval * 1000:g}ms\n\n")
+            for job_name, count in job_samples.most_common():
+                f.write(f"{count / total:8.2%}  {job_name}\n")
+            f.write("\nHottest frames by self samples:\n")
+            for (job_name, frame), count in self_samples.most_common(self.top):
+                f.write(f"{count / total:8.2%}  [{job_name}] {frame}\n")
+
+    def _write_profile(self, path, profile, seconds):
+        profile.dump_stats(path + ".prof")
+        with open(path + ".txt", "w") as f:
+            f.write(f"{seconds:.3f}s\n")
+            pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(self.top)
+
+    def _write_memory(self, path, snapshot, data_buff):
+        report = {
+            "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+            "top_allocation_sites": [
+                {"site": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[: self.top]
+            ],
+            "data_buff": buffer_allocation_sites(data_buff or {}, self.top),
+        }
+        with open(path + ".memory.json", "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
+
+def _allocation_site(item):
+    traceback = tracemalloc.get_object_traceback(item)
+    if traceback is None and hasattr(item, "__dict__"):
+        # instances with a managed dict are not tracked before python 3.12, fall back to their attribute values
+        for value in vars(item).values():
+            traceback = tracemalloc.get_object_traceback(value)
+            if traceback is not None:
+                break
+    return str(traceback[-1]) if traceback is not None else "untraced"
+
+
+def buffer_allocation_sites(data_buff, top=30):
+    """
+    Group the items of each data buffer entry by the line that allocated them, largest first.
+    Sizes are shallow, the object plus its attribute dict, and items allocated before tracing started
+    are grouped under "untraced".
+    """
+    report = {}
+    for key, items in data_buff.items():
+        sites = defaultdict(lambda: [0, 0])
+        for item in items:
+            site = sites[_allocation_site(item)]
+            site[0] += sys.getsizeof(item) + (sys.getsizeof(item.__dict__) if hasattr(item, "__dict__") else 0)
+            site[1] += 1
+        report[key] = {
+            "items": len(items),
+            "bytes": sum(size for size, _ in sites.values()),
+            "sites": [
+                {"site": site, "bytes": size, "items": count}
+                for site, (size, count) in sorted(sites.items(), key=lambda entry: -entry[1][0])[:top]
+            ],
+        }
+    return dict(sorted(report.items(), key=lambda entry: -entry[1]["bytes"]))
+
+
+def configure_profiling(output_dir, **kwargs):
+    global _profiler
+    _profiler = BatchProfiler(output_dir, **kwargs)
+    logger.info(f"Writing batch profiles to {output_dir}")
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+
+@contextmanager
+def _no_profile():
+    yield
+
+
+def profile_batch(start_block, end_block, data_buff=None):
+    """
+    Profile one batch when profiling is configured and the batch is selected, otherwise do nothing.
+    """
+    if _profiler is None:
+        return _no_profile()
+    return _profiler.batch(start_block, end_block, data_buff)
@@ -1,5 +1,7 @@
 import json
+import re
 import socket
+import time
 from json import JSONDecodeError
 from urllib.parse import urlparse
 
@@ -7,8 +9,13 @@ from web3 import HTTPProvider, IPCProvider
 from web3._utils.request import make_post_request
 from web3._utils.threads import Timeout
 
+from indexer.utils.metrics import RPC_DURATION, RPC_REQUEST_BYTES, RPC_REQUESTS, RPC_RESPONSE_BYTES
+from indexer.utils.tracing import span
+
 DEFAULT_TIMEOUT = 60
 
+METHOD_PATTERN = re.compile(rb'"method"\s*:\s*"([^"]+)"')
+
 
 def get_provider_from_uri(uri_string, timeout=DEFAULT_TIMEOUT, batch=False):
     uri = urlparse(uri_string)
@@ -27,40 +34,67 @@ def get_provider_from_uri(uri_string, timeout=DEFAULT_TIMEOUT, batch=False):
         raise ValueError("Unknown uri scheme {}".format(uri_string))
 
 
+def record_rpc_metrics(endpoint, request_data, response_size, seconds, rpc_span=None, error=None):
+    head = request_data[:256]
+    match = METHOD_PATTERN.search(head)
+    method = match.group(1).decode() if match else "unknown"
+    calls = request_data.count(b'"method"') if head.lstrip().startswith(b"[") else 1
+    # failed requests, timeouts and http errors included, are labelled with the exception type
+    status = "ok" if error is None else type(error).__name__
+    if rpc_span is not None:
+        rpc_span.set_attribute("method", method)
+        rpc_span.set_attribute("calls", calls)
+        if error is not None:
+            rpc_span.set_attribute("error", type(error).__name__)
+        rpc_span.finish()
+    RPC_REQUESTS.inc(calls, method=method, endpoint=endpoint, status=status)
+    RPC_DURATION.observe(seconds, method=method, endpoint=endpoint, status=status)
+    RPC_REQUEST_BYTES.inc(len(request_data), method=method, endpoint=endpoint)
+    RPC_RESPONSE_BYTES.inc(response_size, method=method, endpoint=endpoint)
+
+
 class BatchIPCProvider(IPCProvider):
     _socket = None
 
     def make_request(self, method=None, params=None):
-        request = params.encode("utf-8")
-        with self._lock, self._socket as sock:
-            try:
-                sock.sendall(request)
-            except BrokenPipeError:
-                # one extra attempt, then give up
-                sock = self._socket.reset()
-                sock.sendall(request)
-
-            raw_response = b""
-            with Timeout(self.timeout) as timeout:
-                while True:
-                    try:
-                        raw_response += sock.recv(4096)
-                    except socket.timeout:
-                        timeout.sleep(0)
-                        continue
-                    if raw_response == b"":
-                        timeout.sleep(0)
-                    elif has_valid_json_rpc_ending(raw_response):
+        request = params.encode("utf-8") if isinstance(params, str) else params
+        start_time = time.perf_counter()
+        rpc_span = span("rpc", endpoint="ipc")
+        raw_response, error = b"", None
+        try:
+            with self._lock, self._socket as sock:
+                try:
+                    sock.sendall(request)
+                except BrokenPipeError:
+                    # one extra attempt, then give up
+                    sock = self._socket.reset()
+                    sock.sendall(request)
+
+                with Timeout(self.timeout) as timeout:
+                    while True:
                         try:
-                            response = json.loads(raw_response.decode("utf-8"))
+                            raw_response += sock.recv(4096)
+                        except socket.timeout:
                             timeout.sleep(0)
-                        except JSONDecodeError:
                             continue
+                        if raw_response == b"":
+                            timeout.sleep(0)
+                        elif has_valid_json_rpc_ending(raw_response):
+                            try:
+                                response = json.loads(raw_response.decode("utf-8"))
+                                timeout.sleep(0)
+                            except JSONDecodeError:
+                                continue
+                            else:
+                                return response
                         else:
-                            return response
-                    else:
-                        timeout.sleep(0)
-                        continue
+                            timeout.sleep(0)
+                            continue
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_rpc_metrics("ipc", request, len(raw_response), time.perf_counter() - start_time, rpc_span, error)
 
 
 class BatchHTTPProvider(HTTPProvider):
@@ -71,7 +105,19 @@ class BatchHTTPProvider(HTTPProvider):
             request_data = params.encode("utf-8")
         else:
             request_data = params
-        raw_response = make_post_request(self.endpoint_uri, request_data, **self.get_request_kwargs())
+        endpoint = urlparse(self.endpoint_uri).hostname
+        start_time = time.perf_counter()
+        rpc_span = span("rpc", endpoint=endpoint)
+        raw_response, error = b"", None
+        try:
+            raw_response = make_post_request(self.endpoint_uri, request_data, **self.get_request_kwargs())
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_rpc_metrics(
+                endpoint, request_data, len(raw_response), time.perf_counter() - start_time, rpc_span, error
+            )
         try:
             response = self.decode_rpc_response(raw_response)
         except JSONDecodeError:
@@ -0,0 +1,211 @@
+import os
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import orjson
+from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert
+
+from common.models.sync_range_records import SyncRangeRecords
+
+RANGE_RUNNING = "running"
+RANGE_COMPLETED = "completed"
+RANGE_FAILED = "failed"
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start_block, end_block in sorted(ranges):
+        if merged and start_block <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_block))
+        else:
+            merged.append((start_block, end_block))
+    return merged
+
+
+def find_gaps(ranges: List[Tuple[int, int]], start_block: int, end_block: int) -> List[Tuple[int, int]]:
+    gaps = []
+    next_block = start_block
+    for range_start, range_end in merge_ranges(ranges):
+        if range_end < next_block:
+            continue
+        if range_start > end_block:
+            break
+        if range_start > next_block:
+            gaps.append((next_block, range_start - 1))
+        next_block = max(next_block, range_end + 1)
+    if next_block <= end_block:
+        gaps.append((next_block, end_block))
+    return gaps
+
+
+def contiguous_end(ranges: List[Tuple[int, int]], last_synced_block: int) -> int:
+    high_water_mark = last_synced_block
+    for range_start, range_end in merge_ranges(ranges):
+        if range_start > high_water_mark + 1:
+            break
+        high_water_mark = max(high_water_mark, range_end)
+    return high_water_mark
+
+
+def utc_now():
+    return datetime.utcfromtimestamp(datetime.now(timezone.utc).timestamp())
+
+
+class BaseRangeLedger(object):
+    def record(self, start_block, end_block, status, worker=None, start_time=None, end_time=None):
+        pass
+
+    def get_ranges(self, start_block=None, end_block=None, status=RANGE_COMPLETED) -> List[Tuple[int, int]]:
+        pass
+
+    def find_gaps(self, start_block, end_block) -> List[Tuple[int, int]]:
+        return find_gaps(self.get_ranges(start_block, end_block), start_block, end_block)
+
+    def high_water_mark(self, last_synced_block, end_block=None) -> int:
+        high_water_mark = contiguous_end(self.get_ranges(last_synced_block + 1, end_block), last_synced_block)
+        return high_water_mark if end_block is None else min(high_water_mark, end_block)
+
+
+class FileRangeLedger(BaseRangeLedger):
+    """
+    Append-only ledger file, one json line per range status change. Single line appends are atomic,
+    so the stream workers can share the file.
+
+    The latest status of every range is kept in memory, each lookup only reads the lines appended
+    since the last one, by this process or another worker.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._latest_status = {}
+        self._offset = 0
+
+    def record(self, start_block, end_block, status, worker=None, start_time=None, end_time=None):
+        line = orjson.dumps(
+            {
+                "start_block_number": start_block,
+                "end_block_number": end_block,
+                "status": status,
+                "worker": worker,
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+        )
+        fd = os.open(self.file_name, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line + b"\n")
+        finally:
+            os.close(fd)
+
+    def _read_appended(self):
+        if not os.path.isfile(self.file_name):
+            return
+
+        with open(self.file_name, "rb") as ledger_file:
+            ledger_file.seek(self._offset)
+            appended = ledger_file.read()
+        # a line still being appended is read with the next lookup
+        complete = appended.rfind(b"\n") + 1
+        self._offset += complete
+        for line in appended[:complete].splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            self._latest_status[(record["start_block_number"], record["end_block_number"])] = record["status"]
+
+    def get_ranges(self, start_block=None, end_block=None, status=RANGE_COMPLETED):
+        self._read_appended()
+        return sorted(
+            (range_start, range_end)
+            for (range_start, range_end), range_status in self._latest_status.items()
+            if range_status == status
+            and (start_block is None or range_end >= start_block)
+            and (end_block is None or range_start <= end_block)
+        )
+
+
+class PGRangeLedger(BaseRangeLedger):
+
+    def __init__(self, key, service):
+        self.key = key
+        self.service = service
+
+    def record(self, start_block, end_block, status, worker=None, start_time=None, end_time=None):
+        session = self.service.get_service_session()
+        values = {
+            "status": status,
+            "worker": worker,
+            "start_time": datetime.utcfromtimestamp(start_time) if start_time else None,
+            "end_time": datetime.utcfromtimestamp(end_time) if end_time else None,
+            "update_time": utc_now(),
+        }
+        try:
+            statement = (
+                insert(SyncRangeRecords)
+                .values(
+                    {
+                        "mission_sign": self.key,
+                        "start_block_number": start_block,
+                        "end_block_number": end_block,
+                        **values,
+                    }
+                )
+                .on_conflict_do_update(
+                    index_elements=[
+                        SyncRangeRecords.mission_sign,
+                        SyncRangeRecords.start_block_number,
+                        SyncRangeRecords.end_block_number,
+                    ],
+                    set_=values,
+                )
+            )
+            session.execute(statement)
+            session.commit()
+        finally:
+            session.close()
+
+    def get_ranges(self, start_block=None, end_block=None, status=RANGE_COMPLETED):
+        conditions = [SyncRangeRecords.mission_sign == self.key, SyncRangeRecords.status == status]
+        if start_block is not None:
+            conditions.append(SyncRangeRecords.end_block_number >= start_block)
+        if end_block is not None:
+            conditions.append(SyncRangeRecords.start_block_number <= end_block)
+
+        session = self.service.get_service_session()
+        try:
+            result = (
+                session.query(SyncRangeRecords.start_block_number, SyncRangeRecords.end_block_number)
+                .filter(and_(*conditions))
+                .order_by(SyncRangeRecords.start_block_number)
+                .all()
+            )
+        finally:
+            session.close()
+        return [(range_start, range_end) for range_start, range_end in result]
+
+
+def create_range_ledger(range_ledger: str, config: dict) -> BaseRangeLedger:
+    recorder_sign = range_ledger.find(":")
+    if recorder_sign == -1:
+        raise ValueError(f"Invalid range ledger: {range_ledger}")
+
+    ledger_type, ledger_key = range_ledger.split(":", 1)
+    if ledger_type == "pg":
+        try:
+            service = config["db_service"]
+        except KeyError:
+            raise ValueError(f"postgresql range ledger must provide pg config.")
+        return PGRangeLedger(ledger_key, service)
+
+    elif ledger_type == "file":
+        return FileRangeLedger(ledger_key)
+
+    else:
+        raise ValueError("Unable to determine range ledger type: " + range_ledger)
+
+
+def default_range_ledger(sync_recorder: str) -> str:
+    # ranges are recorded next to the sync record they belong to
+    ledger_type, ledger_key = sync_recorder.split(":", 1)
+    return f"{ledger_type}:{ledger_key}.ranges" if ledger_type == "file" else sync_recorder
@@ -0,0 +1,128 @@
+import logging
+from typing import Dict
+
+import orjson
+from sqlalchemy import and_, func
+
+from common.models.blocks import Blocks
+from common.models.logs import Logs
+from indexer.utils.json_rpc_requests import generate_get_block_by_number_json_rpc
+from indexer.utils.rpc_utils import rpc_response_batch_to_results
+
+logger = logging.getLogger(__name__)
+
+
+class DensitySource(object):
+    def get_counts(self, start_block, end_block) -> Dict[int, int]:
+        pass
+
+
+class RPCDensitySource(DensitySource):
+    """
+    Transaction counts from a header-only prefetch, eth_getBlockByNumber without transaction bodies.
+    """
+
+    def __init__(self, batch_web3_provider, batch_size=100):
+        self.batch_web3_provider = batch_web3_provider
+        self.batch_size = batch_size
+
+    def get_counts(self, start_block, end_block):
+        counts = {}
+        block_numbers = list(range(start_block, end_block + 1))
+        for offset in range(0, len(block_numbers), self.batch_size):
+            rpc_requests = list(
+                generate_get_block_by_number_json_rpc(block_numbers[offset : offset + self.batch_size], False)
+            )
+            response = self.batch_web3_provider.make_request(params=orjson.dumps(rpc_requests))
+            for block in rpc_response_batch_to_results(response):
+                if block is None:
+                    # the node does not have the block yet, stop planning here
+                    return counts
+                counts[int(block["number"], 16)] = len(block["transactions"])
+        return counts
+
+
+class PGDensitySource(DensitySource):
+    """
+    Counts of data already indexed in postgres, used when re-indexing from PGSourceJob.
+    """
+
+    def __init__(self, service, unit="transactions"):
+        if unit not in ("transactions", "logs"):
+            raise ValueError(f"Unknown density unit: {unit}, it should be transactions or logs")
+        self.service = service
+        self.unit = unit
+
+    def get_counts(self, start_block, end_block):
+        session = self.service.get_service_session()
+        try:
+            if self.unit == "transactions":
+                rows = (
+                    session.query(Blocks.number, Blocks.transactions_count)
+                    .filter(and_(Blocks.number.between(start_block, end_block), Blocks.reorg == False))
+                    .all()
+                )
+                counts = {number: transactions_count or 0 for number, transactions_count in rows}
+            else:
+                counts = {number: 0 for number in range(start_block, end_block + 1)}
+                rows = (
+                    session.query(Logs.block_number, func.count())
+                    .filter(and_(Logs.block_number.between(start_block, end_block), Logs.reorg == False))
+                    .group_by(Logs.block_number)
+                    .all()
+                )
+                counts.update({block_number: logs_count for block_number, logs_count in rows})
+        finally:
+            session.close()
+        return counts
+
+
+class BlockRangePlanner:
+    """
+    Size each batch by the work it holds instead of a fixed number of blocks. A batch grows until it reaches
+    target_items transactions (or logs), but never has fewer than min_blocks or more than max_blocks blocks.
+    """
+
+    def __init__(self, density_source: DensitySource, target_items, min_blocks=1, max_blocks=1000):
+        if min_blocks < 1 or max_blocks < min_blocks:
+            raise ValueError(f"Invalid block bounds: min {min_blocks}, max {max_blocks}")
+        self.density_source = density_source
+        self.target_items = target_items
+        self.min_blocks = min_blocks
+        self.max_blocks = max_blocks
+        self._counts = {}
+
+    def plan(self, start_block, limit_block):
+        """
+        Return the last block of the batch starting at start_block, never beyond limit_block.
+        """
+        upper_block = min(limit_block, start_block + self.max_blocks - 1)
+        if upper_block < start_block:
+            return upper_block
+        self._prefetch(start_block, upper_block)
+
+        items = 0
+        end_block = start_block - 1
+        for block_number in range(start_block, upper_block + 1):
+            if block_number not in self._counts:
+                break
+            count = self._counts[block_number]
+            if block_number - start_block + 1 > self.min_blocks and items + count > self.target_items:
+                break
+            items += count
+            end_block = block_number
+
+        # unknown density, fall back to the smallest batch
+        end_block = max(end_block, min(start_block + self.min_blocks - 1, upper_block))
+        logger.info(f"Planned blocks {start_block} to {end_block} with about {items} items")
+        return end_block
+
+    def _prefetch(self, start_block, upper_block):
+        for block_number in [number for number in self._counts if number < start_block]:
+            self._counts.pop(block_number)
+
+        missing_start = start_block
+        while missing_start in self._counts:
+            missing_start += 1
+        if missing_start <= upper_block:
+            self._counts.update(self.density_source.get_counts(missing_start, upper_block))
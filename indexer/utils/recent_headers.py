@@ -0,0 +1,87 @@
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import orjson
+
+from common.utils.file_utils import smart_open
+from indexer.domain.block import Block
+
+logger = logging.getLogger(__name__)
+
+
+class RecentHeaders:
+    """
+    Ring buffer of the most recent canonical block hashes, used to detect reorgs between stream batches
+    without querying the database.
+    """
+
+    def __init__(self, size=256, file_name=None):
+        self.size = size
+        self.file_name = file_name
+        # block number -> block hash, kept in ascending block number order
+        self._hashes = OrderedDict()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, block_number):
+        return block_number in self._hashes
+
+    def get(self, block_number) -> Optional[str]:
+        return self._hashes.get(block_number)
+
+    def numbers(self) -> List[int]:
+        return list(self._hashes.keys())
+
+    def oldest(self) -> Optional[int]:
+        return next(iter(self._hashes), None)
+
+    def extend(self, blocks: List[Block]) -> Optional[int]:
+        """
+        Append a batch of blocks and return the first block number whose parent hash does not match the
+        recorded hash of the block before it, or None if the batch links to the recorded chain.
+        """
+        mismatch = None
+        for block in sorted(blocks, key=lambda b: b.number):
+            parent_hash = self._hashes.get(block.number - 1)
+            if mismatch is None and parent_hash is not None and parent_hash != block.parent_hash:
+                mismatch = block.number
+            self._put(block.number, block.hash)
+        return mismatch
+
+    def update(self, hashes: Dict[int, str]):
+        for block_number in sorted(hashes):
+            self._put(block_number, hashes[block_number])
+
+    def truncate(self, last_block_number):
+        # drop everything after last_block_number, those blocks are going to be synced again
+        for block_number in [number for number in self._hashes if number > last_block_number]:
+            self._hashes.pop(block_number)
+
+    def _put(self, block_number, block_hash):
+        self._hashes[block_number] = block_hash
+        if next(reversed(self._hashes)) > block_number:
+            self._hashes = OrderedDict(sorted(self._hashes.items()))
+        while len(self._hashes) > self.size:
+            self._hashes.popitem(last=False)
+
+    def load(self):
+        if self.file_name is None or not os.path.isfile(self.file_name):
+            return
+        try:
+            with smart_open(self.file_name, "r", binary=True) as f:
+                headers = orjson.loads(f.read())
+        except Exception as e:
+            logger.warning(f"Failed to load recent headers from {self.file_name}, starting with an empty buffer: {e}")
+            return
+        self.update({int(block_number): block_hash for block_number, block_hash in headers})
+        logger.info(f"Loaded {len(self._hashes)} recent headers from {self.file_name}")
+
+    def save(self):
+        if self.file_name is None:
+            return
+        with smart_open(self.file_name, "w", binary=True) as f:
+            f.write(orjson.dumps(list(self._hashes.items())))
+        logger.info(f"Saved {len(self._hashes)} recent headers to {self.file_name}")
@@ -1,69 +1,111 @@
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
 
-from sqlalchemy import and_
-
 from common.converter.pg_converter import domain_model_mapping
 from common.models import HemeraModel
 from common.services.postgresql_service import PostgreSQLService
 from common.utils.exception_control import RetriableError
 
+# tables holding reorged rows for the block range being rerun, shared by every job in the rerun
+_reorged_tables_cache = {"range": None, "tables": set(), "candidates": []}
+
+
+def block_number_column(table: HemeraModel):
+    if hasattr(table, "number"):
+        return "number"
+    if hasattr(table, "block_number"):
+        return "block_number"
+    return None
+
+
+def reorg_tables(jobs):
+    tables = {}
+    for job in jobs:
+        for output in job.output_types:
+            if output not in domain_model_mapping:
+                continue
+            table = domain_model_mapping[output]["table"]
+            if table.__tablename__ in tables or not hasattr(table, "reorg"):
+                continue
+            if block_number_column(table) is None:
+                logging.warning(
+                    f"Reorging table: {table} has no block number info, "
+                    f"could not complete reorg action, "
+                    f"reorging will be skipped this table."
+                )
+                continue
+            tables[table.__tablename__] = table
+    return list(tables.values())
+
+
+def cache_reorged_tables(block_number, end_block, tables):
+    _reorged_tables_cache["range"] = (block_number, end_block)
+    _reorged_tables_cache["tables"] = set(tables)
+
+
+def reset_reorged_tables_cache(jobs=()):
+    # called before each rerun, the candidates are the tables checked together on the first cache miss
+    cache_reorged_tables(None, None, set())
+    _reorged_tables_cache["candidates"] = reorg_tables(jobs)
 
-def set_reorg_sign(jobs, block_number, service):
-    conn = service.get_conn()
-    cur = conn.cursor()
+
+def set_reorg_sign(jobs, block_number, service, end_block=None):
+    end_block = block_number if end_block is None else end_block
+    update_time = datetime.utcfromtimestamp(datetime.now(timezone.utc).timestamp())
+    marked_tables = set()
     try:
-        table_done = set()
-        for job in jobs:
-            for output in job.output_types:
-                model = domain_model_mapping[output.__name__]
-                table = model["table"]
-                if table.__name__ in table_done:
-                    continue
-
-                table_done.add(table.__name__)
-                if hasattr(table, "reorg"):
-                    update_stmt = (
-                        f"UPDATE {table.__tablename__} "
-                        + f"SET reorg=TRUE, update_time='{datetime.utcfromtimestamp(datetime.now(timezone.utc).timestamp())}'"
-                    )
-
-                    if hasattr(table, "number"):
-                        update_stmt += f"WHERE number={block_number}"
-                    elif hasattr(table, "block_number"):
-                        update_stmt += f"WHERE block_number={block_number}"
-                    else:
-                        update_stmt = None
-                        logging.warning(
-                            f"Reorging table: {table} has no block number info, "
-                            f"could not complete reorg action, "
-                            f"reorging will be skipped this table."
+        with service.connection_scope() as conn:
+            try:
+                with conn.cursor() as cur:
+                    for table in reorg_tables(jobs):
+                        cur.execute(
+                            f"UPDATE {table.__tablename__} SET reorg=TRUE, update_time=%s "
+                            f"WHERE {block_number_column(table)} BETWEEN %s AND %s",
+                            (update_time, block_number, end_block),
                         )
-
-                    if update_stmt:
-                        cur.execute(update_stmt)
-        conn.commit()
+                        if cur.rowcount > 0:
+                            marked_tables.add(table.__tablename__)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
     except Exception as e:
         logging.error(e)
         raise RetriableError(e)
-    finally:
-        service.release_conn(conn)
 
+    # every row in the range has just been marked, so the marked tables are exactly the ones to rerun
+    cache_reorged_tables(block_number, end_block, marked_tables)
+    return marked_tables
 
-def should_reorg(block_number: int, table: HemeraModel, service: PostgreSQLService):
-    if not hasattr(table, "reorg"):
-        return False
-    condition = None
-    if hasattr(table, "number"):
-        condition = and_(table.reorg == True, table.number == block_number)
-    elif hasattr(table, "block_number"):
-        condition = and_(table.reorg == True, table.block_number == block_number)
-    else:
+
+def find_reorged_tables(tables, block_number, end_block, service: PostgreSQLService):
+    groups = defaultdict(list)
+    for table in tables:
+        column = block_number_column(table)
+        if hasattr(table, "reorg") and column is not None:
+            groups[column].append(table.__tablename__)
+
+    reorged_tables = set()
+    with service.cursor_scope() as cur:
+        for column, table_names in groups.items():
+            sql = " UNION ALL ".join(
+                f"SELECT %s WHERE EXISTS (SELECT 1 FROM {table_name} "
+                f"WHERE reorg = TRUE AND {column} BETWEEN %s AND %s)"
+                for table_name in table_names
+            )
+            params = [param for table_name in table_names for param in (table_name, block_number, end_block)]
+            cur.execute(sql, params)
+            reorged_tables.update(row[0] for row in cur.fetchall())
+    return reorged_tables
+
+
+def should_reorg(block_number: int, table: HemeraModel, service: PostgreSQLService, end_block: int = None):
+    if not hasattr(table, "reorg") or block_number_column(table) is None:
         return False
+    end_block = block_number if end_block is None else end_block
 
-    session = service.get_service_session()
-    try:
-        result = session.query(table).filter(condition).first()
-    finally:
-        session.close()
-    return result is not None
+    if _reorged_tables_cache["range"] != (block_number, end_block):
+        tables = set(_reorged_tables_cache["candidates"]) | {table}
+        cache_reorged_tables(block_number, end_block, find_reorged_tables(tables, block_number, end_block, service))
+    return table.__tablename__ in _reorged_tables_cache["tables"]
@@ -0,0 +1,274 @@
+import logging
+import re
+from typing import List
+
+import orjson
+
+from indexer.domain.trace import Trace
+from indexer.utils.json_rpc_requests import generate_trace_block_by_number_json_rpc, generate_trace_block_json_rpc
+
+logger = logging.getLogger(__name__)
+
+TRACE_SOURCE_AUTO = "auto"
+
+METHOD_NOT_FOUND = -32601
+# only errors about the method or the tracer itself, block errors like "header not found" select the source
+UNSUPPORTED_ERROR_PATTERN = re.compile(
+    r"tracer not found|unknown tracer|method not found|unsupported method"
+    r"|method \S+ (?:does not exist|is not available|is not supported|not supported)",
+    re.IGNORECASE,
+)
+
+# the parity messages of failed frames, as trace_block returns them, and the geth messages of the callTracer
+PARITY_ERRORS = {
+    "Reverted": "execution reverted",
+    "Out of gas": "out of gas",
+    "Bad jump destination": "invalid jump destination",
+}
+
+
+class TraceSource:
+    """
+    One way of tracing a block, normalized into Trace entities identical to the callTracer ones: same trace
+    types, trace addresses, trace ids and trace indexes. Subclasses build the json rpc request of a block and
+    flatten its result, releasing the raw frames of each transaction once flattened.
+
+    The parity format has no result for a failed frame, its gas_used and output are None there.
+    """
+
+    name = None
+
+    def rpc_requests(self, block_numbers):
+        raise NotImplementedError
+
+    def iter_block_traces(self, block: dict, result: list):
+        raise NotImplementedError
+
+
+def _with_transaction_hashes(block, result):
+    # older nodes trace a block without the transaction hashes, in transaction order
+    if len(result) > 0 and "txHash" not in result[0]:
+        transactions = block["transactions"]
+        if len(result) != len(transactions):
+            raise ValueError("The number of traces is wrong " + str(result))
+
+        for idx, trace_result in enumerate(result):
+            trace_result["txHash"] = transactions[idx]["hash"]
+    return result
+
+
+class ExtractTraces:
+    """
+    Flatten the callTracer frames of a block into Trace entities in a single pass.
+
+    Frames are walked depth first with an explicit stack, so deeply nested calls neither recurse nor copy
+    the traces of every subtree into their parent, and each frame is turned into its Trace directly.
+    """
+
+    def geth_trace_to_traces(self, geth_trace) -> List[Trace]:
+        return list(self.iter_block_traces(geth_trace))
+
+    def iter_block_traces(self, geth_trace):
+        for tx_index, tx in enumerate(geth_trace["transaction_traces"]):
+            yield from self.iter_transaction_traces(geth_trace, tx_index, tx["txHash"], tx["result"])
+
+    def iter_transaction_traces(self, geth_trace, tx_index, tx_hash, tx_trace):
+        block_number = geth_trace["block_number"]
+        block_hash = geth_trace["block_hash"]
+        block_timestamp = geth_trace["block_timestamp"]
+
+        trace_index = 0
+        stack = [(tx_trace, [])]
+        while stack:
+            frame, trace_address = stack.pop()
+            calls = frame.get("calls") or []
+
+            # lowercase for compatibility with parity traces
+            trace_type = frame.get("type").lower()
+            call_type = ""
+            if trace_type == "selfdestruct":
+                # rename to suicide for compatibility with parity traces
+                trace_type = "suicide"
+            elif trace_type in ("call", "callcode", "delegatecall", "staticcall"):
+                call_type = trace_type
+                trace_type = "call"
+
+            value, gas, gas_used, error = frame.get("value"), frame.get("gas"), frame.get("gasUsed"), frame.get("error")
+            yield Trace(
+                trace_id=f"{block_number}_{tx_index}_{trace_index}",
+                from_address=frame.get("from"),
+                to_address=frame.get("to"),
+                input=frame.get("input"),
+                output=frame.get("output"),
+                value=int(value, 16) if value else None,
+                gas=int(gas, 16) if gas else None,
+                gas_used=int(gas_used, 16) if gas_used else None,
+                trace_type=trace_type,
+                call_type=call_type,
+                subtraces=len(calls),
+                trace_address=trace_address,
+                error=error,
+                status=1 if error is None else 0,
+                block_number=block_number,
+                block_hash=block_hash,
+                block_timestamp=block_timestamp,
+                transaction_index=tx_index,
+                transaction_hash=tx_hash,
+                # the trace index is one ahead of the index in the trace id, kept for the existing data
+                trace_index=trace_index + 1,
+            )
+            trace_index += 1
+
+            # pushed in reverse so the children are visited in call order
+            for call_index in range(len(calls) - 1, -1, -1):
+                stack.append((calls[call_index], trace_address + [call_index]))
+
+
+class CallTracerSource(TraceSource):
+    """
+    debug_traceBlockByNumber with the nested callTracer, available on every geth family node.
+    """
+
+    name = "call_tracer"
+
+    def rpc_requests(self, block_numbers):
+        return list(generate_trace_block_by_number_json_rpc(block_numbers, "callTracer"))
+
+    def iter_block_traces(self, block, result):
+        result = _with_transaction_hashes(block, result)
+        geth_trace = {
+            "block_number": block["number"],
+            "block_hash": block["hash"],
+            "block_timestamp": block["timestamp"],
+        }
+        extractor = ExtractTraces()
+        for tx_index in range(len(result)):
+            # release every transaction trace once it is flattened, the entities keep what they need
+            tx, result[tx_index] = result[tx_index], None
+            yield from extractor.iter_transaction_traces(geth_trace, tx_index, tx["txHash"], tx["result"])
+
+
+def parity_frame_to_trace(frame, block, tx_index, tx_hash, trace_index) -> Trace:
+    """
+    Normalize a parity style frame, as returned by trace_block and the flatCallTracer, like a callTracer frame.
+    """
+    action = frame.get("action") or {}
+    result = frame.get("result") or {}
+    trace_type = frame.get("type")
+    call_type = ""
+    if trace_type == "create":
+        trace_type = action.get("creationMethod") or "create"
+        from_address, to_address = action.get("from"), result.get("address")
+        value, input, output = action.get("value"), action.get("init"), result.get("code")
+    elif trace_type == "suicide":
+        from_address, to_address = action.get("address"), action.get("refundAddress")
+        # the callTracer reports a selfdestruct with an empty input and no gas, the parity format leaves them out
+        value, input, output = action.get("balance"), "0x", None
+        action, result = {"gas": "0x0"}, {"gasUsed": "0x0"}
+    else:
+        call_type = action.get("callType") or ""
+        from_address, to_address = action.get("from"), action.get("to")
+        value, input, output = action.get("value"), action.get("input"), result.get("output")
+
+    gas, gas_used, error = action.get("gas"), result.get("gasUsed"), frame.get("error")
+    error = PARITY_ERRORS.get(error, error)
+    return Trace(
+        trace_id=f"{block['number']}_{tx_index}_{trace_index}",
+        from_address=from_address,
+        to_address=to_address,
+        input=input,
+        output=output,
+        value=int(value, 16) if value else None,
+        gas=int(gas, 16) if gas else None,
+        gas_used=int(gas_used, 16) if gas_used else None,
+        trace_type=trace_type,
+        call_type=call_type,
+        subtraces=frame.get("subtraces"),
+        trace_address=frame.get("traceAddress") or [],
+        error=error,
+        status=1 if error is None else 0,
+        block_number=block["number"],
+        block_hash=block["hash"],
+        block_timestamp=block["timestamp"],
+        transaction_index=tx_index,
+        transaction_hash=tx_hash,
+        trace_index=trace_index + 1,
+    )
+
+
+class FlatCallTracerSource(TraceSource):
+    """
+    debug_traceBlockByNumber with the flatCallTracer, the parity format produced by geth itself, which skips
+    building and serializing the nested frames.
+    """
+
+    name = "flat_call_tracer"
+
+    def rpc_requests(self, block_numbers):
+        return list(generate_trace_block_by_number_json_rpc(block_numbers, "flatCallTracer"))
+
+    def iter_block_traces(self, block, result):
+        result = _with_transaction_hashes(block, result)
+        for tx_index in range(len(result)):
+            tx, result[tx_index] = result[tx_index], None
+            for trace_index, frame in enumerate(tx["result"]):
+                yield parity_frame_to_trace(frame, block, tx_index, tx["txHash"], trace_index)
+
+
+class TraceBlockSource(TraceSource):
+    """
+    trace_block, native on erigon, reth and nethermind and much faster there than the debug tracers.
+    Block and uncle rewards have no transaction and are skipped, like in the callTracer output.
+    """
+
+    name = "trace_block"
+
+    def rpc_requests(self, block_numbers):
+        return list(generate_trace_block_json_rpc(block_numbers))
+
+    def iter_block_traces(self, block, result):
+        tx_hash, trace_index = None, 0
+        for index in range(len(result)):
+            frame, result[index] = result[index], None
+            if frame.get("transactionHash") is None:
+                continue
+            if frame["transactionHash"] != tx_hash:
+                tx_hash, trace_index = frame["transactionHash"], 0
+            yield parity_frame_to_trace(frame, block, frame["transactionPosition"], tx_hash, trace_index)
+            trace_index += 1
+
+
+TRACE_SOURCES = {source.name: source for source in (TraceBlockSource, FlatCallTracerSource, CallTracerSource)}
+
+
+def get_trace_source(name) -> TraceSource:
+    if name not in TRACE_SOURCES:
+        raise ValueError(
+            f"Unknown trace source: {name}, it should be {TRACE_SOURCE_AUTO} or one of {list(TRACE_SOURCES)}"
+        )
+    return TRACE_SOURCES[name]()
+
+
+def is_unsupported_error(error) -> bool:
+    return error.get("code") == METHOD_NOT_FOUND or bool(UNSUPPORTED_ERROR_PATTERN.search(error.get("message") or ""))
+
+
+def detect_trace_source(make_request, block_number) -> TraceSource:
+    """
+    Probe the node with one block and return the fastest source it supports, in the order of TRACE_SOURCES.
+    The callTracer is the fallback and is not probed, any error other than an unsupported method or tracer
+    selects the probed source, so that a failing block is reported by the job instead of hidden here.
+    """
+    sources = [source() for source in TRACE_SOURCES.values()]
+    for source in sources[:-1]:
+        response = make_request(params=orjson.dumps(source.rpc_requests([block_number])[0]))
+        if isinstance(response, list):
+            response = response[0]
+        error = response.get("error")
+        if error is None or not is_unsupported_error(error):
+            logger.info(f"Tracing blocks with {source.name}")
+            return source
+        logger.info(f"The node does not support the {source.name} trace source: {error.get('message')}")
+
+    logger.info(f"Tracing blocks with {sources[-1].name}")
+    return sources[-1]
@@ -0,0 +1,221 @@
+import atexit
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMATS = ("chrome", "otlp")
+FLUSH_SPANS = 1000
+
+_current_span = contextvars.ContextVar("hemera_current_span", default=None)
+_tracer = None
+
+
+class Span(object):
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent", "attributes", "start_ns", "end_ns", "tid", "_token")
+
+    def __init__(self, tracer, name, parent, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.tid = threading.get_ident()
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.end_ns = time.time_ns()
+        self.tracer.record(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.finish()
+        return False
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Buffer finished spans and append them to a local trace file.
+    The chrome format opens in chrome://tracing or ui.perfetto.dev, the otlp format holds one OTLP-JSON
+    export request per line, as written by the OpenTelemetry collector file exporter.
+    """
+
+    def __init__(self, path, trace_format="chrome"):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}, it should be one of {TRACE_FORMATS}")
+        self.path = path
+        self.trace_format = trace_format
+        self.pid = os.getpid()
+        self._spans = []
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if trace_format == "chrome":
+            # the trace viewers accept an unterminated json array, which keeps the file appendable
+            with open(path, "w") as f:
+                f.write("[\n")
+        else:
+            open(path, "w").close()
+
+    def record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) < FLUSH_SPANS:
+                return
+            spans, self._spans = self._spans, []
+        self._write(spans)
+
+    def flush(self):
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if spans:
+            self._write(spans)
+
+    def _write(self, spans):
+        if self.trace_format == "chrome":
+            content = b"".join(orjson.dumps(event) + b",\n" for span in spans for event in self._chrome_events(span))
+        else:
+            content = orjson.dumps(self._otlp_request(spans)) + b"\n"
+        with self._file_lock:
+            with open(self.path, "ab") as f:
+                f.write(content)
+
+    def _chrome_events(self, span: Span):
+        start_us = span.start_ns / 1000
+        args = dict(span.attributes)
+        args["span_id"] = f"{span.span_id:016x}"
+        if span.parent is not None:
+            args["parent_span_id"] = f"{span.parent.span_id:016x}"
+        yield {
+            "name": span.name,
+            "cat": "hemera",
+            "ph": "X",
+            "ts": start_us,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": self.pid,
+            "tid": span.tid,
+            "args": args,
+        }
+        if span.parent is not None and span.parent.tid != span.tid:
+            # flow arrow from the submitting thread to the pool thread
+            flow = {"name": "submit", "cat": "flow", "id": span.span_id, "ts": start_us, "pid": self.pid}
+            yield {**flow, "ph": "s", "tid": span.parent.tid}
+            yield {**flow, "ph": "f", "bp": "e", "tid": span.tid}
+
+    def _otlp_request(self, spans):
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": "hemera-indexer"}},
+                            {"key": "process.pid", "value": {"intValue": str(self.pid)}},
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "hemera"}, "spans": [self._otlp_span(span) for span in spans]}],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _otlp_span(span: Span):
+        attributes = [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()]
+        attributes.append({"key": "thread.id", "value": {"intValue": str(span.tid)}})
+        return {
+            "traceId": f"{span.trace_id:032x}",
+            "spanId": f"{span.span_id:016x}",
+            "parentSpanId": f"{span.parent.span_id:016x}" if span.parent is not None else "",
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": attributes,
+            "status": {"code": 2} if "error" in span.attributes else {},
+        }
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def configure_tracing(path, trace_format="chrome"):
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = Tracer(path, trace_format)
+    atexit.register(_tracer.flush)
+    logger.info(f"Writing {trace_format} trace spans to {path}")
+    return _tracer
+
+
+def disable_tracing():
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = None
+
+
+def span(name, **attributes):
+    """
+    Start a child span of the current one. Use it as a context manager, or call finish() on a leaf span
+    that never becomes current. Returns a shared no-op object when tracing is not configured.
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return Span(_tracer, name, _current_span.get(), attributes)
+
+
+def propagate(fn):
+    """
+    Bind fn to the current span, for work handed to another thread.
+    """
+    if _tracer is None:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)